@@ -0,0 +1,500 @@
+"""
+Benchmarks for the projection, routing, bounds and rendering paths, with
+scalar (per point Python calls) and batch (NumPy array) variants timed
+side by side. Run with, e.g.:
+
+    python -m org.cassandra.geo_maps.benchmarks --max-points 1000000 --output results.json
+    python -m org.cassandra.geo_maps.benchmarks --baseline results.json
+
+Results are written as JSON, and when a baseline results file is given,
+each timing is compared against the matching one in the baseline.
+Timings are only comparable on the same machine, so make the baseline
+there (e.g., before a change) with --output, then check against it with
+--baseline and --fail-on-regression.
+"""
+import argparse
+import io
+import json
+import platform
+import sys
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from .geo_bounds import GeoBounds
+from .geo_maps import CompositeGeoMap, UsaContinentalCompositeGeoMap
+from .projection_table import ProjectionTable
+from .svg_renderer import SvgMapRenderer
+from .svg_writer import SvgWriter
+from .view_box import ViewBox
+from . import utils
+
+
+SCALAR = 'scalar'
+BATCH = 'batch'
+# Batch, but interpolated from a projection_table.ProjectionTable
+TABLE = 'table'
+# Batch, but written by an svg_writer.SvgWriter (with fewer decimals, so a
+# smaller output than the batch variant)
+WRITER = 'writer'
+
+DEFAULT_MAX_POINTS = 1000000
+# The scalar variants take about a microsecond or more per point, so are
+# not run beyond this by default.
+DEFAULT_MAX_SCALAR_POINTS = 100000
+DEFAULT_REPEAT = 3
+# The view box benchmarks time this many view boxes at most, whatever the
+# point count, and report the time per view box.
+DEFAULT_MAX_VIEW_BOXES = 1000
+DEFAULT_POINTS_PER_EDGE = 32
+DEFAULT_SEED = 1234
+
+# Fraction of generated points in each of the composite map's GeoMap bounds
+DEFAULT_POINT_MIX = [ 0.8, 0.1, 0.1 ]
+
+# Timings this much slower than the baseline are reported as regressions
+DEFAULT_REGRESSION_THRESHOLD = 0.2
+
+
+def get_point_count_list( max_points : int ):
+    """ Powers of ten from 1 up to max_points. """
+    point_count_list = list()
+    point_count = 1
+    while point_count <= max_points:
+        point_count_list.append( point_count )
+        point_count *= 10
+        continue
+    return point_count_list
+
+
+def get_random_points( composite_map : CompositeGeoMap,
+                       point_count : int,
+                       seed : int = DEFAULT_SEED,
+                       point_mix : List[float] = DEFAULT_POINT_MIX ):
+    """ Reproducible ( longitude_array, latitude_array ) spread over the GeoMap bounds by point_mix. """
+    rng = np.random.default_rng( seed )
+    point_mix = np.asarray( point_mix[:len(composite_map.geo_bounds_list)], dtype = np.float64 )
+    geo_map_index_array = rng.choice( len(point_mix), size = point_count, p = point_mix / point_mix.sum() )
+    longitude_array = np.empty( point_count, dtype = np.float64 )
+    latitude_array = np.empty( point_count, dtype = np.float64 )
+    for geo_map_index, geo_bounds in enumerate( composite_map.geo_bounds_list[:len(point_mix)] ):
+        is_in_map = geo_map_index_array == geo_map_index
+        map_point_count = int( is_in_map.sum() )
+        longitude_array[is_in_map] = rng.uniform( geo_bounds.longitude_min, geo_bounds.longitude_max, map_point_count )
+        latitude_array[is_in_map] = rng.uniform( geo_bounds.latitude_min, geo_bounds.latitude_max, map_point_count )
+        continue
+    return ( longitude_array, latitude_array )
+
+
+class BenchmarkContext:
+    """
+    The inputs for one point count, generated once and shared by all the
+    benchmarks. The Python lists used by the scalar variants are only built
+    up to max_scalar_points (they are None beyond that).
+    """
+
+    def __init__( self,
+                  composite_map : CompositeGeoMap,
+                  point_count : int,
+                  seed : int = DEFAULT_SEED,
+                  max_scalar_points : int = DEFAULT_MAX_SCALAR_POINTS,
+                  max_view_boxes : int = DEFAULT_MAX_VIEW_BOXES ):
+        self.composite_map = composite_map
+        self.geo_map = composite_map.geo_map_list[0]
+        self.projection = self.geo_map.projection
+        # Over all the points, so none fall back to the exact projection
+        self.projection_table = ProjectionTable.build( self.geo_map, geo_bounds = composite_map.geo_bounds )
+        self.point_count = point_count
+        self.longitude_array, self.latitude_array = get_random_points( composite_map, point_count, seed = seed )
+        projected_x, projected_y = self.projection.x_y_from_deg_array( self.longitude_array, self.latitude_array )
+        self.projected_x_array = projected_x
+        self.projected_y_array = projected_y
+
+        self.longitude_list, self.latitude_list = None, None
+        self.projected_x_list, self.projected_y_list = None, None
+        if point_count <= max_scalar_points:
+            self.longitude_list = self.longitude_array.tolist()
+            self.latitude_list = self.latitude_array.tolist()
+            self.projected_x_list = projected_x.tolist()
+            self.projected_y_list = projected_y.tolist()
+
+        # View boxes of random sizes and positions within the default view box
+        view_box_count = min( point_count, max_view_boxes )
+        rng = np.random.default_rng( seed )
+        default_view_box = composite_map.default_view_box
+        width_array = default_view_box.width * rng.uniform( 0.05, 1.0, view_box_count )
+        height_array = width_array / composite_map.default_aspect_ratio
+        self.view_box_list = [
+            ViewBox( x = default_view_box.x + ( ( default_view_box.width - width ) * x_fraction ),
+                     y = default_view_box.y + ( ( default_view_box.height - height ) * y_fraction ),
+                     width = width,
+                     height = height )
+            for width, height, x_fraction, y_fraction in zip( width_array.tolist(), height_array.tolist(),
+                                                              rng.random( view_box_count ).tolist(),
+                                                              rng.random( view_box_count ).tolist() )
+        ]
+        return
+
+    def get_item_count( self, name : str ):
+        """ What the named benchmark's time is per: view boxes or points. """
+        if name in VIEW_BOX_BENCHMARK_NAME_SET:
+            return len(self.view_box_list)
+        return self.point_count
+
+
+def _projection_x_y_from_deg_scalar( context : BenchmarkContext ):
+    x_y_from_deg = context.projection.x_y_from_deg
+    for longitude, latitude in zip( context.longitude_list, context.latitude_list ):
+        x_y_from_deg( longitude, latitude )
+        continue
+    return
+
+
+def _projection_x_y_from_deg_batch( context : BenchmarkContext ):
+    context.projection.x_y_from_deg_array( context.longitude_array, context.latitude_array )
+    return
+
+
+def _projection_deg_from_x_y_scalar( context : BenchmarkContext ):
+    deg_from_x_y = context.projection.deg_from_x_y
+    for x, y in zip( context.projected_x_list, context.projected_y_list ):
+        deg_from_x_y( x, y )
+        continue
+    return
+
+
+def _projection_deg_from_x_y_batch( context : BenchmarkContext ):
+    context.projection.deg_from_x_y_array( context.projected_x_array, context.projected_y_array )
+    return
+
+
+def _geo_map_long_lat_deg_to_coords_scalar( context : BenchmarkContext ):
+    long_lat_deg_to_coords = context.geo_map.long_lat_deg_to_coords
+    for longitude, latitude in zip( context.longitude_list, context.latitude_list ):
+        long_lat_deg_to_coords( longitude, latitude )
+        continue
+    return
+
+
+def _geo_map_long_lat_deg_to_coords_batch( context : BenchmarkContext ):
+    context.geo_map.long_lat_deg_to_coords_array( context.longitude_array, context.latitude_array )
+    return
+
+
+def _geo_map_long_lat_deg_to_coords_table( context : BenchmarkContext ):
+    context.projection_table.long_lat_deg_to_coords_array( context.longitude_array, context.latitude_array )
+    return
+
+
+def _composite_get_geo_map_for_point_scalar( context : BenchmarkContext ):
+    get_geo_map_for_point = context.composite_map.get_geo_map_for_point
+    for longitude, latitude in zip( context.longitude_list, context.latitude_list ):
+        get_geo_map_for_point( longitude, latitude )
+        continue
+    return
+
+
+def _composite_get_geo_map_for_point_batch( context : BenchmarkContext ):
+    context.composite_map.get_geo_map_index_array( context.longitude_array, context.latitude_array )
+    return
+
+
+def _composite_long_lat_deg_to_coords_scalar( context : BenchmarkContext ):
+    get_geo_map_for_point = context.composite_map.get_geo_map_for_point
+    for longitude, latitude in zip( context.longitude_list, context.latitude_list ):
+        get_geo_map_for_point( longitude, latitude ).long_lat_deg_to_coords( longitude, latitude )
+        continue
+    return
+
+
+def _composite_long_lat_deg_to_coords_batch( context : BenchmarkContext ):
+    context.composite_map.long_lat_deg_to_coords_array( context.longitude_array, context.latitude_array )
+    return
+
+
+def _geo_bounds_to_display_bounds_scalar( context : BenchmarkContext ):
+    """ Bounds of the points accumulated one at a time, then projected to display bounds. """
+    geo_bounds = GeoBounds()
+    for longitude, latitude in zip( context.longitude_list, context.latitude_list ):
+        geo_bounds.add_point( longitude = longitude, latitude = latitude )
+        continue
+    context.composite_map.geo_bounds_to_display_bounds( geo_bounds = geo_bounds )
+    return
+
+
+def _geo_bounds_to_display_bounds_batch( context : BenchmarkContext ):
+    geo_bounds = GeoBounds()
+    geo_bounds.add_points( context.longitude_array, context.latitude_array )
+    context.composite_map.geo_bounds_to_display_bounds( geo_bounds = geo_bounds )
+    return
+
+
+def _view_box_to_geo_bounds_list_scalar( context : BenchmarkContext ):
+    """ One call per view box, inverse projecting its corners one at a time. """
+    view_box_to_geo_bounds_list = context.composite_map.view_box_to_geo_bounds_list
+    for view_box in context.view_box_list:
+        view_box_to_geo_bounds_list( view_box = view_box )
+        continue
+    return
+
+
+def _view_box_to_geo_bounds_list_batch( context : BenchmarkContext ):
+    """
+    One call per view box, inverse projecting points along its edges as
+    arrays. That is more work (and tighter bounds) than the corners alone,
+    so the speedup over scalar is not like for like. The sampled points are
+    cached, so the cache is cleared first to time the projection rather
+    than the lookups.
+    """
+    composite_map = context.composite_map
+    composite_map.clear_edge_sample_cache()
+    for view_box in context.view_box_list:
+        composite_map.view_box_to_geo_bounds_list( view_box = view_box, points_per_edge = DEFAULT_POINTS_PER_EDGE )
+        continue
+    return
+
+
+def _utils_get_distance_scalar( context : BenchmarkContext ):
+    """ Distance from each point to the next. """
+    get_distance = utils.get_distance
+    longitude_list, latitude_list = context.longitude_list, context.latitude_list
+    for idx in range( len(longitude_list) - 1 ):
+        get_distance( latitude_list[idx], longitude_list[idx], latitude_list[idx + 1], longitude_list[idx + 1] )
+        continue
+    return
+
+
+def _utils_get_distance_batch( context : BenchmarkContext ):
+    utils.get_distance_array( context.latitude_array[:-1], context.longitude_array[:-1],
+                              context.latitude_array[1:], context.longitude_array[1:] )
+    return
+
+
+def _render_svg( context : BenchmarkContext, out_fh, point_markup : bytes ):
+    composite_map = context.composite_map
+    view_box = composite_map.default_view_box
+    out_fh.write( ( '<svg xmlns="http://www.w3.org/2000/svg"'
+                    f' viewBox="{view_box}">' ).encode() )
+    SvgMapRenderer().write_base_map( composite_map = composite_map, view_box = view_box, out_fh = out_fh )
+    out_fh.write( point_markup )
+    out_fh.write( b'</svg>' )
+    return
+
+
+def _render_svg_scalar( context : BenchmarkContext ):
+    """ As example.py: each point projected and written as a circle with f-strings. """
+    get_geo_map_for_point = context.composite_map.get_geo_map_for_point
+    markup_list = list()
+    for longitude, latitude in zip( context.longitude_list, context.latitude_list ):
+        x, y = get_geo_map_for_point( longitude, latitude ).long_lat_deg_to_coords( longitude, latitude )
+        markup_list.append( f'<circle cx="{x}" cy="{y}" r="3"></circle>\n' )
+        continue
+    _render_svg( context, io.BytesIO(), ''.join( markup_list ).encode() )
+    return
+
+
+def _render_svg_batch( context : BenchmarkContext ):
+    x_array, y_array = context.composite_map.long_lat_deg_to_coords_array( context.longitude_array,
+                                                                           context.latitude_array )
+    point_markup = ( '<circle cx="%.2f" cy="%.2f" r="3"></circle>\n' * context.point_count ) % tuple(
+        np.column_stack([ x_array, y_array ]).ravel().tolist() )
+    _render_svg( context, io.BytesIO(), point_markup.encode() )
+    return
+
+
+def _render_svg_writer( context : BenchmarkContext ):
+    """ Points projected in one batch and written by an SvgWriter. """
+    composite_map = context.composite_map
+    view_box = composite_map.default_view_box
+    x_array, y_array = composite_map.long_lat_deg_to_coords_array( context.longitude_array,
+                                                                   context.latitude_array )
+    with SvgWriter( io.BytesIO(), view_box = view_box ) as svg_writer:
+        svg_writer.write_svg_start()
+        SvgMapRenderer().write_base_map( composite_map = composite_map, view_box = view_box, out_fh = svg_writer )
+        svg_writer.write_circles( x_array, y_array, radius = 3 )
+        svg_writer.write_svg_end()
+    return
+
+
+# name -> { variant: function( context ) }
+BENCHMARK_DICT = {
+    'projection.x_y_from_deg': { SCALAR: _projection_x_y_from_deg_scalar,
+                                 BATCH: _projection_x_y_from_deg_batch },
+    'projection.deg_from_x_y': { SCALAR: _projection_deg_from_x_y_scalar,
+                                 BATCH: _projection_deg_from_x_y_batch },
+    'geo_map.long_lat_deg_to_coords': { SCALAR: _geo_map_long_lat_deg_to_coords_scalar,
+                                        BATCH: _geo_map_long_lat_deg_to_coords_batch,
+                                        TABLE: _geo_map_long_lat_deg_to_coords_table },
+    'composite_map.get_geo_map_for_point': { SCALAR: _composite_get_geo_map_for_point_scalar,
+                                             BATCH: _composite_get_geo_map_for_point_batch },
+    'composite_map.long_lat_deg_to_coords': { SCALAR: _composite_long_lat_deg_to_coords_scalar,
+                                              BATCH: _composite_long_lat_deg_to_coords_batch },
+    'composite_map.geo_bounds_to_display_bounds': { SCALAR: _geo_bounds_to_display_bounds_scalar,
+                                                    BATCH: _geo_bounds_to_display_bounds_batch },
+    'composite_map.view_box_to_geo_bounds_list': { SCALAR: _view_box_to_geo_bounds_list_scalar,
+                                                   BATCH: _view_box_to_geo_bounds_list_batch },
+    'utils.get_distance': { SCALAR: _utils_get_distance_scalar,
+                            BATCH: _utils_get_distance_batch },
+    'render.svg': { SCALAR: _render_svg_scalar,
+                    BATCH: _render_svg_batch,
+                    WRITER: _render_svg_writer },
+}
+
+# Benchmarks timed over (at most max_view_boxes) view boxes rather than the points
+VIEW_BOX_BENCHMARK_NAME_SET = { 'composite_map.view_box_to_geo_bounds_list' }
+
+
+def time_function( function : Callable, context : BenchmarkContext, repeat : int = DEFAULT_REPEAT ):
+    """ Best of repeat runs, in seconds. """
+    best_seconds = None
+    for _ in range( repeat ):
+        start_time = time.perf_counter()
+        function( context )
+        elapsed_seconds = time.perf_counter() - start_time
+        if ( best_seconds is None ) or ( elapsed_seconds < best_seconds ):
+            best_seconds = elapsed_seconds
+        continue
+    return best_seconds
+
+
+def run_benchmarks( composite_map : CompositeGeoMap = UsaContinentalCompositeGeoMap,
+                    max_points : int = DEFAULT_MAX_POINTS,
+                    max_scalar_points : int = DEFAULT_MAX_SCALAR_POINTS,
+                    repeat : int = DEFAULT_REPEAT,
+                    seed : int = DEFAULT_SEED,
+                    name_list : List[str] = None ):
+    """ List of result dicts, one per benchmark, variant and point count. """
+    if name_list is None:
+        name_list = list( BENCHMARK_DICT )
+    unknown_name_list = [ name for name in name_list if name not in BENCHMARK_DICT ]
+    if unknown_name_list:
+        raise ValueError( f'Unknown benchmarks: {unknown_name_list}' )
+
+    # Warm up the template store so the first render does not pay for reading the SVG.
+    _render_svg_batch( BenchmarkContext( composite_map, 1, seed = seed ))
+
+    result_list = list()
+    for point_count in get_point_count_list( max_points ):
+        context = BenchmarkContext( composite_map, point_count, seed = seed,
+                                    max_scalar_points = max_scalar_points )
+        for name in name_list:
+            for variant, function in BENCHMARK_DICT[name].items():
+                if ( variant == SCALAR ) and ( point_count > max_scalar_points ):
+                    continue
+                seconds = time_function( function, context, repeat = repeat )
+                item_count = context.get_item_count( name )
+                result_list.append({
+                    'name': name,
+                    'variant': variant,
+                    'point_count': point_count,
+                    'item_count': item_count,
+                    'seconds': seconds,
+                    # Per view box for the view box benchmarks
+                    'ns_per_point': 1e9 * seconds / item_count,
+                })
+                continue
+            continue
+        continue
+    return result_list
+
+
+def get_environment():
+    return {
+        'python_version': platform.python_version(),
+        'numpy_version': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+    }
+
+
+def _get_result_key( result : Dict ):
+    return ( result['name'], result['variant'], result['point_count'] )
+
+
+def compare_results( result_list : List[Dict],
+                     baseline_result_list : List[Dict],
+                     regression_threshold : float = DEFAULT_REGRESSION_THRESHOLD ):
+    """
+    Adds 'baseline_seconds', 'ratio' (time relative to baseline) and
+    'is_regression' to each result that has a match in the baseline.
+    Returns the list of regressed results.
+    """
+    baseline_dict = { _get_result_key( result ): result for result in baseline_result_list }
+    regression_list = list()
+    for result in result_list:
+        baseline_result = baseline_dict.get( _get_result_key( result ))
+        if not baseline_result:
+            continue
+        result['baseline_seconds'] = baseline_result['seconds']
+        result['ratio'] = result['seconds'] / max( baseline_result['seconds'], 1e-12 )
+        result['is_regression'] = result['ratio'] > ( 1.0 + regression_threshold )
+        if result['is_regression']:
+            regression_list.append( result )
+        continue
+    return regression_list
+
+
+def format_results( result_list : List[Dict] ):
+    """ Text table, with the batch (and table) speedup over scalar where both were run. """
+    scalar_seconds_dict = { ( result['name'], result['point_count'] ): result['seconds']
+                            for result in result_list if result['variant'] == SCALAR }
+    line_list = [ f'{"benchmark":<44} {"variant":<7} {"points":>9} {"seconds":>11} {"ns/point":>11}'
+                  f' {"speedup":>8} {"vs base":>8}' ]
+    for result in result_list:
+        speedup = ''
+        scalar_seconds = scalar_seconds_dict.get( ( result['name'], result['point_count'] ))
+        if ( result['variant'] != SCALAR ) and scalar_seconds:
+            speedup = f'{scalar_seconds / max( result["seconds"], 1e-12 ):.1f}x'
+        ratio = ''
+        if 'ratio' in result:
+            ratio = f'{result["ratio"]:.2f}' + ( ' !' if result['is_regression'] else '' )
+        line_list.append( f'{result["name"]:<44} {result["variant"]:<7} {result["point_count"]:>9}'
+                          f' {result["seconds"]:>11.6f} {result["ns_per_point"]:>11.1f}'
+                          f' {speedup:>8} {ratio:>8}' )
+        continue
+    return '\n'.join( line_list )
+
+
+def main( argv : List[str] = None ):
+    parser = argparse.ArgumentParser( description = 'Benchmarks for the geo_maps hot paths.' )
+    parser.add_argument( '--max-points', type = float, default = DEFAULT_MAX_POINTS,
+                         help = 'Largest point count (powers of ten up to this, e.g., 1e7).' )
+    parser.add_argument( '--max-scalar-points', type = float, default = DEFAULT_MAX_SCALAR_POINTS,
+                         help = 'Largest point count for the scalar variants.' )
+    parser.add_argument( '--repeat', type = int, default = DEFAULT_REPEAT )
+    parser.add_argument( '--seed', type = int, default = DEFAULT_SEED )
+    parser.add_argument( '--benchmark', action = 'append', dest = 'name_list',
+                         help = f'Benchmark to run (repeatable). One of: {", ".join( BENCHMARK_DICT )}' )
+    parser.add_argument( '--output', help = 'Write the results to this JSON file.' )
+    parser.add_argument( '--baseline', help = 'Compare against the results in this JSON file.' )
+    parser.add_argument( '--regression-threshold', type = float, default = DEFAULT_REGRESSION_THRESHOLD )
+    parser.add_argument( '--fail-on-regression', action = 'store_true',
+                         help = 'Exit with status 1 if any benchmark regressed.' )
+    args = parser.parse_args( argv )
+
+    result_list = run_benchmarks( max_points = int( args.max_points ),
+                                  max_scalar_points = int( args.max_scalar_points ),
+                                  repeat = args.repeat,
+                                  seed = args.seed,
+                                  name_list = args.name_list )
+    regression_list = list()
+    if args.baseline:
+        with open( args.baseline ) as in_fh:
+            baseline_result_list = json.load( in_fh )['results']
+        regression_list = compare_results( result_list, baseline_result_list,
+                                           regression_threshold = args.regression_threshold )
+
+    print( format_results( result_list ))
+    if args.output:
+        with open( args.output, 'w' ) as out_fh:
+            json.dump( { 'environment': get_environment(), 'results': result_list }, out_fh, indent = 2 )
+    if regression_list:
+        print( f'{len(regression_list)} regressions against {args.baseline}.' )
+        if args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit( main() )
@@ -0,0 +1,136 @@
+import dataclasses
+from dataclasses import dataclass
+import math
+from typing import List, Tuple
+
+import numpy as np
+
+from .geo_maps import AlbersMapProjection, GeoMap
+
+
+@dataclass
+class CalibrationResult:
+    """
+    The GeoMap display values that best line up the projection with a set
+    of known points on the SVG, and how well they line up.
+    """
+
+    display_x_scale     : float
+    display_y_scale     : float
+    display_x_offset    : float
+    display_y_offset    : float
+    rotation_angle_deg  : float
+
+    # Per calibration point ( x, y ) difference between the fitted and the
+    # known SVG coordinates (in SVG view box units).
+    residuals           : np.ndarray
+
+    @property
+    def rms_error(self):
+        return float( np.sqrt( np.mean( np.sum( self.residuals**2, axis = 1 ))))
+
+    @property
+    def max_error(self):
+        return float( np.max( np.hypot( self.residuals[:, 0], self.residuals[:, 1] )))
+
+    def to_geo_map_kwargs(self):
+        return {
+            'display_x_scale': self.display_x_scale,
+            'display_y_scale': self.display_y_scale,
+            'display_x_offset': self.display_x_offset,
+            'display_y_offset': self.display_y_offset,
+            'rotation_angle_deg': self.rotation_angle_deg,
+        }
+
+
+def calibrate( projection : AlbersMapProjection,
+               calibration_points : List[Tuple[float, float, float, float]],
+               max_iterations : int = 20,
+               tolerance : float = 1e-12 ):
+    """
+    Solve for the GeoMap display scale, offset and rotation given a list of
+    ( longitude_deg, latitude_deg, svg_x, svg_y ) for known points on the
+    SVG image. Needs at least 3 points, but more points (spread out over
+    the map) give a better fit.
+
+    A general affine least squares fit gives the starting values and
+    Gauss-Newton iterations then refine these for the GeoMap model of
+    a single rotation with separate x and y scales.
+    """
+    if len(calibration_points) < 3:
+        raise ValueError( f'Need at least 3 calibration points, got {len(calibration_points)}.' )
+
+    point_array = np.asarray( calibration_points, dtype = np.float64 )
+    projected_x, projected_y = projection.x_y_from_deg_array( longitude_deg = point_array[:, 0],
+                                                              latitude_deg = point_array[:, 1] )
+    svg_x = point_array[:, 2]
+    svg_y = point_array[:, 3]
+
+    # Initial estimate: svg_x = a*x + b*y + c, svg_y = d*x + e*y + f
+    design_matrix = np.column_stack([ projected_x, projected_y, np.ones_like( projected_x ) ])
+    ( a, b, c ), _, _, _ = np.linalg.lstsq( design_matrix, svg_x, rcond = None )
+    ( d, e, f ), _, _, _ = np.linalg.lstsq( design_matrix, svg_y, rcond = None )
+
+    params = np.array([ math.hypot( a, b ),        # x scale
+                        math.hypot( d, e ),        # y scale
+                        math.atan2( -1.0 * b, a ), # rotation (radians)
+                        c,                         # x offset
+                        f ])                       # y offset
+
+    ones = np.ones_like( projected_x )
+    zeros = np.zeros_like( projected_x )
+
+    for _ in range( max_iterations ):
+        residual_vector, u, v = _get_residuals( params, projected_x, projected_y, svg_x, svg_y )
+        x_scale, y_scale = params[0], params[1]
+        jacobian = np.vstack([
+            np.column_stack([ u, zeros, -1.0 * x_scale * v, ones, zeros ]),
+            np.column_stack([ zeros, -1.0 * v, -1.0 * y_scale * u, zeros, ones ]),
+        ])
+        step, _, _, _ = np.linalg.lstsq( jacobian, -1.0 * residual_vector, rcond = None )
+        params += step
+        if np.max( np.abs( step )) < tolerance:
+            break
+        continue
+
+    residual_vector, _, _ = _get_residuals( params, projected_x, projected_y, svg_x, svg_y )
+
+    return CalibrationResult(
+        display_x_scale = float( params[0] ),
+        display_y_scale = float( params[1] ),
+        display_x_offset = float( params[3] ),
+        display_y_offset = float( params[4] ),
+        rotation_angle_deg = math.degrees( params[2] ),
+        residuals = residual_vector.reshape( 2, -1 ).T,
+    )
+
+
+def calibrate_geo_map( geo_map : GeoMap ):
+    """
+    Returns a tuple ( new GeoMap, CalibrationResult ) where the new GeoMap
+    has display values fitted to the given GeoMap's calibration_points.
+    """
+    if not geo_map.calibration_points:
+        raise ValueError( 'GeoMap has no calibration points.' )
+    calibration_result = calibrate( projection = geo_map.projection,
+                                    calibration_points = geo_map.calibration_points )
+    calibrated_geo_map = dataclasses.replace( geo_map, **calibration_result.to_geo_map_kwargs() )
+    return ( calibrated_geo_map, calibration_result )
+
+
+def _get_residuals( params : np.ndarray,
+                    projected_x : np.ndarray,
+                    projected_y : np.ndarray,
+                    svg_x : np.ndarray,
+                    svg_y : np.ndarray ):
+    """ Same mapping as GeoMap.long_lat_deg_to_coords(), as residuals. """
+    x_scale, y_scale, angle_radians, x_offset, y_offset = params
+    sine_angle = math.sin( angle_radians )
+    cosine_angle = math.cos( angle_radians )
+
+    u = ( projected_x * cosine_angle ) - ( projected_y * sine_angle )
+    v = ( projected_x * sine_angle ) + ( projected_y * cosine_angle )
+
+    residual_vector = np.concatenate([ ( x_offset + ( x_scale * u )) - svg_x,
+                                       ( y_offset - ( y_scale * v )) - svg_y ])
+    return ( residual_vector, u, v )
@@ -0,0 +1,165 @@
+from dataclasses import dataclass
+import math
+
+import numpy as np
+
+from .view_box import ViewBox
+
+
+SQUARE_GRID = 'square'
+HEX_GRID = 'hex'
+
+# Offset to make (signed) grid cell coordinates non-negative when packed
+# into a single integer key.
+_CELL_KEY_OFFSET = 1 << 30
+
+
+@dataclass
+class PointClusters:
+    """ One cluster per occupied grid cell: the centroid of its points in SVG coordinates and the point count. """
+
+    x_array      : np.ndarray
+    y_array      : np.ndarray
+    count_array  : np.ndarray
+
+    def __len__(self):
+        return len(self.count_array)
+
+    def in_view_box( self, view_box : ViewBox ):
+        is_inside = ( ( self.x_array >= view_box.min_x ) & ( self.x_array <= view_box.max_x )
+                      & ( self.y_array >= view_box.min_y ) & ( self.y_array <= view_box.max_y ))
+        return PointClusters( x_array = self.x_array[is_inside],
+                              y_array = self.y_array[is_inside],
+                              count_array = self.count_array[is_inside] )
+
+    def to_svg( self, view_box : ViewBox, display_width_pixels : float ):
+        """
+        SVG markup with a circle and count label for each cluster. Marker
+        sizes are in screen pixels (for the given display width), so they
+        look the same at all zoom levels.
+        """
+        svg_units_per_pixel = get_svg_units_per_pixel( view_box = view_box,
+                                                       display_width_pixels = display_width_pixels )
+        radius_array = svg_units_per_pixel * ( 4.0 + ( 3.0 * np.log10( self.count_array )))
+        font_size = 10.0 * svg_units_per_pixel
+        marker_format = ( '<g class="cluster"><circle cx="%.2f" cy="%.2f" r="%.2f"></circle>'
+                          '<text x="%.2f" y="%.2f" text-anchor="middle" dominant-baseline="central"'
+                          f' style="font-size: {font_size:.2f};">%d</text></g>\n' )
+        values = np.column_stack([ self.x_array, self.y_array, radius_array,
+                                   self.x_array, self.y_array, self.count_array ]).ravel().tolist()
+        return ( marker_format * len(self) ) % tuple( values )
+
+
+def get_svg_units_per_pixel( view_box : ViewBox, display_width_pixels : float ):
+    """ Size of a screen pixel in SVG units when the view box is displayed at the given width. """
+    return view_box.width / display_width_pixels
+
+
+def get_cell_key_array( x : np.ndarray, y : np.ndarray, cell_size : float, grid_type : str = SQUARE_GRID ):
+    """
+    Integer key of the grid cell containing each point. The grid is
+    anchored at the SVG origin, so cells do not shift when the view box
+    pans. For hex grids, the cell size is the distance between the centers
+    of horizontally adjacent (pointy-top) hexagons.
+    """
+    if grid_type == SQUARE_GRID:
+        column_array = np.floor( x / cell_size ).astype( np.int64 )
+        row_array = np.floor( y / cell_size ).astype( np.int64 )
+    elif grid_type == HEX_GRID:
+        hex_radius = cell_size / math.sqrt( 3.0 )
+        # Fractional axial coordinates, then cube coordinate rounding
+        q = ( ( ( math.sqrt( 3.0 ) / 3.0 ) * x ) - ( y / 3.0 )) / hex_radius
+        r = ( ( 2.0 / 3.0 ) * y ) / hex_radius
+        s = -1.0 * q - r
+        rounded_q, rounded_r, rounded_s = np.round( q ), np.round( r ), np.round( s )
+        q_diff = np.abs( rounded_q - q )
+        r_diff = np.abs( rounded_r - r )
+        s_diff = np.abs( rounded_s - s )
+        fix_q = ( q_diff > r_diff ) & ( q_diff > s_diff )
+        fix_r = ~fix_q & ( r_diff > s_diff )
+        rounded_q = np.where( fix_q, -1.0 * rounded_r - rounded_s, rounded_q )
+        rounded_r = np.where( fix_r, -1.0 * rounded_q - rounded_s, rounded_r )
+        column_array = rounded_q.astype( np.int64 )
+        row_array = rounded_r.astype( np.int64 )
+    else:
+        raise ValueError( f'Unknown grid type "{grid_type}".' )
+
+    return ( ( row_array + _CELL_KEY_OFFSET ) << 31 ) | ( column_array + _CELL_KEY_OFFSET )
+
+
+def cluster_points( x : np.ndarray,
+                    y : np.ndarray,
+                    cell_size : float,
+                    grid_type : str = SQUARE_GRID ):
+    """ Bins the SVG points into grid cells of the given size (SVG units). """
+    x = np.asarray( x, dtype = np.float64 )
+    y = np.asarray( y, dtype = np.float64 )
+    if x.size == 0:
+        return PointClusters( x_array = np.empty( 0 ), y_array = np.empty( 0 ),
+                              count_array = np.empty( 0, dtype = np.int64 ))
+
+    cell_key_array = get_cell_key_array( x, y, cell_size = cell_size, grid_type = grid_type )
+    _, cluster_index_array, count_array = np.unique( cell_key_array,
+                                                     return_inverse = True,
+                                                     return_counts = True )
+    return PointClusters( x_array = np.bincount( cluster_index_array, weights = x ) / count_array,
+                          y_array = np.bincount( cluster_index_array, weights = y ) / count_array,
+                          count_array = count_array )
+
+
+def cluster_points_in_view_box( x : np.ndarray,
+                                y : np.ndarray,
+                                view_box : ViewBox,
+                                display_width_pixels : float,
+                                cell_size_pixels : float = 40.0,
+                                grid_type : str = SQUARE_GRID ):
+    """ Clusters the points inside the view box with cells sized in screen pixels. """
+    x = np.asarray( x, dtype = np.float64 )
+    y = np.asarray( y, dtype = np.float64 )
+    is_inside = ( ( x >= view_box.min_x ) & ( x <= view_box.max_x )
+                  & ( y >= view_box.min_y ) & ( y <= view_box.max_y ))
+    cell_size = cell_size_pixels * get_svg_units_per_pixel( view_box = view_box,
+                                                            display_width_pixels = display_width_pixels )
+    return cluster_points( x[is_inside], y[is_inside], cell_size = cell_size, grid_type = grid_type )
+
+
+class ClusterPyramid:
+    """
+    Clusters of the points precomputed at several cell sizes (each level
+    doubling the previous), so that a view box request only picks a level
+    and filters its clusters.
+    """
+
+    def __init__( self,
+                  x : np.ndarray,
+                  y : np.ndarray,
+                  base_cell_size : float = 2.0,
+                  level_count : int = 6,
+                  grid_type : str = SQUARE_GRID ):
+        """ The base cell size is in SVG units and should suit the most zoomed in view. """
+
+        self._cell_size_list = [ base_cell_size * ( 2 ** level ) for level in range( level_count ) ]
+        self._clusters_list = [
+            cluster_points( x, y, cell_size = cell_size, grid_type = grid_type )
+            for cell_size in self._cell_size_list
+        ]
+        return
+
+    @property
+    def cell_size_list(self):
+        return self._cell_size_list
+
+    def get_level( self, cell_size : float ):
+        """ The level with the cell size closest (in log scale) to the desired SVG cell size. """
+        log_distance_list = [ abs( math.log( level_cell_size / cell_size ))
+                              for level_cell_size in self._cell_size_list ]
+        return log_distance_list.index( min( log_distance_list ))
+
+    def get_clusters( self,
+                      view_box : ViewBox,
+                      display_width_pixels : float,
+                      cell_size_pixels : float = 40.0 ):
+        cell_size = cell_size_pixels * get_svg_units_per_pixel( view_box = view_box,
+                                                                display_width_pixels = display_width_pixels )
+        level = self.get_level( cell_size = cell_size )
+        return self._clusters_list[level].in_view_box( view_box = view_box )
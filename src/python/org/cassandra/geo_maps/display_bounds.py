@@ -1,7 +1,9 @@
 from dataclasses import dataclass
 
+import numpy as np
 
-@dataclass
+
+@dataclass( slots = True )
 class DisplayBounds:
     """ Holds the 4 corner points of a 2D bounding box """
     
@@ -30,8 +32,27 @@ class DisplayBounds:
         return abs(self.y_max - self.y_min)
     
     def add_point( self, x : float, y : float ):
-        self.add_x( x )
-        self.add_y( y )
+        # As min() and max(), so a NaN coordinate makes the bounds NaN, as it does for add_points()
+        if not ( self.x_min < x ):
+            self.x_min = x
+        if not ( self.x_max > x ):
+            self.x_max = x
+        if not ( self.y_min < y ):
+            self.y_min = y
+        if not ( self.y_max > y ):
+            self.y_max = y
+        return
+
+    def add_points( self, x_array : np.ndarray, y_array : np.ndarray ):
+        """ Batch version of add_point(). """
+        x_array = np.asarray( x_array, dtype = np.float64 )
+        y_array = np.asarray( y_array, dtype = np.float64 )
+        if x_array.size:
+            self.x_min = min( float( x_array.min() ), self.x_min )
+            self.x_max = max( float( x_array.max() ), self.x_max )
+        if y_array.size:
+            self.y_min = min( float( y_array.min() ), self.y_min )
+            self.y_max = max( float( y_array.max() ), self.y_max )
         return
 
     @property
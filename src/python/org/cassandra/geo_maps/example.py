@@ -2,6 +2,9 @@ import os
 
 from org.cassandra.geo_maps.geo_bounds import GeoBounds
 from org.cassandra.geo_maps.geo_maps import UsaContinentalCompositeGeoMap
+from org.cassandra.geo_maps.render_cache import RenderCache, get_points_digest
+from org.cassandra.geo_maps.svg_renderer import SvgMapRenderer
+from org.cassandra.geo_maps.svg_writer import SvgWriter
 from org.cassandra.geo_maps.view_box import ViewBox
 
 
@@ -51,46 +54,61 @@ view_box = ViewBox.from_display_bounds( display_bounds = display_bounds,
                                         aspect_ratio = aspect_ratio,
                                         padding_ratio = padding_ratio )
 
-# Now we can generate the SVG plotting those point on the map.
+# Map all the points into the SVG display space. This finds the
+# appropriate GeoMap instance for each point (which depends on whether
+# the point is in the lower 48, Alaska or Hawaii) and projects each
+# group of points in one batch. For a single point, you can also use
+# get_geo_map_for_point() and long_lat_deg_to_coords() on the GeoMap.
 #
-outfile = 'example.svg'
-with open( outfile, 'w' ) as out_fh:
-    out_fh.write( '<svg id="usa-continental-map" class="geo-map"\n'
-                  f'     xmlns="http://www.w3.org/2000/svg" viewBox="{view_box}">' )
-
-    # Render the base map. The code supports the possibility of it having
-    # multiple SVGs, but in this case there is only one.
-    #
-    for svg_template_name in usa_composite_map.svg_template_name_list:
-        cur_dirname = os.path.dirname( __file__ )
-        svg_filename = os.path.join( cur_dirname, svg_template_name )
-        with open( svg_filename, 'r' ) as in_fh:
-            out_fh.write( in_fh.read() )
-        continue
-
-    # Now we render each point as a circle with a text label.
-    #
-    for geo_point in GEO_POINTS:
-
-        # First, get the appropriate GeoMap instance (which depends on whether
-        # this point is in the lower 48, Alaska or Hawaii.
+longitude_list = [ geo_point['longitude'] for geo_point in GEO_POINTS ]
+latitude_list = [ geo_point['latitude'] for geo_point in GEO_POINTS ]
+x_array, y_array = usa_composite_map.long_lat_deg_to_coords_array( longitude_deg = longitude_list,
+                                                                   latitude_deg = latitude_list )
+
+# Now we can generate the SVG plotting those point on the map. This
+# writes bytes, since that is what the base map renderer writes. The
+# SvgWriter buffers the output and writes the coordinates with only the
+# decimals the view box scale needs. (A server can also have it gzip the
+# output and send it with chunked encoding as it is rendered.)
+#
+def render_svg( out_fh ):
+    with SvgWriter( out_fh,
+                    view_box = view_box,
+                    display_width = usa_composite_map.default_view_box.width ) as svg_writer:
+        svg_writer.write_svg_start( { 'id': 'usa-continental-map', 'class': 'geo-map' } )
+
+        # Render the base map. The code supports the possibility of it having
+        # multiple SVGs, but in this case there is only one. The SVG file is
+        # only read and parsed the first time it is needed and only the states
+        # that are visible in the view box are written.
         #
-        composite_map = usa_composite_map.get_geo_map_for_point(
-            longitude_deg = geo_point['longitude'],
-            latitude_deg = geo_point['latitude'],
-        )
+        SvgMapRenderer().write_base_map( composite_map = usa_composite_map,
+                                         view_box = view_box,
+                                         out_fh = svg_writer )
 
-        # Then we can map the point into the SVG display space.
+        # Now we render each point as a circle with a text label.
         #
-        x, y = composite_map.long_lat_deg_to_coords(
-            longitude_deg = geo_point['longitude'],
-            latitude_deg = geo_point['latitude'],
-        )
-        out_fh.write( f'<circle cx="{x}" cy="{y}" r="3"></circle>\n' )
-        out_fh.write( f'<text x="{x+5}" y="{y+5}" style="font-size: 12;">{geo_point["label"]}</text>\n' )
-        continue
-    
-    out_fh.write( '</svg>' )
+        svg_writer.write_circles( x_array, y_array, radius = 3 )
+        svg_writer.write_texts( x_array + 5, y_array + 5,
+                                text_list = [ geo_point['label'] for geo_point in GEO_POINTS ],
+                                attribute_dict = { 'style': 'font-size: 12;' } )
+        svg_writer.write_svg_end()
+    return
+
+
+# A server drawing the same maps repeatedly can keep the rendered content
+# in a RenderCache, keyed by the map, view box and points drawn. (Here it
+# is only used once.)
+#
+render_cache = RenderCache()
+cache_key = render_cache.get_key( map_id = usa_composite_map.map_id,
+                                  view_box = view_box,
+                                  points_digest = get_points_digest( longitude_list, latitude_list ) )
+svg_bytes = render_cache.get_or_render( cache_key, render_svg )
+
+outfile = 'example.svg'
+with open( outfile, 'wb' ) as out_fh:
+    out_fh.write( svg_bytes )
 
 
 print( f'The example SVG file was written to: {outfile}.' )
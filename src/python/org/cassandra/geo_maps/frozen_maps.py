@@ -0,0 +1,325 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+import math
+import threading
+from typing import List, Tuple
+
+import numpy as np
+
+from .geo_bounds import GeoBounds, GeoBoundsArray
+from .geo_maps import AlbersMapProjection, CompositeGeoMap, GeoMap, UsaContinentalCompositeGeoMap
+from .view_box import ViewBox
+from . import utils
+
+
+# Immutable counterparts of ViewBox, GeoBounds, AlbersMapProjection, GeoMap
+# and CompositeGeoMap for sharing
+# between threads. Everything derived is computed at construction, nothing
+# is modified afterwards, and building them from the mutable versions
+# copies what they need, so the module level GeoMap instances are never
+# touched. The methods are the same as (mostly reused from) the mutable
+# classes.
+
+
+@dataclass( frozen = True, slots = True )
+class FrozenViewBox:
+    """ Immutable ViewBox. Equal view boxes hash the same, so they can be used as keys. """
+
+    x       : float
+    y       : float
+    width   : float
+    height  : float
+    map_id  : int    = None
+
+    _max_x  : float  = field( init = False, repr = False, compare = False )
+    _max_y  : float  = field( init = False, repr = False, compare = False )
+
+    def __post_init__(self):
+        object.__setattr__( self, '_max_x', self.x + self.width )
+        object.__setattr__( self, '_max_y', self.y + self.height )
+        return
+
+    __str__ = ViewBox.__str__
+    min_x = ViewBox.min_x
+    min_y = ViewBox.min_y
+    max_x = ViewBox.max_x
+    max_y = ViewBox.max_y
+    contains_point = ViewBox.contains_point
+    corner_points = ViewBox.corner_points
+    get_edge_points_array = ViewBox.get_edge_points_array
+
+    @staticmethod
+    def from_view_box( view_box, map_id : int = None ):
+        """ Frozen copy of a ViewBox, optionally with a different map id. """
+        return FrozenViewBox( x = view_box.x,
+                              y = view_box.y,
+                              width = view_box.width,
+                              height = view_box.height,
+                              map_id = view_box.map_id if map_id is None else map_id )
+
+    def to_view_box(self):
+        """ A mutable ViewBox copy. """
+        return ViewBox( x = self.x, y = self.y, width = self.width, height = self.height, map_id = self.map_id )
+
+    def intersect( self, other_view_box ):
+        view_box = ViewBox.intersect( self, other_view_box )
+        if view_box is None:
+            return None
+        return FrozenViewBox.from_view_box( view_box )
+
+    def union( self, other_view_box ):
+        return FrozenViewBox.from_view_box( ViewBox.union( self, other_view_box ))
+
+
+@dataclass( frozen = True, slots = True, repr = False )
+class FrozenGeoBounds:
+    """ Immutable GeoBounds. Those that modify the bounds are the only methods missing. """
+
+    longitude_min  : float  = GeoBounds.longitude_min
+    longitude_max  : float  = GeoBounds.longitude_max
+    latitude_min   : float  = GeoBounds.latitude_min
+    latitude_max   : float  = GeoBounds.latitude_max
+
+    __repr__ = GeoBounds.__repr__
+    __str__ = GeoBounds.__str__
+    __bool__ = GeoBounds.__bool__
+    corner_points = GeoBounds.corner_points
+    longitude_span = GeoBounds.longitude_span
+    latitude_span = GeoBounds.latitude_span
+    longitude_span_miles = GeoBounds.longitude_span_miles
+    latitude_span_miles = GeoBounds.latitude_span_miles
+    contains_point = GeoBounds.contains_point
+    contains_bounds = GeoBounds.contains_bounds
+    intersect = GeoBounds.intersect
+    intersects = GeoBounds.intersects
+
+    @staticmethod
+    def from_geo_bounds( geo_bounds ):
+        if isinstance( geo_bounds, FrozenGeoBounds ):
+            return geo_bounds
+        return FrozenGeoBounds( longitude_min = geo_bounds.longitude_min,
+                                longitude_max = geo_bounds.longitude_max,
+                                latitude_min = geo_bounds.latitude_min,
+                                latitude_max = geo_bounds.latitude_max )
+
+    def to_geo_bounds(self):
+        """ A mutable GeoBounds copy. """
+        return GeoBounds( longitude_min = self.longitude_min,
+                          longitude_max = self.longitude_max,
+                          latitude_min = self.latitude_min,
+                          latitude_max = self.latitude_max )
+
+
+@dataclass( frozen = True, slots = True, eq = False )
+class FrozenAlbersMapProjection:
+    """ Immutable AlbersMapProjection. """
+
+    reference_longitude_deg  : float
+    reference_latitude_deg   : float
+
+    standard_parallel_1_deg  : float
+    standard_parallel_2_deg  : float
+
+    radius_miles             : float  = utils.EARTH_RADIUS_AT_EQUATOR_MILES
+
+    n                             : float  = field( init = False, repr = False )
+    C                             : float  = field( init = False, repr = False )
+    rho_0                         : float  = field( init = False, repr = False )
+    _reference_longitude_radians  : float  = field( init = False, repr = False )
+    _radius_over_n                : float  = field( init = False, repr = False )
+
+    EPSILON = AlbersMapProjection.EPSILON
+
+    def __post_init__(self):
+        # Derived by the mutable class, for this radius
+        projection = AlbersMapProjection( reference_longitude_deg = self.reference_longitude_deg,
+                                          reference_latitude_deg = self.reference_latitude_deg,
+                                          standard_parallel_1_deg = self.standard_parallel_1_deg,
+                                          standard_parallel_2_deg = self.standard_parallel_2_deg )
+        if projection.radius_miles != self.radius_miles:
+            projection.radius_miles = self.radius_miles
+            projection.__post_init__()
+        for name in ( 'n', 'C', 'rho_0', '_reference_longitude_radians', '_radius_over_n' ):
+            object.__setattr__( self, name, getattr( projection, name ))
+            continue
+        return
+
+    @staticmethod
+    def from_projection( projection ):
+        if isinstance( projection, FrozenAlbersMapProjection ):
+            return projection
+        return FrozenAlbersMapProjection( reference_longitude_deg = projection.reference_longitude_deg,
+                                          reference_latitude_deg = projection.reference_latitude_deg,
+                                          standard_parallel_1_deg = projection.standard_parallel_1_deg,
+                                          standard_parallel_2_deg = projection.standard_parallel_2_deg,
+                                          radius_miles = projection.radius_miles )
+
+    reference_longitude_radians = AlbersMapProjection.reference_longitude_radians
+    reference_latitude_radians = AlbersMapProjection.reference_latitude_radians
+    standard_parallel_1_radians = AlbersMapProjection.standard_parallel_1_radians
+    standard_parallel_2_radians = AlbersMapProjection.standard_parallel_2_radians
+    x_y_from_deg = AlbersMapProjection.x_y_from_deg
+    deg_from_x_y = AlbersMapProjection.deg_from_x_y
+    x_y_from_deg_array = AlbersMapProjection.x_y_from_deg_array
+    deg_from_x_y_array = AlbersMapProjection.deg_from_x_y_array
+
+
+@dataclass( frozen = True, slots = True, eq = False )
+class FrozenGeoMap:
+    """
+    Immutable GeoMap. The projection and geo bounds are frozen copies and
+    the affine matrices are read-only arrays.
+    """
+
+    projection         : FrozenAlbersMapProjection
+    geo_bounds         : FrozenGeoBounds
+    svg_template_name  : str
+    view_box           : FrozenViewBox
+
+    display_x_offset   : float  = None
+    display_y_offset   : float  = None
+
+    display_x_scale    : float  = None
+    display_y_scale    : float  = None
+
+    rotation_angle_deg : float  = None
+
+    calibration_points : Tuple  = None
+
+    _rotation_angle_radians  : float       = field( init = False, repr = False )
+    _sine_angle              : float       = field( init = False, repr = False )
+    _cosine_angle            : float       = field( init = False, repr = False )
+    _affine_matrix           : np.ndarray  = field( init = False, repr = False )
+    _inverse_affine_matrix   : np.ndarray  = field( init = False, repr = False )
+
+    def __post_init__(self):
+        # Frozen copies, in case mutable ones were given
+        object.__setattr__( self, 'projection', FrozenAlbersMapProjection.from_projection( self.projection ))
+        object.__setattr__( self, 'geo_bounds', FrozenGeoBounds.from_geo_bounds( self.geo_bounds ))
+
+        rotation_angle_radians, sine_angle, cosine_angle = None, None, None
+        if self.rotation_angle_deg:
+            rotation_angle_radians = math.radians( self.rotation_angle_deg )
+            sine_angle = math.sin( rotation_angle_radians )
+            cosine_angle = math.cos( rotation_angle_radians )
+        object.__setattr__( self, '_rotation_angle_radians', rotation_angle_radians )
+        object.__setattr__( self, '_sine_angle', sine_angle )
+        object.__setattr__( self, '_cosine_angle', cosine_angle )
+
+        affine_matrix, inverse_affine_matrix = None, None
+        if None not in ( self.display_x_scale, self.display_y_scale,
+                         self.display_x_offset, self.display_y_offset ):
+            affine_matrix = GeoMap._get_affine_matrix( self )
+            inverse_affine_matrix = GeoMap._get_inverse_affine_matrix( affine_matrix )
+            affine_matrix.setflags( write = False )
+            inverse_affine_matrix.setflags( write = False )
+        object.__setattr__( self, '_affine_matrix', affine_matrix )
+        object.__setattr__( self, '_inverse_affine_matrix', inverse_affine_matrix )
+        return
+
+    @staticmethod
+    def from_geo_map( geo_map : GeoMap, map_id : int = None ):
+        if isinstance( geo_map, FrozenGeoMap ):
+            if ( map_id is None ) or ( map_id == geo_map.view_box.map_id ):
+                return geo_map
+            return replace( geo_map, view_box = FrozenViewBox.from_view_box( geo_map.view_box, map_id = map_id ))
+
+        calibration_points = None
+        if geo_map.calibration_points is not None:
+            calibration_points = tuple( tuple( point ) for point in geo_map.calibration_points )
+        return FrozenGeoMap( projection = FrozenAlbersMapProjection.from_projection( geo_map.projection ),
+                             geo_bounds = FrozenGeoBounds.from_geo_bounds( geo_map.geo_bounds ),
+                             svg_template_name = geo_map.svg_template_name,
+                             view_box = FrozenViewBox.from_view_box( geo_map.view_box, map_id = map_id ),
+                             display_x_offset = geo_map.display_x_offset,
+                             display_y_offset = geo_map.display_y_offset,
+                             display_x_scale = geo_map.display_x_scale,
+                             display_y_scale = geo_map.display_y_scale,
+                             rotation_angle_deg = geo_map.rotation_angle_deg,
+                             calibration_points = calibration_points )
+
+    aspect_ratio = GeoMap.aspect_ratio
+    long_lat_deg_to_coords = GeoMap.long_lat_deg_to_coords
+    coords_to_long_lat_deg = GeoMap.coords_to_long_lat_deg
+    long_lat_deg_to_coords_array = GeoMap.long_lat_deg_to_coords_array
+    coords_to_long_lat_deg_array = GeoMap.coords_to_long_lat_deg_array
+    _apply_affine = staticmethod( GeoMap._apply_affine )
+
+
+class FrozenCompositeGeoMap:
+    """
+    Immutable CompositeGeoMap. Unlike CompositeGeoMap, the view boxes of
+    the given GeoMap are not changed: each is frozen into a copy carrying
+    this map's id, so composite maps sharing a GeoMap do not interfere.
+    """
+
+    __slots__ = ( '_map_id', '_geo_map_list', '_default_geo_map', '_geo_bounds',
+                  '_geo_bounds_list', '_svg_template_name_list', '_geo_bounds_array',
+                  '_edge_sample_cache', '_edge_sample_lock' )
+
+    EDGE_SAMPLE_CACHE_SIZE = CompositeGeoMap.EDGE_SAMPLE_CACHE_SIZE
+
+    def __init__( self, map_id : int, geo_map_list : List[GeoMap] ):
+        """ First one in list is considered default. List cannot be empty. """
+        if not geo_map_list:
+            raise ValueError( 'A composite map needs at least one GeoMap.' )
+
+        geo_map_list = tuple( FrozenGeoMap.from_geo_map( geo_map, map_id = map_id ) for geo_map in geo_map_list )
+        geo_bounds = GeoBounds()
+        for geo_map in geo_map_list:
+            geo_bounds.add_bounds( geo_map.geo_bounds )
+            continue
+        geo_bounds_array = GeoBoundsArray.from_geo_bounds_list( geo_map.geo_bounds for geo_map in geo_map_list )
+        for edge_array in ( geo_bounds_array.longitude_min, geo_bounds_array.longitude_max,
+                            geo_bounds_array.latitude_min, geo_bounds_array.latitude_max ):
+            edge_array.setflags( write = False )
+            continue
+
+        set_attribute = super().__setattr__
+        set_attribute( '_map_id', map_id )
+        set_attribute( '_geo_map_list', geo_map_list )
+        set_attribute( '_default_geo_map', geo_map_list[0] )
+        set_attribute( '_geo_bounds', FrozenGeoBounds.from_geo_bounds( geo_bounds ))
+        set_attribute( '_geo_bounds_list', tuple( geo_map.geo_bounds for geo_map in geo_map_list ))
+        set_attribute( '_svg_template_name_list',
+                       tuple( dict.fromkeys( geo_map.svg_template_name for geo_map in geo_map_list )))
+        set_attribute( '_geo_bounds_array', geo_bounds_array )
+        # An internal cache, the only state that changes after construction
+        set_attribute( '_edge_sample_cache', OrderedDict() )
+        set_attribute( '_edge_sample_lock', threading.Lock() )
+        return
+
+    def __setattr__( self, name, value ):
+        raise AttributeError( f'Cannot set "{name}": {self.__class__.__name__} is immutable.' )
+
+    def __delattr__( self, name ):
+        raise AttributeError( f'Cannot delete "{name}": {self.__class__.__name__} is immutable.' )
+
+    def __reduce__(self):
+        return ( FrozenCompositeGeoMap, ( self._map_id, list( self._geo_map_list )) )
+
+    @staticmethod
+    def from_composite_map( composite_map : CompositeGeoMap ):
+        return FrozenCompositeGeoMap( map_id = composite_map.map_id,
+                                      geo_map_list = composite_map.geo_map_list )
+
+    map_id = CompositeGeoMap.map_id
+    geo_bounds = CompositeGeoMap.geo_bounds
+    geo_bounds_list = CompositeGeoMap.geo_bounds_list
+    default_view_box = CompositeGeoMap.default_view_box
+    default_reference_longitude_deg = CompositeGeoMap.default_reference_longitude_deg
+    default_reference_latitude_deg = CompositeGeoMap.default_reference_latitude_deg
+    default_aspect_ratio = CompositeGeoMap.default_aspect_ratio
+    svg_template_name_list = CompositeGeoMap.svg_template_name_list
+    geo_map_list = CompositeGeoMap.geo_map_list
+    contains_bounds = CompositeGeoMap.contains_bounds
+    get_geo_map_for_point = CompositeGeoMap.get_geo_map_for_point
+    get_geo_map_index_array = CompositeGeoMap.get_geo_map_index_array
+    long_lat_deg_to_coords_array = CompositeGeoMap.long_lat_deg_to_coords_array
+    geo_bounds_to_display_bounds = CompositeGeoMap.geo_bounds_to_display_bounds
+    view_box_to_geo_bounds_list = CompositeGeoMap.view_box_to_geo_bounds_list
+    clear_edge_sample_cache = CompositeGeoMap.clear_edge_sample_cache
+    _get_edge_sample_long_lat = CompositeGeoMap._get_edge_sample_long_lat
+
+
+FrozenUsaContinentalCompositeGeoMap = FrozenCompositeGeoMap.from_composite_map( UsaContinentalCompositeGeoMap )
@@ -1,9 +1,11 @@
 from dataclasses import dataclass
 
+import numpy as np
+
 from . import utils
 
 
-@dataclass
+@dataclass( slots = True )
 class GeoBounds:
     """
     Holds the 4 corner points of a geographic bounding "box" (its really a spherical cap).
@@ -49,8 +51,27 @@ class GeoBounds:
         return self.latitude_span * utils.get_miles_per_latitude()
     
     def add_point( self, longitude : float, latitude : float ):
-        self.add_longitude( longitude )
-        self.add_latitude( latitude )
+        # As min() and max(), so a NaN coordinate makes the bounds NaN, as it does for add_points()
+        if not ( self.longitude_min < longitude ):
+            self.longitude_min = longitude
+        if not ( self.longitude_max > longitude ):
+            self.longitude_max = longitude
+        if not ( self.latitude_min < latitude ):
+            self.latitude_min = latitude
+        if not ( self.latitude_max > latitude ):
+            self.latitude_max = latitude
+        return
+
+    def add_points( self, longitude_array : np.ndarray, latitude_array : np.ndarray ):
+        """ Batch version of add_point(). """
+        longitude_array = np.asarray( longitude_array, dtype = np.float64 )
+        latitude_array = np.asarray( latitude_array, dtype = np.float64 )
+        if longitude_array.size:
+            self.longitude_min = min( float( longitude_array.min() ), self.longitude_min )
+            self.longitude_max = max( float( longitude_array.max() ), self.longitude_max )
+        if latitude_array.size:
+            self.latitude_min = min( float( latitude_array.min() ), self.latitude_min )
+            self.latitude_max = max( float( latitude_array.max() ), self.latitude_max )
         return
     
     def add_bounds( self, other_geo_bounds : 'GeoBounds' ):
@@ -112,3 +133,76 @@ class GeoBounds:
         self.latitude_min -= expand_latitude_deg
         self.latitude_max += expand_latitude_deg
         return
+
+
+class GeoBoundsArray:
+    """
+    A collection of GeoBounds stored as one array per edge, for testing
+    many bounds at once.
+    """
+
+    __slots__ = ( 'longitude_min', 'longitude_max', 'latitude_min', 'latitude_max' )
+
+    def __init__( self,
+                  longitude_min : np.ndarray,
+                  longitude_max : np.ndarray,
+                  latitude_min : np.ndarray,
+                  latitude_max : np.ndarray ):
+        self.longitude_min = np.asarray( longitude_min, dtype = np.float64 )
+        self.longitude_max = np.asarray( longitude_max, dtype = np.float64 )
+        self.latitude_min = np.asarray( latitude_min, dtype = np.float64 )
+        self.latitude_max = np.asarray( latitude_max, dtype = np.float64 )
+        return
+
+    @staticmethod
+    def from_geo_bounds_list( geo_bounds_list ):
+        bounds_array = np.array( [ ( geo_bounds.longitude_min, geo_bounds.longitude_max,
+                                     geo_bounds.latitude_min, geo_bounds.latitude_max )
+                                   for geo_bounds in geo_bounds_list ],
+                                 dtype = np.float64 ).reshape( -1, 4 )
+        return GeoBoundsArray( *bounds_array.T )
+
+    def __len__(self):
+        return len(self.longitude_min)
+
+    def __getitem__( self, idx : int ):
+        return GeoBounds( longitude_min = float( self.longitude_min[idx] ),
+                          longitude_max = float( self.longitude_max[idx] ),
+                          latitude_min = float( self.latitude_min[idx] ),
+                          latitude_max = float( self.latitude_max[idx] ) )
+
+    def contains_point( self, longitude_deg, latitude_deg ):
+        """
+        Whether each bounds contains the point. For arrays of N points the
+        result has shape ( N, len(self) ).
+        """
+        longitude_deg = np.asarray( longitude_deg, dtype = np.float64 )[..., np.newaxis]
+        latitude_deg = np.asarray( latitude_deg, dtype = np.float64 )[..., np.newaxis]
+        return ( ( longitude_deg >= self.longitude_min )
+                 & ( longitude_deg <= self.longitude_max )
+                 & ( latitude_deg >= self.latitude_min )
+                 & ( latitude_deg <= self.latitude_max ) )
+
+    def contains_bounds( self, other_geo_bounds : GeoBounds ):
+        """ Whether each bounds contains all of the other bounds. """
+        return ( ( other_geo_bounds.longitude_min >= self.longitude_min )
+                 & ( other_geo_bounds.longitude_max <= self.longitude_max )
+                 & ( other_geo_bounds.latitude_min >= self.latitude_min )
+                 & ( other_geo_bounds.latitude_max <= self.latitude_max ) )
+
+    def intersect( self, other_geo_bounds : GeoBounds ):
+        """
+        The intersection of each bounds with the other bounds. Returns the
+        tuple ( GeoBoundsArray, is_intersecting_array ), where the
+        intersection is only meaningful where is_intersecting_array is True.
+        """
+        intersection = GeoBoundsArray( longitude_min = np.maximum( self.longitude_min, other_geo_bounds.longitude_min ),
+                                       longitude_max = np.minimum( self.longitude_max, other_geo_bounds.longitude_max ),
+                                       latitude_min = np.maximum( self.latitude_min, other_geo_bounds.latitude_min ),
+                                       latitude_max = np.minimum( self.latitude_max, other_geo_bounds.latitude_max ) )
+        is_intersecting_array = ( ( intersection.longitude_min <= intersection.longitude_max )
+                                  & ( intersection.latitude_min <= intersection.latitude_max ) )
+        return ( intersection, is_intersecting_array )
+
+    def intersects( self, other_geo_bounds : GeoBounds ):
+        return self.intersect( other_geo_bounds )[1]
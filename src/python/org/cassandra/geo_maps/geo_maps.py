@@ -1,9 +1,13 @@
+from collections import OrderedDict
 from dataclasses import dataclass
 import math
+import threading
 from typing import List
 
+import numpy as np
+
 from .display_bounds import DisplayBounds
-from .geo_bounds import GeoBounds
+from .geo_bounds import GeoBounds, GeoBoundsArray
 from .view_box import ViewBox
 from . import utils
 
@@ -56,6 +60,10 @@ class AlbersMapProjection:
 
         self.rho_0 = ( self.radius_miles / self.n ) \
             * math.sqrt( self.C - ( 2 * self.n * math.sin( self.reference_latitude_radians ) ))
+
+        # Hoisted out of the per-point projection calls
+        self._reference_longitude_radians = self.reference_longitude_radians
+        self._radius_over_n = self.radius_miles / self.n
         
         return
     
@@ -66,7 +74,7 @@ class AlbersMapProjection:
         longitude = math.radians( longitude_deg )
         latitude = math.radians( latitude_deg )
     
-        theta = self.n * ( longitude - self.reference_longitude_radians )
+        theta = self.n * ( longitude - self._reference_longitude_radians )
 
         rho_basis = self.C - ( 2 * self.n * math.sin( latitude ))
         if rho_basis < 0.0:
@@ -109,13 +117,71 @@ class AlbersMapProjection:
             else:
                 latitude_radians = -1.0 * math.pi / 2.0
         
-        longitude_radians = self.reference_longitude_radians + ( theta / self.n )
+        longitude_radians = self._reference_longitude_radians + ( theta / self.n )
 
         longitude_deg = math.degrees( longitude_radians )
         latitude_deg = math.degrees( latitude_radians )
 
         return ( longitude_deg, latitude_deg )
 
+    def x_y_from_deg_array( self, longitude_deg : np.ndarray, latitude_deg : np.ndarray ):
+        """
+        Batch version of x_y_from_deg(). Takes equal length arrays of
+        longitude and latitude (degrees) and returns the tuple ( x_array,
+        y_array ). Points where the projection is undefined map to (0, 0),
+        same as for the scalar version.
+        """
+        longitude = np.radians( np.asarray( longitude_deg, dtype = np.float64 ))
+        latitude = np.radians( np.asarray( latitude_deg, dtype = np.float64 ))
+
+        theta = self.n * ( longitude - self._reference_longitude_radians )
+
+        rho_basis = self.C - ( 2 * self.n * np.sin( latitude ))
+        is_undefined = rho_basis < 0.0
+        rho = self._radius_over_n * np.sqrt( np.where( is_undefined, 0.0, rho_basis ))
+
+        x = rho * np.sin( theta )
+        y = self.rho_0 - ( rho * np.cos( theta ))
+
+        if np.any( is_undefined ):
+            x = np.where( is_undefined, 0.0, x )
+            y = np.where( is_undefined, 0.0, y )
+            
+        return ( x, y )
+
+    def deg_from_x_y_array( self, x : np.ndarray, y : np.ndarray ):
+        """
+        Batch version of deg_from_x_y(). Takes equal length arrays of x and
+        y and returns the tuple ( longitude_deg_array, latitude_deg_array ).
+        """
+        x = np.asarray( x, dtype = np.float64 )
+        rho_0_minus_y = self.rho_0 - np.asarray( y, dtype = np.float64 )
+
+        rho = np.sqrt( x**2 + rho_0_minus_y**2 )
+        # As the scalar version's test, so NaN coordinates also get the apex
+        is_apex = ~( np.abs( rho ) > self.EPSILON )
+        if self.n < 0.0:
+            rho = -1.0 * rho
+            x = -1.0 * x
+            rho_0_minus_y = -1.0 * rho_0_minus_y
+
+        # Clipping the operand reproduces the +/- pi/2 clamping of the
+        # scalar version since asin(+/-1) is exactly +/- pi/2.
+        rho_adjusted = rho * self.n / self.radius_miles
+        latitude_operand = ( self.C - ( rho_adjusted * rho_adjusted ) ) / ( 2 * self.n )
+        latitude_radians = np.arcsin( np.clip( latitude_operand, -1.0, 1.0 ))
+
+        theta = np.arctan2( x, rho_0_minus_y )
+
+        if np.any( is_apex ):
+            apex_latitude_radians = math.pi / 2.0 if self.n > 0 else -1.0 * math.pi / 2.0
+            theta = np.where( is_apex, 0.0, theta )
+            latitude_radians = np.where( is_apex, apex_latitude_radians, latitude_radians )
+        
+        longitude_radians = self._reference_longitude_radians + ( theta / self.n )
+
+        return ( np.degrees( longitude_radians ), np.degrees( latitude_radians ) )
+
         
 @dataclass
 class GeoMap:
@@ -135,6 +201,9 @@ class GeoMap:
 
     rotation_angle_deg : float  = None
 
+    # Known ( longitude_deg, latitude_deg, svg_x, svg_y ) points on the SVG
+    # image. See calibration.calibrate_geo_map() for fitting the display
+    # values from these.
     calibration_points : List  = None
     
     def __post_init__(self):
@@ -147,8 +216,37 @@ class GeoMap:
             self._sine_angle = math.sin( self._rotation_angle_radians )
             self._cosine_angle = math.cos( self._rotation_angle_radians )
 
+        self._affine_matrix = None
+        self._inverse_affine_matrix = None
+        if None not in ( self.display_x_scale, self.display_y_scale,
+                         self.display_x_offset, self.display_y_offset ):
+            self._affine_matrix = self._get_affine_matrix()
+            self._inverse_affine_matrix = self._get_inverse_affine_matrix( self._affine_matrix )
         return
 
+    def _get_affine_matrix(self):
+        """
+        The rotation, scale and offset (with the y-axis flip for SVG
+        coordinates) combined into a single 2x3 matrix applied to the
+        projected (x, y).
+        """
+        sine_angle = self._sine_angle if self._rotation_angle_radians else 0.0
+        cosine_angle = self._cosine_angle if self._rotation_angle_radians else 1.0
+        return np.array([
+            [ cosine_angle * self.display_x_scale,
+              -1.0 * sine_angle * self.display_x_scale,
+              self.display_x_offset ],
+            [ -1.0 * sine_angle * self.display_y_scale,
+              -1.0 * cosine_angle * self.display_y_scale,
+              self.display_y_offset ],
+        ], dtype = np.float64 )
+
+    @staticmethod
+    def _get_inverse_affine_matrix( affine_matrix : np.ndarray ):
+        linear_inverse = np.linalg.inv( affine_matrix[:, :2] )
+        return np.hstack([ linear_inverse,
+                           -1.0 * linear_inverse.dot( affine_matrix[:, 2:] ) ])
+
     @property
     def aspect_ratio(self):
         return self.view_box.width / self.view_box.height
@@ -188,6 +286,33 @@ class GeoMap:
             longitude, latitude = self.projection.deg_from_x_y( x = scaled_x, y = scaled_y )
 
         return ( longitude, latitude )
+
+    def long_lat_deg_to_coords_array( self, longitude_deg : np.ndarray, latitude_deg : np.ndarray ):
+        """
+        Batch version of long_lat_deg_to_coords(). Returns the tuple (
+        x_array, y_array ) in SVG coordinates.
+        """
+        projected_x, projected_y = self.projection.x_y_from_deg_array( longitude_deg = longitude_deg,
+                                                                       latitude_deg = latitude_deg )
+        return self._apply_affine( self._affine_matrix, projected_x, projected_y )
+    
+    def coords_to_long_lat_deg_array( self, x : np.ndarray, y : np.ndarray ):
+        """
+        Batch version of coords_to_long_lat_deg(). Returns the tuple (
+        longitude_deg_array, latitude_deg_array ).
+        """
+        projected_x, projected_y = self._apply_affine( self._inverse_affine_matrix,
+                                                       np.asarray( x, dtype = np.float64 ),
+                                                       np.asarray( y, dtype = np.float64 ) )
+        return self.projection.deg_from_x_y_array( x = projected_x, y = projected_y )
+
+    @staticmethod
+    def _apply_affine( affine_matrix : np.ndarray, x : np.ndarray, y : np.ndarray ):
+        if affine_matrix is None:
+            raise ValueError( 'GeoMap display scale and offset values must be set.' )
+        ( a, b, c ), ( d, e, f ) = affine_matrix.tolist()
+        return ( ( a * x ) + ( b * y ) + c,
+                 ( d * x ) + ( e * y ) + f )
   
 
 USA_CONTINENTAL_PROJECTION = AlbersMapProjection(
@@ -350,6 +475,9 @@ class CompositeGeoMap:
     represent different geographic areas.
     """
 
+    # Number of ( GeoMap, ViewBox ) edge samplings kept for view_box_to_geo_bounds_list()
+    EDGE_SAMPLE_CACHE_SIZE = 256
+
     def __init__( self, map_id : int, geo_map_list : List[GeoMap] ):
         """ First one in list is considered default. List cannot be empty. """
         
@@ -373,7 +501,25 @@ class CompositeGeoMap:
             continue
 
         self._svg_template_name_list = list(svg_template_name_set)
-        
+
+        # For batch routing of points to their GeoMap
+        self._geo_bounds_array = GeoBoundsArray.from_geo_bounds_list( self._geo_bounds_list )
+
+        # ( geo map index, view box, points per edge ) -> inverse projected edge points
+        self._edge_sample_cache = OrderedDict()
+        self._edge_sample_lock = threading.Lock()
+        return
+
+    def __getstate__(self):
+        # The edge sample cache is not worth sending along and the lock cannot be pickled.
+        state = self.__dict__.copy()
+        state['_edge_sample_cache'] = OrderedDict()
+        del state['_edge_sample_lock']
+        return state
+
+    def __setstate__( self, state ):
+        self.__dict__.update( state )
+        self._edge_sample_lock = threading.Lock()
         return
 
     @property
@@ -410,6 +556,10 @@ class CompositeGeoMap:
     def svg_template_name_list(self):
         return self._svg_template_name_list
 
+    @property
+    def geo_map_list(self):
+        return self._geo_map_list
+
     def contains_bounds( self, geo_bounds : GeoBounds ):
         for geo_map_bounds in self._geo_bounds_list:
             if geo_map_bounds.contains_bounds( other_geo_bounds = geo_bounds ):
@@ -427,6 +577,52 @@ class CompositeGeoMap:
             continue
         return self._default_geo_map
 
+    def get_geo_map_index_array( self,
+                                 longitude_deg : np.ndarray,
+                                 latitude_deg : np.ndarray ):
+        """
+        Batch version of get_geo_map_for_point(). Returns an array of
+        indices into geo_map_list, one for each point. As for the scalar
+        version, the first GeoMap whose bounds contains the point wins and
+        points outside all bounds go to the default GeoMap (index 0).
+        """
+        is_contained = self._geo_bounds_array.contains_point( longitude_deg = np.ravel( longitude_deg ),
+                                                              latitude_deg = np.ravel( latitude_deg ))
+
+        # argmax() gives the first True, but also 0 when there are none,
+        # which happens to be the default GeoMap index.
+        return np.argmax( is_contained, axis = 1 )
+
+    def long_lat_deg_to_coords_array( self,
+                                      longitude_deg : np.ndarray,
+                                      latitude_deg : np.ndarray,
+                                      geo_map_index_array : np.ndarray = None ):
+        """
+        Routes each point to its GeoMap and projects each group of points
+        in one batch.  Returns the tuple ( x_array, y_array ) in the same
+        order as the input points. The routing can be passed in if it has
+        already been computed.
+        """
+        longitude_deg = np.asarray( longitude_deg, dtype = np.float64 )
+        latitude_deg = np.asarray( latitude_deg, dtype = np.float64 )
+        if geo_map_index_array is None:
+            geo_map_index_array = self.get_geo_map_index_array( longitude_deg = longitude_deg,
+                                                                latitude_deg = latitude_deg )
+        x_array = np.empty( longitude_deg.shape, dtype = np.float64 )
+        y_array = np.empty( longitude_deg.shape, dtype = np.float64 )
+        
+        for geo_map_index, geo_map in enumerate( self._geo_map_list ):
+            point_indices = np.flatnonzero( geo_map_index_array == geo_map_index )
+            if point_indices.size == 0:
+                continue
+            x_array[point_indices], y_array[point_indices] = geo_map.long_lat_deg_to_coords_array(
+                longitude_deg = longitude_deg[point_indices],
+                latitude_deg = latitude_deg[point_indices],
+            )
+            continue
+
+        return ( x_array, y_array )
+
     def geo_bounds_to_display_bounds( self, geo_bounds : GeoBounds ):
 
         display_bounds = DisplayBounds()
@@ -444,16 +640,30 @@ class CompositeGeoMap:
 
         return display_bounds
 
-    def view_box_to_geo_bounds_list( self, view_box : ViewBox ):
+    def view_box_to_geo_bounds_list( self, view_box : ViewBox, points_per_edge : int = None ):
+        """
+        The GeoBounds of the view box for each GeoMap it overlaps. By
+        default, only the view box corners are inverse projected, but since
+        the projection's parallels are curved, that misses the bulge of the
+        area along the top and bottom edges. Setting points_per_edge
+        samples that many points along each edge instead. The sampled
+        points are cached per GeoMap and view box.
+        """
 
         geo_bounds_list = list()
-        for geo_map in self._geo_map_list:
+        for geo_map_index, geo_map in enumerate( self._geo_map_list ):
 
             geo_bounds = GeoBounds()
-            for x, y in view_box.corner_points():
-                longitude, latitude = geo_map.coords_to_long_lat_deg( x = x, y = y )
-                geo_bounds.add_point( longitude = longitude, latitude = latitude )
-                continue
+            if points_per_edge:
+                longitude_array, latitude_array = self._get_edge_sample_long_lat( geo_map_index = geo_map_index,
+                                                                                  view_box = view_box,
+                                                                                  points_per_edge = points_per_edge )
+                geo_bounds.add_points( longitude_array, latitude_array )
+            else:
+                for x, y in view_box.corner_points():
+                    longitude, latitude = geo_map.coords_to_long_lat_deg( x = x, y = y )
+                    geo_bounds.add_point( longitude = longitude, latitude = latitude )
+                    continue
 
             # If the long/lat form the projections do not fall inside the
             # known bounds, then we can ignore it.
@@ -466,6 +676,37 @@ class CompositeGeoMap:
         
         return geo_bounds_list
 
+    def clear_edge_sample_cache(self):
+        """ Drops the points sampled by view_box_to_geo_bounds_list(), e.g., to time the sampling. """
+        with self._edge_sample_lock:
+            self._edge_sample_cache.clear()
+        return
+
+    def _get_edge_sample_long_lat( self, geo_map_index : int, view_box : ViewBox, points_per_edge : int ):
+        """ Read-only ( longitude_array, latitude_array ) of the view box edge points for one GeoMap. """
+        cache_key = ( geo_map_index, view_box.x, view_box.y, view_box.width, view_box.height, points_per_edge )
+        with self._edge_sample_lock:
+            long_lat = self._edge_sample_cache.get( cache_key )
+            if long_lat is not None:
+                self._edge_sample_cache.move_to_end( cache_key )
+                return long_lat
+
+        x_array, y_array = view_box.get_edge_points_array( points_per_edge )
+        longitude_array, latitude_array = self._geo_map_list[geo_map_index].coords_to_long_lat_deg_array(
+            x = x_array, y = y_array )
+        is_valid = np.isfinite( longitude_array ) & np.isfinite( latitude_array )
+        long_lat = ( longitude_array[is_valid], latitude_array[is_valid] )
+        for array in long_lat:
+            array.setflags( write = False )
+            continue
+
+        with self._edge_sample_lock:
+            self._edge_sample_cache[cache_key] = long_lat
+            while len(self._edge_sample_cache) > self.EDGE_SAMPLE_CACHE_SIZE:
+                self._edge_sample_cache.popitem( last = False )
+                continue
+        return long_lat
+
     
 UsaContinentalCompositeGeoMap = CompositeGeoMap(
     map_id = 1,
@@ -0,0 +1,192 @@
+import math
+from typing import Dict, List
+
+import numpy as np
+
+from .geo_maps import CompositeGeoMap
+from .svg_paths import get_path_d, is_closed_subpath
+from .view_box import ViewBox
+
+
+# Supported GeoJSON style geometry types. Coordinates are [ longitude, latitude ].
+LINE_STRING = 'LineString'
+MULTI_LINE_STRING = 'MultiLineString'
+POLYGON = 'Polygon'
+MULTI_POLYGON = 'MultiPolygon'
+
+DEFAULT_PIXEL_TOLERANCE = 0.5
+
+
+def get_svg_tolerance( view_box : ViewBox,
+                       display_width : float,
+                       pixel_tolerance : float = DEFAULT_PIXEL_TOLERANCE ):
+    """
+    The pixel tolerance in SVG units when the view box is displayed
+    display_width pixels wide. As for the SvgMapRenderer level of detail,
+    the template's native size is the composite map's default view box
+    width.
+    """
+    return pixel_tolerance * view_box.width / display_width
+
+
+def get_tolerance_decimals( tolerance : float ):
+    """ Decimals for writing coordinates so the rounding stays well within the tolerance. """
+    if tolerance <= 0.0:
+        return 2
+    return max( 0, math.ceil( -1.0 * math.log10( tolerance )))
+
+
+def get_sub_pixel_mask( points : np.ndarray, tolerance : float ):
+    """
+    Boolean mask of the (N, 2) points to keep: consecutive points in the
+    same grid cell (with a diagonal of tolerance) as the one before are
+    dropped, so no dropped point is further than tolerance from a kept
+    one. The first and last points are always kept.
+    """
+    keep_mask = np.ones( len(points), dtype = bool )
+    if ( tolerance <= 0.0 ) or ( len(points) < 3 ):
+        return keep_mask
+    cells = np.floor( points * ( math.sqrt( 2.0 ) / tolerance ))
+    keep_mask[1:] = np.any( cells[1:] != cells[:-1], axis = 1 )
+    keep_mask[-1] = True
+    return keep_mask
+
+
+def get_coordinate_list( geometry : Dict ):
+    """ List of ( (N, 2) long/lat array, is_ring ) for the lines and rings of the geometry. """
+    geometry_type = geometry['type']
+    if geometry_type == LINE_STRING:
+        line_list, ring_list = [ geometry['coordinates'] ], list()
+    elif geometry_type == MULTI_LINE_STRING:
+        line_list, ring_list = geometry['coordinates'], list()
+    elif geometry_type == POLYGON:
+        line_list, ring_list = list(), geometry['coordinates']
+    elif geometry_type == MULTI_POLYGON:
+        line_list, ring_list = list(), [ ring for polygon in geometry['coordinates'] for ring in polygon ]
+    else:
+        raise ValueError( f'Unsupported geometry type "{geometry_type}".' )
+
+    coordinate_list = list()
+    for coordinates, is_ring in [ ( x, False ) for x in line_list ] + [ ( x, True ) for x in ring_list ]:
+        coordinates = np.asarray( coordinates, dtype = np.float64 ).reshape( -1, 2 )
+        if is_ring and len(coordinates) and not np.array_equal( coordinates[0], coordinates[-1] ):
+            coordinates = np.concatenate([ coordinates, coordinates[:1] ])
+        coordinate_list.append( ( coordinates, is_ring ) )
+        continue
+    return coordinate_list
+
+
+def split_by_geo_map( points : np.ndarray, geo_map_index_array : np.ndarray, is_ring : bool ):
+    """
+    Splits the (N, 2) projected points of a line or ring where they change
+    GeoMap (e.g., a track from Washington into Alaska), since the sub-maps
+    are drawn apart. Lines are split into their runs of points. For rings,
+    each GeoMap's points (in ring order) become a ring of their own, closed
+    across the gaps where the ring was in another GeoMap.
+    """
+    change_idx_array = np.flatnonzero( np.diff( geo_map_index_array )) + 1
+    if change_idx_array.size == 0:
+        return [ points ]
+    run_list = np.split( points, change_idx_array )
+    run_geo_map_index_list = geo_map_index_array[np.concatenate([ [ 0 ], change_idx_array ])].tolist()
+    if not is_ring:
+        return run_list
+
+    # The first and last runs meet at the ring's closing point (repeated at the end).
+    if run_geo_map_index_list[0] == run_geo_map_index_list[-1]:
+        run_list[0] = np.concatenate([ run_list.pop()[:-1], run_list[0] ])
+        run_geo_map_index_list.pop()
+    split_ring_list = list()
+    for geo_map_index in dict.fromkeys( run_geo_map_index_list ):
+        ring = np.concatenate([ run for run, run_geo_map_index in zip( run_list, run_geo_map_index_list )
+                                if run_geo_map_index == geo_map_index ])
+        split_ring_list.append( np.concatenate([ ring, ring[:1] ]) )
+        continue
+    return split_ring_list
+
+
+def project_geometry_list( composite_map : CompositeGeoMap,
+                           geometry_list : List[Dict],
+                           tolerance : float = 0.0 ):
+    """
+    Projects the lines and rings of GeoJSON style geometries (see
+    get_coordinate_list()) through the composite map, all vertices in one
+    batch, splitting any that cross GeoMap bounds (see split_by_geo_map())
+    and dropping consecutive vertices within tolerance (in SVG units) of
+    each other (see get_sub_pixel_mask()).
+
+    Returns a list of sub-paths per geometry, each an (N, 2) array of SVG
+    coordinates with rings closed (first point repeated as the last).
+    Lines of less than two points and rings that collapse are dropped.
+    """
+    part_list = list()
+    for geometry_idx, geometry in enumerate( geometry_list ):
+        for coordinates, is_ring in get_coordinate_list( geometry ):
+            if len(coordinates) < ( 4 if is_ring else 2 ):
+                continue
+            part_list.append( ( geometry_idx, coordinates, is_ring ) )
+            continue
+        continue
+
+    subpath_list_list = [ list() for _ in geometry_list ]
+    if not part_list:
+        return subpath_list_list
+
+    coordinates = np.concatenate([ part[1] for part in part_list ])
+    geo_map_index_array = composite_map.get_geo_map_index_array( longitude_deg = coordinates[:, 0],
+                                                                 latitude_deg = coordinates[:, 1] )
+    x_array, y_array = composite_map.long_lat_deg_to_coords_array( longitude_deg = coordinates[:, 0],
+                                                                   latitude_deg = coordinates[:, 1],
+                                                                   geo_map_index_array = geo_map_index_array )
+    points = np.column_stack([ x_array, y_array ])
+
+    part_end_idx_array = np.cumsum([ len(part[1]) for part in part_list ])[:-1]
+    for ( geometry_idx, _, is_ring ), part_points, part_geo_map_index_array in zip(
+            part_list, np.split( points, part_end_idx_array ), np.split( geo_map_index_array, part_end_idx_array )):
+        for subpath in split_by_geo_map( part_points, part_geo_map_index_array, is_ring = is_ring ):
+            subpath = subpath[get_sub_pixel_mask( subpath, tolerance )]
+            if len(subpath) < ( 4 if is_ring else 2 ):
+                continue
+            subpath_list_list[geometry_idx].append( subpath )
+            continue
+        continue
+    return subpath_list_list
+
+
+def get_subpath_list_d( subpath_list : List[np.ndarray], decimals : int ):
+    """
+    Path "d" attribute value for the projected sub-paths (see
+    svg_paths.get_path_d()), without the points that round to the same
+    place as the one before, which would only add "0,0" offsets.
+    """
+    rounded_subpath_list = list()
+    for subpath in subpath_list:
+        is_closed = is_closed_subpath( subpath )
+        rounded_subpath = np.round( subpath[:-1] if is_closed else subpath, decimals )
+        is_moved = np.ones( len(rounded_subpath), dtype = bool )
+        is_moved[1:] = np.any( rounded_subpath[1:] != rounded_subpath[:-1], axis = 1 )
+        rounded_subpath = rounded_subpath[is_moved]
+        if is_closed:
+            rounded_subpath = np.concatenate([ rounded_subpath, rounded_subpath[:1] ])
+        if len(rounded_subpath) < ( 4 if is_closed else 2 ):
+            continue
+        rounded_subpath_list.append( rounded_subpath )
+        continue
+    return get_path_d( rounded_subpath_list, decimals = decimals )
+
+
+def get_geometry_d_list( composite_map : CompositeGeoMap,
+                         geometry_list : List[Dict],
+                         tolerance : float = 0.0,
+                         decimals : int = None ):
+    """
+    SVG path "d" attribute values, one per geometry (empty if nothing is
+    left to draw), for project_geometry_list(). Coordinates are written
+    relative, with the decimals following the tolerance by default.
+    """
+    if decimals is None:
+        decimals = get_tolerance_decimals( tolerance )
+    return [ get_subpath_list_d( subpath_list, decimals = decimals )
+             for subpath_list in project_geometry_list( composite_map = composite_map,
+                                                        geometry_list = geometry_list,
+                                                        tolerance = tolerance ) ]
@@ -0,0 +1,285 @@
+import math
+
+import numpy as np
+
+from .geo_bounds import GeoBoundsArray
+from .geo_maps import CompositeGeoMap
+from .geometry import get_sub_pixel_mask, get_subpath_list_d, get_tolerance_decimals, split_by_geo_map
+from . import utils
+
+
+# Bounds the points generated for very long arcs at very small tolerances
+DEFAULT_MAX_SEGMENT_COUNT = 1024
+
+
+def get_segment_count_array( composite_map : CompositeGeoMap,
+                             lat1, lng1, lat2, lng2,
+                             tolerance : float,
+                             max_segment_count : int = DEFAULT_MAX_SEGMENT_COUNT ):
+    """
+    Number of straight segments for drawing each great circle arc so that
+    they stay within about tolerance (in SVG units, see
+    geometry.get_svg_tolerance()) of the curve.
+
+    On the map, a great circle curves no more than a circle of the earth's
+    radius (in SVG units, at the largest GeoMap scale) does, and a circle
+    of radius R drawn with n segments over an angle A is off by at most
+    R * A^2 / ( 8 n^2 ). So the count grows with the arc length and with
+    the zoom level.
+    """
+    central_angle_array = utils.get_central_angle_array( lat1, lng1, lat2, lng2 )
+    if tolerance <= 0.0:
+        return np.full( central_angle_array.shape, max_segment_count, dtype = np.int64 )
+    svg_radius = max( abs( geo_map.display_x_scale * geo_map.projection.radius_miles )
+                      for geo_map in composite_map.geo_map_list )
+    segment_count_array = np.ceil( central_angle_array * math.sqrt( svg_radius / ( 8.0 * tolerance )))
+    return np.clip( segment_count_array, 1, max_segment_count ).astype( np.int64 )
+
+
+def get_great_circle_points( lat1, lng1, lat2, lng2, segment_count_array ):
+    """
+    Points along the great circle arcs from each ( lat1, lng1 ) to ( lat2,
+    lng2 ), evenly spaced with segment_count_array[i] segments for arc i,
+    all computed together (spherical linear interpolation).
+
+    Returns the tuple ( longitude_array, latitude_array, arc_offset_array )
+    where arc i is points arc_offset_array[i] up to arc_offset_array[i + 1].
+    Longitudes continue from the start of each arc (so can go past +/-180)
+    and the end points are the given ones. Antipodal end points have no
+    unique arc.
+    """
+    lat1, lng1, lat2, lng2 = [ np.ravel( np.asarray( x, dtype = np.float64 )) for x in ( lat1, lng1, lat2, lng2 ) ]
+    segment_count_array = np.maximum( np.ravel( segment_count_array ), 1 ).astype( np.int64 )
+    point_count_array = segment_count_array + 1
+    arc_offset_array = np.concatenate([ [ 0 ], np.cumsum( point_count_array ) ])
+
+    arc_idx_array = np.repeat( np.arange( lat1.size ), point_count_array )
+    fraction_array = ( np.arange( arc_offset_array[-1] ) - arc_offset_array[arc_idx_array] ) \
+        / segment_count_array[arc_idx_array]
+
+    start_vector = _get_unit_vectors( lat1, lng1 )
+    end_vector = _get_unit_vectors( lat2, lng2 )
+    central_angle_array = utils.get_central_angle_array( lat1, lng1, lat2, lng2 )
+    sine_angle_array = np.sin( central_angle_array )
+    # Nearly coincident end points: linear interpolation is as good.
+    is_short = sine_angle_array < 1e-12
+    angle = central_angle_array[arc_idx_array]
+    sine_angle = np.where( is_short, 1.0, sine_angle_array )[arc_idx_array]
+    start_weight = np.where( is_short[arc_idx_array], 1.0 - fraction_array,
+                             np.sin( ( 1.0 - fraction_array ) * angle ) / sine_angle )
+    end_weight = np.where( is_short[arc_idx_array], fraction_array,
+                           np.sin( fraction_array * angle ) / sine_angle )
+    vector = ( start_weight[:, np.newaxis] * start_vector[arc_idx_array] ) \
+        + ( end_weight[:, np.newaxis] * end_vector[arc_idx_array] )
+
+    latitude_array = np.degrees( np.arctan2( vector[:, 2], np.hypot( vector[:, 0], vector[:, 1] )))
+    longitude_array = np.degrees( np.arctan2( vector[:, 1], vector[:, 0] ))
+    start_longitude = lng1[arc_idx_array]
+    longitude_array = start_longitude + ( ( longitude_array - start_longitude + 180.0 ) % 360.0 ) - 180.0
+
+    latitude_array[arc_offset_array[:-1]] = lat1
+    longitude_array[arc_offset_array[:-1]] = lng1
+    latitude_array[arc_offset_array[1:] - 1] = lat2
+    longitude_array[arc_offset_array[1:] - 1] = lng1 + ( ( lng2 - lng1 + 180.0 ) % 360.0 ) - 180.0
+    return ( longitude_array, latitude_array, arc_offset_array )
+
+
+def _get_unit_vectors( latitude_deg : np.ndarray, longitude_deg : np.ndarray ):
+    latitude = np.radians( latitude_deg )
+    longitude = np.radians( longitude_deg )
+    cosine_latitude = np.cos( latitude )
+    return np.column_stack([ cosine_latitude * np.cos( longitude ),
+                             cosine_latitude * np.sin( longitude ),
+                             np.sin( latitude ) ])
+
+
+def get_arc_geo_map_index_array( composite_map : CompositeGeoMap,
+                                 longitude_array : np.ndarray,
+                                 latitude_array : np.ndarray ):
+    """
+    GeoMap index for each arc point (see get_great_circle_points()), or -1
+    for points outside every GeoMap's bounds (e.g., over the ocean on the
+    way to Hawaii, or over Canada on the way to Alaska). Those are not
+    drawn, rather than drawn in the default GeoMap, where they would cross
+    the map between the insets.
+    """
+    geo_map_index_array = composite_map.get_geo_map_index_array( longitude_deg = longitude_array,
+                                                                 latitude_deg = latitude_array )
+    is_contained = GeoBoundsArray.from_geo_bounds_list( composite_map.geo_bounds_list ).contains_point(
+        longitude_deg = longitude_array, latitude_deg = latitude_array ).any( axis = 1 )
+    return np.where( is_contained, geo_map_index_array, -1 )
+
+
+def _get_clipped_points( bounds_array : np.ndarray,
+                         geo_map_index_array : np.ndarray,
+                         from_first : np.ndarray,
+                         from_second : np.ndarray,
+                         to_first : np.ndarray,
+                         to_second : np.ndarray ):
+    """
+    Where each segment, from a point within the bounds of its GeoMap to
+    one outside them, leaves those bounds. The bounds_array has a row per
+    GeoMap of ( first_min, first_max, second_min, second_max ) for the
+    two coordinates. Returns the tuple ( first_array, second_array ).
+    """
+    fraction_array = np.ones( from_first.shape, dtype = np.float64 )
+    for from_array, to_array, min_array, max_array in [
+            ( from_first, to_first, bounds_array[:, 0], bounds_array[:, 1] ),
+            ( from_second, to_second, bounds_array[:, 2], bounds_array[:, 3] ) ]:
+        edge_array = np.clip( to_array, min_array[geo_map_index_array], max_array[geo_map_index_array] )
+        is_outside = edge_array != to_array
+        fraction_array[is_outside] = np.minimum( fraction_array[is_outside],
+                                                 ( edge_array - from_array )[is_outside]
+                                                 / ( to_array - from_array )[is_outside] )
+        continue
+    return ( from_first + fraction_array * ( to_first - from_first ),
+             from_second + fraction_array * ( to_second - from_second ) )
+
+
+def _insert_clipped_points( first_array : np.ndarray,
+                            second_array : np.ndarray,
+                            arc_offset_array : np.ndarray,
+                            geo_map_index_array : np.ndarray,
+                            bounds_array : np.ndarray,
+                            segment_idx_array : np.ndarray ):
+    """
+    For each segment from point i to i + 1, adds the points where it
+    leaves the bounds (see _get_clipped_points()) of the GeoMap of either
+    end, if that end has one (index not -1). Segments from the end of one
+    arc to the start of the next are skipped. Returns the tuple
+    ( first_array, second_array, arc_offset_array, geo_map_index_array )
+    with the points added.
+    """
+    segment_idx_array = np.setdiff1d( segment_idx_array, arc_offset_array[1:-1] - 1 )
+
+    insert_idx_list, first_list, second_list, inserted_geo_map_index_list = list(), list(), list(), list()
+    # Leaving bounds, then entering them, so the points inserted at a segment are in arc order
+    for from_idx_array, to_idx_array in [ ( segment_idx_array, segment_idx_array + 1 ),
+                                          ( segment_idx_array + 1, segment_idx_array ) ]:
+        is_within = geo_map_index_array[from_idx_array] >= 0
+        from_idx_array, to_idx_array = from_idx_array[is_within], to_idx_array[is_within]
+        clipped_first, clipped_second = _get_clipped_points( bounds_array,
+                                                             geo_map_index_array[from_idx_array],
+                                                             first_array[from_idx_array],
+                                                             second_array[from_idx_array],
+                                                             first_array[to_idx_array],
+                                                             second_array[to_idx_array] )
+        insert_idx_list.append( np.maximum( from_idx_array, to_idx_array ))
+        first_list.append( clipped_first )
+        second_list.append( clipped_second )
+        inserted_geo_map_index_list.append( geo_map_index_array[from_idx_array] )
+        continue
+
+    insert_idx_array = np.concatenate( insert_idx_list )
+    order_array = np.argsort( insert_idx_array, kind = 'stable' )
+    insert_idx_array = insert_idx_array[order_array]
+    return ( np.insert( first_array, insert_idx_array, np.concatenate( first_list )[order_array] ),
+             np.insert( second_array, insert_idx_array, np.concatenate( second_list )[order_array] ),
+             arc_offset_array + np.searchsorted( insert_idx_array, arc_offset_array ),
+             np.insert( geo_map_index_array, insert_idx_array,
+                        np.concatenate( inserted_geo_map_index_list )[order_array] ))
+
+
+def clip_arcs_to_geo_bounds( composite_map : CompositeGeoMap,
+                             longitude_array : np.ndarray,
+                             latitude_array : np.ndarray,
+                             arc_offset_array : np.ndarray,
+                             geo_map_index_array : np.ndarray ):
+    """
+    Adds the points where the arcs leave and enter GeoMap bounds (see
+    get_arc_geo_map_index_array()), so each run of points in a GeoMap
+    reaches the edge of its bounds. Segments are short enough for linear
+    interpolation in degrees. Returns the tuple ( longitude_array,
+    latitude_array, arc_offset_array, geo_map_index_array ) with the
+    points added.
+    """
+    bounds_array = np.array([ ( geo_bounds.longitude_min, geo_bounds.longitude_max,
+                                geo_bounds.latitude_min, geo_bounds.latitude_max )
+                              for geo_bounds in composite_map.geo_bounds_list ], dtype = np.float64 )
+    segment_idx_array = np.flatnonzero( geo_map_index_array[:-1] != geo_map_index_array[1:] )
+    return _insert_clipped_points( longitude_array, latitude_array, arc_offset_array, geo_map_index_array,
+                                   bounds_array, segment_idx_array )
+
+
+def clip_arcs_to_view_boxes( composite_map : CompositeGeoMap,
+                             x_array : np.ndarray,
+                             y_array : np.ndarray,
+                             arc_offset_array : np.ndarray,
+                             geo_map_index_array : np.ndarray ):
+    """
+    As clip_arcs_to_geo_bounds(), but for the projected points and the
+    view box of their GeoMap, since the bounds of an inset can reach past
+    the edge of the map (e.g., the ocean south east of Alaska). Points
+    outside get the GeoMap index -1.
+    """
+    bounds_array = np.array([ ( geo_map.view_box.min_x, geo_map.view_box.max_x,
+                                geo_map.view_box.min_y, geo_map.view_box.max_y )
+                              for geo_map in composite_map.geo_map_list ], dtype = np.float64 )
+    is_drawn = geo_map_index_array >= 0
+    view_box_bounds = bounds_array[np.maximum( geo_map_index_array, 0 )]
+    is_outside = is_drawn & ~( ( x_array >= view_box_bounds[:, 0] ) & ( x_array <= view_box_bounds[:, 1] )
+                               & ( y_array >= view_box_bounds[:, 2] ) & ( y_array <= view_box_bounds[:, 3] ))
+    # Only within the run of a GeoMap, as the coordinates of different GeoMaps do not connect
+    segment_idx_array = np.flatnonzero( is_drawn[:-1] & ( geo_map_index_array[:-1] == geo_map_index_array[1:] )
+                                        & ( is_outside[:-1] != is_outside[1:] ))
+    return _insert_clipped_points( x_array, y_array, arc_offset_array,
+                                   np.where( is_outside, -1, geo_map_index_array ),
+                                   bounds_array, segment_idx_array )
+
+
+def project_great_circle_arcs( composite_map : CompositeGeoMap,
+                               lat1, lng1, lat2, lng2,
+                               tolerance : float,
+                               max_segment_count : int = DEFAULT_MAX_SEGMENT_COUNT ):
+    """
+    Great circle arcs (e.g., origin to destination flows) densified for
+    the tolerance (see get_segment_count_array()) and projected in one
+    batch. Returns a list of sub-paths per arc, each an (N, 2) array of
+    SVG coordinates. Arcs are split where they change GeoMap, and clipped
+    to the GeoMap bounds and view boxes (see clip_arcs_to_geo_bounds() and
+    clip_arcs_to_view_boxes()), so an arc to an inset is drawn leaving one
+    map and arriving in the other.
+    """
+    segment_count_array = get_segment_count_array( composite_map, lat1, lng1, lat2, lng2,
+                                                   tolerance = tolerance,
+                                                   max_segment_count = max_segment_count )
+    longitude_array, latitude_array, arc_offset_array = get_great_circle_points( lat1, lng1, lat2, lng2,
+                                                                                 segment_count_array )
+    geo_map_index_array = get_arc_geo_map_index_array( composite_map, longitude_array, latitude_array )
+    longitude_array, latitude_array, arc_offset_array, geo_map_index_array = clip_arcs_to_geo_bounds(
+        composite_map, longitude_array, latitude_array, arc_offset_array, geo_map_index_array )
+    x_array, y_array = composite_map.long_lat_deg_to_coords_array( longitude_deg = longitude_array,
+                                                                   latitude_deg = latitude_array,
+                                                                   geo_map_index_array = geo_map_index_array )
+    x_array, y_array, arc_offset_array, geo_map_index_array = clip_arcs_to_view_boxes(
+        composite_map, x_array, y_array, arc_offset_array, geo_map_index_array )
+    points = np.column_stack([ x_array, y_array ])
+    # Marks the runs that are not drawn
+    points[geo_map_index_array < 0] = np.nan
+
+    subpath_list_list = list()
+    for start, stop in zip( arc_offset_array[:-1].tolist(), arc_offset_array[1:].tolist() ):
+        subpath_list = list()
+        for subpath in split_by_geo_map( points[start:stop], geo_map_index_array[start:stop], is_ring = False ):
+            if np.isnan( subpath[0, 0] ):
+                continue
+            subpath = subpath[get_sub_pixel_mask( subpath, tolerance )]
+            if len(subpath) < 2:
+                continue
+            subpath_list.append( subpath )
+            continue
+        subpath_list_list.append( subpath_list )
+        continue
+    return subpath_list_list
+
+
+def get_great_circle_d_list( composite_map : CompositeGeoMap,
+                             lat1, lng1, lat2, lng2,
+                             tolerance : float,
+                             decimals : int = None ):
+    """ SVG path "d" attribute values, one per arc, for project_great_circle_arcs(). """
+    if decimals is None:
+        decimals = get_tolerance_decimals( tolerance )
+    return [ get_subpath_list_d( subpath_list, decimals = decimals )
+             for subpath_list in project_great_circle_arcs( composite_map, lat1, lng1, lat2, lng2,
+                                                            tolerance = tolerance ) ]
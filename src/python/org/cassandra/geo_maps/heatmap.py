@@ -0,0 +1,175 @@
+import base64
+import math
+import struct
+from typing import List, Tuple
+import zlib
+
+import numpy as np
+
+from .geo_maps import CompositeGeoMap
+from .view_box import ViewBox
+
+
+# ( position, ( red, green, blue, alpha ) ) stops, position in [ 0, 1 ]
+# of the normalized density.
+DEFAULT_COLOR_STOPS = [
+    ( 0.0, ( 255, 255, 0, 0 ) ),
+    ( 0.3, ( 255, 200, 0, 140 ) ),
+    ( 1.0, ( 220, 0, 0, 230 ) ),
+]
+
+
+class DensityHeatmap:
+    """
+    Point counts accumulated into a pixel grid aligned with a view box, for
+    drawing as an image layer over the map. Batches of points add into the
+    existing grid.
+    """
+
+    def __init__( self,
+                  composite_map : CompositeGeoMap,
+                  view_box : ViewBox,
+                  width_pixels : int,
+                  height_pixels : int = None ):
+        """ The height defaults to keeping the view box aspect ratio. """
+
+        if height_pixels is None:
+            height_pixels = max( 1, round( width_pixels * view_box.height / view_box.width ))
+        self._composite_map = composite_map
+        self._view_box = view_box
+        self._width_pixels = int( width_pixels )
+        self._height_pixels = int( height_pixels )
+
+        # Rows are SVG y (downwards), columns are SVG x.
+        self._count_grid = np.zeros( ( self._height_pixels, self._width_pixels ), dtype = np.float64 )
+        return
+
+    @property
+    def view_box(self):
+        return self._view_box
+
+    @property
+    def count_grid(self):
+        return self._count_grid
+
+    @property
+    def total_count(self):
+        return float( self._count_grid.sum() )
+
+    def add_points( self,
+                    longitude_deg : np.ndarray,
+                    latitude_deg : np.ndarray,
+                    weights : np.ndarray = None ):
+        x, y = self._composite_map.long_lat_deg_to_coords_array( longitude_deg = longitude_deg,
+                                                                 latitude_deg = latitude_deg )
+        self.add_coords( x = x, y = y, weights = weights )
+        return
+
+    def add_coords( self, x : np.ndarray, y : np.ndarray, weights : np.ndarray = None ):
+        """ Adds points already in SVG coordinates. Points outside the view box are ignored. """
+        count_grid, _, _ = np.histogram2d(
+            np.asarray( y, dtype = np.float64 ),
+            np.asarray( x, dtype = np.float64 ),
+            bins = ( self._height_pixels, self._width_pixels ),
+            range = ( ( self._view_box.min_y, self._view_box.max_y ),
+                      ( self._view_box.min_x, self._view_box.max_x ) ),
+            weights = weights,
+        )
+        self._count_grid += count_grid
+        return
+
+    def clear(self):
+        self._count_grid[:] = 0.0
+        return
+
+    def get_density_grid( self, blur_sigma_pixels : float = None ):
+        """ The count grid, optionally with a Gaussian blur applied. """
+        if not blur_sigma_pixels:
+            return self._count_grid.copy()
+        kernel = get_gaussian_kernel( sigma = blur_sigma_pixels )
+        blurred_grid = convolve_axis( self._count_grid, kernel, axis = 0 )
+        return convolve_axis( blurred_grid, kernel, axis = 1 )
+
+    def to_png_bytes( self,
+                      blur_sigma_pixels : float = None,
+                      color_stops : List[Tuple] = DEFAULT_COLOR_STOPS,
+                      gamma : float = 0.5 ):
+        """
+        The density as an RGBA PNG image. Density is normalized to the
+        maximum value, and a gamma below 1 brings out the lower density
+        areas.
+        """
+        density_grid = self.get_density_grid( blur_sigma_pixels = blur_sigma_pixels )
+        max_density = density_grid.max()
+        if max_density > 0.0:
+            density_grid = ( density_grid / max_density ) ** gamma
+        return encode_png_rgba( apply_color_stops( density_grid, color_stops = color_stops ))
+
+    def to_svg_image( self,
+                      blur_sigma_pixels : float = None,
+                      color_stops : List[Tuple] = DEFAULT_COLOR_STOPS,
+                      gamma : float = 0.5 ):
+        """ An SVG <image> element with the embedded PNG covering the view box. """
+        png_bytes = self.to_png_bytes( blur_sigma_pixels = blur_sigma_pixels,
+                                       color_stops = color_stops,
+                                       gamma = gamma )
+        return ( f'<image class="heatmap" x="{self._view_box.x}" y="{self._view_box.y}"'
+                 f' width="{self._view_box.width}" height="{self._view_box.height}"'
+                 ' preserveAspectRatio="none"'
+                 f' href="data:image/png;base64,{base64.b64encode( png_bytes ).decode()}"></image>\n' )
+
+
+def get_gaussian_kernel( sigma : float ):
+    """ Normalized 1D Gaussian kernel extending 3 sigma each side. """
+    radius = max( 1, math.ceil( 3.0 * sigma ))
+    offsets = np.arange( -radius, radius + 1, dtype = np.float64 )
+    kernel = np.exp( -0.5 * ( offsets / sigma ) ** 2 )
+    return kernel / kernel.sum()
+
+
+def convolve_axis( grid : np.ndarray, kernel : np.ndarray, axis : int ):
+    """ Same-size convolution along one axis, treating values beyond the edges as zero. """
+    radius = len(kernel) // 2
+    pad_width = [ ( 0, 0 ), ( 0, 0 ) ]
+    pad_width[axis] = ( radius, radius )
+    padded_grid = np.pad( grid, pad_width )
+    length = grid.shape[axis]
+    result = np.zeros_like( grid )
+    for kernel_idx, weight in enumerate( kernel.tolist() ):
+        if axis == 0:
+            result += weight * padded_grid[kernel_idx:kernel_idx + length, :]
+        else:
+            result += weight * padded_grid[:, kernel_idx:kernel_idx + length]
+        continue
+    return result
+
+
+def apply_color_stops( value_grid : np.ndarray, color_stops : List[Tuple] ):
+    """ Maps values in [ 0, 1 ] to an (H, W, 4) uint8 RGBA image by interpolating between stops. """
+    position_list = [ position for position, _ in color_stops ]
+    rgba_image = np.empty( value_grid.shape + ( 4, ), dtype = np.uint8 )
+    for channel in range( 4 ):
+        channel_values = [ color[channel] for _, color in color_stops ]
+        rgba_image[..., channel] = np.round( np.interp( value_grid, position_list, channel_values ))
+        continue
+    return rgba_image
+
+
+def encode_png_rgba( rgba_image : np.ndarray ):
+    """ PNG file bytes for an (H, W, 4) uint8 RGBA image, using only zlib for compression. """
+    height, width, _ = rgba_image.shape
+    # Each scanline starts with its filter type (0 = none)
+    scanlines = np.zeros( ( height, ( width * 4 ) + 1 ), dtype = np.uint8 )
+    scanlines[:, 1:] = rgba_image.reshape( height, width * 4 )
+
+    def chunk( chunk_type : bytes, data : bytes ):
+        return ( struct.pack( '>I', len(data) ) + chunk_type + data
+                 + struct.pack( '>I', zlib.crc32( chunk_type + data ) & 0xffffffff ))
+
+    return b''.join([
+        b'\x89PNG\r\n\x1a\n',
+        # Bit depth 8, color type 6 (RGBA), default compression, filter and no interlace
+        chunk( b'IHDR', struct.pack( '>IIBBBBB', width, height, 8, 6, 0, 0, 0 )),
+        chunk( b'IDAT', zlib.compress( scanlines.tobytes(), 6 )),
+        chunk( b'IEND', b'' ),
+    ])
@@ -0,0 +1,434 @@
+"""
+Opt-in counters and timing histograms for the projection, routing,
+template and rendering code.
+
+Nothing is instrumented until enable() is called: it wraps the methods in
+INSTRUMENTED_METHOD_LIST with timing versions, and disable() puts the
+originals back, so there is no cost at all while disabled. Metrics are
+accumulated in an Instrumentation instance and can be sent to sinks
+(in memory, logging or Prometheus text format) with flush().
+
+    instrumentation = enable( sink_list = [ PrometheusTextSink( out_fh ) ] )
+    ...
+    instrumentation.flush()
+    disable()
+"""
+import bisect
+import functools
+import inspect
+import logging
+import threading
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .frozen_maps import FrozenCompositeGeoMap, FrozenGeoMap
+from .geo_maps import AlbersMapProjection, CompositeGeoMap, GeoMap
+from .svg_paths import SvgMapTemplate
+from .svg_renderer import SvgMapRenderer
+from .svg_templates import SvgTemplateStore
+
+
+CALLS_METRIC = 'geo_maps_calls_total'
+POINTS_METRIC = 'geo_maps_points_total'
+CALL_SECONDS_METRIC = 'geo_maps_call_seconds'
+ROUTED_POINTS_METRIC = 'geo_maps_routed_points_total'
+DEFAULT_FALLTHROUGH_METRIC = 'geo_maps_default_fallthrough_points_total'
+
+# Histogram bucket upper bounds in seconds: 1, 2.5 and 5 for each decade from 1us to 10s
+DEFAULT_TIME_BUCKETS = [ multiplier * ( 10.0 ** exponent )
+                         for exponent in range( -6, 1 ) for multiplier in ( 1.0, 2.5, 5.0 ) ] + [ 10.0 ]
+
+# ( class, method name, index of the argument (after self) holding the
+# point array for batch methods, or None )
+INSTRUMENTED_METHOD_LIST = [
+    ( AlbersMapProjection, 'x_y_from_deg', None ),
+    ( AlbersMapProjection, 'deg_from_x_y', None ),
+    ( AlbersMapProjection, 'x_y_from_deg_array', 0 ),
+    ( AlbersMapProjection, 'deg_from_x_y_array', 0 ),
+    ( GeoMap, 'long_lat_deg_to_coords', None ),
+    ( GeoMap, 'coords_to_long_lat_deg', None ),
+    ( GeoMap, 'long_lat_deg_to_coords_array', 0 ),
+    ( GeoMap, 'coords_to_long_lat_deg_array', 0 ),
+    ( FrozenGeoMap, 'long_lat_deg_to_coords', None ),
+    ( FrozenGeoMap, 'coords_to_long_lat_deg', None ),
+    ( FrozenGeoMap, 'long_lat_deg_to_coords_array', 0 ),
+    ( FrozenGeoMap, 'coords_to_long_lat_deg_array', 0 ),
+    ( CompositeGeoMap, 'long_lat_deg_to_coords_array', 0 ),
+    ( CompositeGeoMap, 'geo_bounds_to_display_bounds', None ),
+    ( CompositeGeoMap, 'view_box_to_geo_bounds_list', None ),
+    ( FrozenCompositeGeoMap, 'long_lat_deg_to_coords_array', 0 ),
+    ( FrozenCompositeGeoMap, 'geo_bounds_to_display_bounds', None ),
+    ( FrozenCompositeGeoMap, 'view_box_to_geo_bounds_list', None ),
+    ( SvgTemplateStore, '_read_template_bytes', None ),
+    ( SvgTemplateStore, 'write_template', None ),
+    ( SvgMapTemplate, '__init__', None ),
+    ( SvgMapRenderer, 'write_base_map', None ),
+    ( SvgMapRenderer, 'write_template', None ),
+]
+
+# The routing methods also count the points routed to each GeoMap and
+# those that fell through to the default GeoMap.
+ROUTING_METHOD_LIST = [
+    ( CompositeGeoMap, 'get_geo_map_for_point' ),
+    ( CompositeGeoMap, 'get_geo_map_index_array' ),
+    ( FrozenCompositeGeoMap, 'get_geo_map_for_point' ),
+    ( FrozenCompositeGeoMap, 'get_geo_map_index_array' ),
+]
+
+
+class Histogram:
+    """ Counts of observed values in cumulative buckets (as in Prometheus), plus their count and sum. """
+
+    __slots__ = ( 'bucket_bounds', 'bucket_counts', 'count', 'sum' )
+
+    def __init__( self, bucket_bounds : List[float] ):
+        self.bucket_bounds = bucket_bounds
+        # The last count is for values beyond the last bound
+        self.bucket_counts = [ 0 ] * ( len(bucket_bounds) + 1 )
+        self.count = 0
+        self.sum = 0.0
+        return
+
+    def observe( self, value : float ):
+        self.bucket_counts[bisect.bisect_left( self.bucket_bounds, value )] += 1
+        self.count += 1
+        self.sum += value
+        return
+
+    def get_cumulative_buckets(self):
+        """ List of ( upper bound, count of values <= bound ), ending with ( inf, count ). """
+        cumulative_count_list = np.cumsum( self.bucket_counts ).tolist()
+        return list( zip( self.bucket_bounds + [ float('inf') ], cumulative_count_list ))
+
+
+class Instrumentation:
+    """
+    Counters and histograms keyed by metric name and a tuple of ( label
+    name, label value ) pairs. Thread safe.
+    """
+
+    def __init__( self, sink_list : List = None, time_buckets : List[float] = DEFAULT_TIME_BUCKETS ):
+        self._sink_list = list( sink_list or [] )
+        self._time_buckets = list( time_buckets )
+        self._counter_dict = dict()
+        self._histogram_dict = dict()
+        self._lock = threading.Lock()
+        return
+
+    @property
+    def sink_list(self):
+        return self._sink_list
+
+    def add_sink( self, sink ):
+        self._sink_list.append( sink )
+        return
+
+    def increment( self, name : str, labels : Tuple = (), value : float = 1 ):
+        key = ( name, labels )
+        with self._lock:
+            self._counter_dict[key] = self._counter_dict.get( key, 0 ) + value
+        return
+
+    def observe( self, name : str, value : float, labels : Tuple = () ):
+        key = ( name, labels )
+        with self._lock:
+            histogram = self._histogram_dict.get( key )
+            if histogram is None:
+                histogram = self._histogram_dict[key] = Histogram( self._time_buckets )
+            histogram.observe( value )
+        return
+
+    def record_call( self, function_name : str, seconds : float, point_count : int = 1 ):
+        labels = ( ( 'function', function_name ), )
+        key = ( CALL_SECONDS_METRIC, labels )
+        with self._lock:
+            histogram = self._histogram_dict.get( key )
+            if histogram is None:
+                histogram = self._histogram_dict[key] = Histogram( self._time_buckets )
+            histogram.observe( seconds )
+            for counter_key, value in ( ( ( CALLS_METRIC, labels ), 1 ), ( ( POINTS_METRIC, labels ), point_count ) ):
+                self._counter_dict[counter_key] = self._counter_dict.get( counter_key, 0 ) + value
+                continue
+        return
+
+    def record_routing( self, map_id, geo_map_index_array : np.ndarray, fallthrough_count : int ):
+        count_list = np.bincount( np.asarray( geo_map_index_array, dtype = np.int64 ).ravel() ).tolist()
+        with self._lock:
+            for geo_map_index, count in enumerate( count_list ):
+                if count:
+                    key = ( ROUTED_POINTS_METRIC, ( ( 'map_id', str( map_id )), ( 'geo_map_index', str( geo_map_index )) ))
+                    self._counter_dict[key] = self._counter_dict.get( key, 0 ) + count
+                continue
+            key = ( DEFAULT_FALLTHROUGH_METRIC, ( ( 'map_id', str( map_id )), ))
+            self._counter_dict[key] = self._counter_dict.get( key, 0 ) + fallthrough_count
+        return
+
+    def get_counter( self, name : str, labels : Tuple = () ):
+        return self._counter_dict.get( ( name, labels ), 0 )
+
+    def get_histogram( self, name : str, labels : Tuple = () ):
+        return self._histogram_dict.get( ( name, labels ))
+
+    def get_routing_stats( self, map_id ):
+        """
+        For a composite map: the points routed to each GeoMap (by index),
+        the number that fell through to the default GeoMap (outside all
+        the GeoMap bounds) and the fraction of points that did.
+        """
+        map_id_label = ( 'map_id', str( map_id ))
+        routed_count_dict = dict()
+        with self._lock:
+            for ( name, labels ), value in self._counter_dict.items():
+                if ( name == ROUTED_POINTS_METRIC ) and ( labels[0] == map_id_label ):
+                    routed_count_dict[int( labels[1][1] )] = value
+                continue
+            fallthrough_count = self._counter_dict.get( ( DEFAULT_FALLTHROUGH_METRIC, ( map_id_label, )), 0 )
+        total_count = sum( routed_count_dict.values() )
+        return {
+            'routed_count_dict': routed_count_dict,
+            'fallthrough_count': fallthrough_count,
+            'fallthrough_rate': ( fallthrough_count / total_count ) if total_count else 0.0,
+        }
+
+    def get_snapshot(self):
+        """ Copy of the current values: { 'counters': { key: value }, 'histograms': { key: Histogram } }. """
+        with self._lock:
+            histogram_dict = dict()
+            for key, histogram in self._histogram_dict.items():
+                histogram_copy = Histogram( histogram.bucket_bounds )
+                histogram_copy.bucket_counts = list( histogram.bucket_counts )
+                histogram_copy.count = histogram.count
+                histogram_copy.sum = histogram.sum
+                histogram_dict[key] = histogram_copy
+                continue
+            return { 'counters': dict( self._counter_dict ), 'histograms': histogram_dict }
+
+    def reset(self):
+        with self._lock:
+            self._counter_dict.clear()
+            self._histogram_dict.clear()
+        return
+
+    def flush(self):
+        """ Sends a snapshot to each of the sinks. """
+        snapshot = self.get_snapshot()
+        for sink in self._sink_list:
+            sink.emit( snapshot )
+            continue
+        return
+
+
+class InMemorySink:
+    """ Keeps the most recent snapshots (all if max_snapshots is None). """
+
+    def __init__( self, max_snapshots : int = 1 ):
+        self._max_snapshots = max_snapshots
+        self._snapshot_list = list()
+        return
+
+    @property
+    def snapshot_list(self):
+        return self._snapshot_list
+
+    @property
+    def snapshot(self):
+        return self._snapshot_list[-1] if self._snapshot_list else None
+
+    def emit( self, snapshot : Dict ):
+        self._snapshot_list.append( snapshot )
+        if self._max_snapshots is not None:
+            del self._snapshot_list[:-self._max_snapshots]
+        return
+
+
+class LoggingSink:
+    """ Logs a line per counter and per histogram (count, sum and mean). """
+
+    def __init__( self, logger : logging.Logger = None, level : int = logging.INFO ):
+        self._logger = logger or logging.getLogger( __name__ )
+        self._level = level
+        return
+
+    def emit( self, snapshot : Dict ):
+        if not self._logger.isEnabledFor( self._level ):
+            return
+        for ( name, labels ), value in sorted( snapshot['counters'].items() ):
+            self._logger.log( self._level, '%s%s = %s', name, _format_labels( labels ), value )
+            continue
+        for ( name, labels ), histogram in sorted( snapshot['histograms'].items(), key = lambda item: item[0] ):
+            mean = ( histogram.sum / histogram.count ) if histogram.count else 0.0
+            self._logger.log( self._level, '%s%s count = %d, sum = %.6f, mean = %.9f',
+                              name, _format_labels( labels ), histogram.count, histogram.sum, mean )
+            continue
+        return
+
+
+class PrometheusTextSink:
+    """ Writes the snapshot in the Prometheus text exposition format to a text file object (if given). """
+
+    def __init__( self, out_fh = None ):
+        self._out_fh = out_fh
+        self._text = ''
+        return
+
+    @property
+    def text(self):
+        """ The text for the last snapshot. """
+        return self._text
+
+    def emit( self, snapshot : Dict ):
+        self._text = get_prometheus_text( snapshot )
+        if self._out_fh is not None:
+            self._out_fh.write( self._text )
+        return
+
+
+def _format_labels( labels : Tuple, extra_labels : Tuple = () ):
+    labels = labels + extra_labels
+    if not labels:
+        return ''
+    label_text = ','.join( '%s="%s"' % ( name, str( value ).replace( '\\', '\\\\' ).replace( '"', '\\"' ))
+                           for name, value in labels )
+    return '{' + label_text + '}'
+
+
+def get_prometheus_text( snapshot : Dict ):
+    line_list = list()
+    counter_dict = snapshot['counters']
+    for name in sorted({ name for name, _ in counter_dict }):
+        line_list.append( f'# TYPE {name} counter' )
+        for ( counter_name, labels ), value in sorted( counter_dict.items() ):
+            if counter_name == name:
+                line_list.append( f'{name}{_format_labels( labels )} {value}' )
+            continue
+        continue
+
+    histogram_dict = snapshot['histograms']
+    for name in sorted({ name for name, _ in histogram_dict }):
+        line_list.append( f'# TYPE {name} histogram' )
+        for ( histogram_name, labels ), histogram in sorted( histogram_dict.items(), key = lambda item: item[0] ):
+            if histogram_name != name:
+                continue
+            for bound, count in histogram.get_cumulative_buckets():
+                bound_text = '+Inf' if bound == float('inf') else repr( bound )
+                line_list.append( f'{name}_bucket{_format_labels( labels, ( ( "le", bound_text ), ))} {count}' )
+                continue
+            line_list.append( f'{name}_sum{_format_labels( labels )} {histogram.sum!r}' )
+            line_list.append( f'{name}_count{_format_labels( labels )} {histogram.count}' )
+            continue
+        continue
+    return '\n'.join( line_list ) + '\n'
+
+
+# The enabled Instrumentation, and the methods replaced by enable() so that
+# disable() can restore them.
+_instrumentation = None
+_original_method_list = list()
+_enable_lock = threading.Lock()
+
+
+def get_instrumentation():
+    """ The enabled Instrumentation, or None when disabled. """
+    return _instrumentation
+
+
+def is_enabled():
+    return _instrumentation is not None
+
+
+def enable( instrumentation : Instrumentation = None, sink_list : List = None ):
+    """ Starts recording into the given (or a new) Instrumentation, which is returned. """
+    global _instrumentation
+    with _enable_lock:
+        if _instrumentation is not None:
+            _restore_methods()
+        if instrumentation is None:
+            instrumentation = Instrumentation( sink_list = sink_list )
+        _instrumentation = instrumentation
+
+        for cls, method_name, point_arg_idx in INSTRUMENTED_METHOD_LIST:
+            original_method = cls.__dict__[method_name]
+            _original_method_list.append( ( cls, method_name, original_method ))
+            setattr( cls, method_name, _get_timed_method( instrumentation, original_method,
+                                                          f'{cls.__name__}.{method_name}', point_arg_idx ))
+            continue
+        for cls, method_name in ROUTING_METHOD_LIST:
+            original_method = cls.__dict__[method_name]
+            _original_method_list.append( ( cls, method_name, original_method ))
+            setattr( cls, method_name, _get_routing_method( instrumentation, original_method,
+                                                            f'{cls.__name__}.{method_name}' ))
+            continue
+    return instrumentation
+
+
+def disable():
+    """ Restores the uninstrumented methods. Returns the Instrumentation that was enabled (or None). """
+    global _instrumentation
+    with _enable_lock:
+        instrumentation = _instrumentation
+        _restore_methods()
+        _instrumentation = None
+    return instrumentation
+
+
+def _restore_methods():
+    while _original_method_list:
+        cls, method_name, original_method = _original_method_list.pop()
+        setattr( cls, method_name, original_method )
+        continue
+    return
+
+
+def _get_timed_method( instrumentation : Instrumentation, method, function_name : str, point_arg_idx : int ):
+    point_arg_name = None
+    if point_arg_idx is not None:
+        # Skipping self
+        point_arg_name = list( inspect.signature( method ).parameters )[point_arg_idx + 1]
+
+    @functools.wraps( method )
+    def timed_method( self, *args, **kwargs ):
+        start_time = time.perf_counter()
+        result = method( self, *args, **kwargs )
+        seconds = time.perf_counter() - start_time
+        point_count = 1
+        if point_arg_idx is not None:
+            point_array = args[point_arg_idx] if len(args) > point_arg_idx else kwargs[point_arg_name]
+            point_count = np.size( point_array )
+        instrumentation.record_call( function_name, seconds, point_count = point_count )
+        return result
+
+    return timed_method
+
+
+def _get_routing_method( instrumentation : Instrumentation, method, function_name : str ):
+    is_batch = function_name.endswith( '_array' )
+
+    @functools.wraps( method )
+    def routing_method( self, longitude_deg, latitude_deg ):
+        start_time = time.perf_counter()
+        result = method( self, longitude_deg, latitude_deg )
+        seconds = time.perf_counter() - start_time
+
+        if is_batch:
+            geo_map_index_array = result
+            is_default_array = ( geo_map_index_array == 0 )
+            fallthrough_count = 0
+            if is_default_array.any():
+                is_in_default_array = self._geo_bounds_array.contains_point(
+                    np.ravel( longitude_deg )[is_default_array],
+                    np.ravel( latitude_deg )[is_default_array] )[:, 0]
+                fallthrough_count = int( is_default_array.sum() - np.count_nonzero( is_in_default_array ))
+            point_count = len(geo_map_index_array)
+        else:
+            geo_map_index_array = [ next( idx for idx, geo_map in enumerate( self.geo_map_list ) if geo_map is result ) ]
+            fallthrough_count = int( ( geo_map_index_array[0] == 0 )
+                                     and not result.geo_bounds.contains_point( longitude_deg, latitude_deg ))
+            point_count = 1
+
+        instrumentation.record_call( function_name, seconds, point_count = point_count )
+        instrumentation.record_routing( self.map_id, geo_map_index_array, fallthrough_count )
+        return result
+
+    return routing_method
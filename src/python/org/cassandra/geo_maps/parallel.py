@@ -0,0 +1,177 @@
+import concurrent.futures
+from multiprocessing import shared_memory
+import os
+from typing import List
+
+import numpy as np
+
+from .geo_maps import CompositeGeoMap
+from .svg_paths import DEFAULT_LOD_TOLERANCE_LIST, SvgMapTemplate
+
+
+DEFAULT_MIN_SHARD_SIZE = 100000
+
+# Columns of the shared memory block used for a projection job, each with
+# one 8 byte value per point.
+_SHARED_COLUMN_LIST = [ ( 'longitude', np.float64 ),
+                        ( 'latitude', np.float64 ),
+                        ( 'x', np.float64 ),
+                        ( 'y', np.float64 ),
+                        ( 'geo_map_index', np.int64 ) ]
+
+# Set in each worker process by the pool initializer
+_worker_composite_map = None
+
+
+def _initialize_worker( composite_map : CompositeGeoMap ):
+    global _worker_composite_map
+    _worker_composite_map = composite_map
+    return
+
+
+def _get_shared_columns( buffer, point_count : int ):
+    """ Column name -> array view of the shared memory block. """
+    column_dict = dict()
+    for column_idx, ( column_name, dtype ) in enumerate( _SHARED_COLUMN_LIST ):
+        column_dict[column_name] = np.ndarray( ( point_count, ), dtype = dtype, buffer = buffer,
+                                               offset = column_idx * point_count * 8 )
+        continue
+    return column_dict
+
+
+def _close_block( block : shared_memory.SharedMemory ):
+    """
+    Closes the block, unless array views of it are still alive (e.g., held
+    by the frames of an exception being raised), in which case the memory
+    is released once they are garbage collected instead.
+    """
+    try:
+        block.close()
+    except BufferError:
+        pass
+    return
+
+
+def _project_shard( shared_memory_name : str, point_count : int, start : int, stop : int ):
+    """ Worker: projects points [ start, stop ) of the shared block in place. """
+    block = shared_memory.SharedMemory( name = shared_memory_name )
+    column_dict, longitude_array, latitude_array = None, None, None
+    try:
+        column_dict = _get_shared_columns( block.buf, point_count )
+        longitude_array = column_dict['longitude'][start:stop]
+        latitude_array = column_dict['latitude'][start:stop]
+        geo_map_index_array = _worker_composite_map.get_geo_map_index_array( longitude_deg = longitude_array,
+                                                                             latitude_deg = latitude_array )
+        x_array, y_array = _worker_composite_map.long_lat_deg_to_coords_array(
+            longitude_deg = longitude_array,
+            latitude_deg = latitude_array,
+            geo_map_index_array = geo_map_index_array,
+        )
+        column_dict['geo_map_index'][start:stop] = geo_map_index_array
+        column_dict['x'][start:stop] = x_array
+        column_dict['y'][start:stop] = y_array
+    finally:
+        # The views must be gone before the block can be closed
+        column_dict, longitude_array, latitude_array = None, None, None
+        _close_block( block )
+    return
+
+
+class ParallelMapExecutor:
+    """
+    A process pool for projecting large point arrays through a
+    CompositeGeoMap and for the per-path simplification of map templates.
+
+    The composite map is sent to each worker once when the pool starts.
+    Point arrays are split into shards and exchanged through a shared
+    memory block, so only the block name and shard range are pickled per
+    task. Use as a context manager or call shutdown() when done.
+    """
+
+    def __init__( self,
+                  composite_map : CompositeGeoMap,
+                  max_workers : int = None,
+                  min_shard_size : int = DEFAULT_MIN_SHARD_SIZE ):
+        self._composite_map = composite_map
+        self._max_workers = max_workers or os.cpu_count() or 1
+        self._min_shard_size = min_shard_size
+        self._executor = concurrent.futures.ProcessPoolExecutor( max_workers = self._max_workers,
+                                                                 initializer = _initialize_worker,
+                                                                 initargs = ( composite_map, ))
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__( self, exc_type, exc_value, traceback ):
+        self.shutdown()
+        return False
+
+    @property
+    def executor(self):
+        return self._executor
+
+    @property
+    def max_workers(self):
+        return self._max_workers
+
+    def shutdown(self):
+        self._executor.shutdown()
+        return
+
+    def get_shard_list( self, point_count : int ):
+        """ ( start, stop ) ranges: one per worker, but none smaller than min_shard_size. """
+        shard_count = max( 1, min( self._max_workers, point_count // max( 1, self._min_shard_size )))
+        boundaries = np.linspace( 0, point_count, shard_count + 1 ).astype( np.int64 ).tolist()
+        return list( zip( boundaries[:-1], boundaries[1:] ))
+
+    def project( self, longitude_deg : np.ndarray, latitude_deg : np.ndarray ):
+        """
+        Same as the composite map's get_geo_map_index_array() and
+        long_lat_deg_to_coords_array() together. Returns the tuple
+        ( x_array, y_array, geo_map_index_array ). Inputs too small to be
+        worth sharding are projected in this process.
+        """
+        longitude_deg = np.asarray( longitude_deg, dtype = np.float64 ).ravel()
+        latitude_deg = np.asarray( latitude_deg, dtype = np.float64 ).ravel()
+        if longitude_deg.shape != latitude_deg.shape:
+            raise ValueError( f'Longitude and latitude sizes differ: {longitude_deg.size} != {latitude_deg.size}' )
+
+        point_count = longitude_deg.size
+        shard_list = self.get_shard_list( point_count )
+        if len(shard_list) == 1:
+            geo_map_index_array = self._composite_map.get_geo_map_index_array( longitude_deg = longitude_deg,
+                                                                               latitude_deg = latitude_deg )
+            x_array, y_array = self._composite_map.long_lat_deg_to_coords_array(
+                longitude_deg = longitude_deg,
+                latitude_deg = latitude_deg,
+                geo_map_index_array = geo_map_index_array,
+            )
+            return ( x_array, y_array, geo_map_index_array )
+
+        block = shared_memory.SharedMemory( create = True, size = len(_SHARED_COLUMN_LIST) * point_count * 8 )
+        column_dict = None
+        try:
+            column_dict = _get_shared_columns( block.buf, point_count )
+            column_dict['longitude'][:] = longitude_deg
+            column_dict['latitude'][:] = latitude_deg
+            future_list = [ self._executor.submit( _project_shard, block.name, point_count, start, stop )
+                            for start, stop in shard_list ]
+            for future in future_list:
+                future.result()
+                continue
+            result = ( column_dict['x'].copy(), column_dict['y'].copy(), column_dict['geo_map_index'].copy() )
+        finally:
+            # Released before closing, so an exception raised above is not masked by a BufferError
+            column_dict = None
+            _close_block( block )
+            block.unlink()
+        return result
+
+    def parse_map_template( self,
+                            template_bytes : bytes,
+                            lod_tolerance_list : List[float] = DEFAULT_LOD_TOLERANCE_LIST ):
+        """ An SvgMapTemplate with the per-path simplification spread over the pool. """
+        return SvgMapTemplate( template_bytes = template_bytes,
+                               lod_tolerance_list = lod_tolerance_list,
+                               executor = self._executor )
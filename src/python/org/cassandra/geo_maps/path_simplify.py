@@ -0,0 +1,76 @@
+import numpy as np
+
+
+def get_segment_distances( points : np.ndarray, start : np.ndarray, end : np.ndarray ):
+    """ Distance from each of the (N, 2) points to the line segment from start to end. """
+    segment = end - start
+    segment_length_squared = float( segment.dot( segment ))
+    offsets = points - start
+    if segment_length_squared == 0.0:
+        return np.hypot( offsets[:, 0], offsets[:, 1] )
+    fraction = np.clip( offsets.dot( segment ) / segment_length_squared, 0.0, 1.0 )
+    nearest_offsets = offsets - ( fraction[:, np.newaxis] * segment )
+    return np.hypot( nearest_offsets[:, 0], nearest_offsets[:, 1] )
+
+
+def get_douglas_peucker_mask( points : np.ndarray, tolerance : float ):
+    """
+    Boolean mask of the (N, 2) points kept by Douglas-Peucker
+    simplification: no removed point is further than tolerance from the
+    simplified line. The first and last points are always kept.
+    """
+    point_count = len(points)
+    keep_mask = np.zeros( point_count, dtype = bool )
+    if point_count == 0:
+        return keep_mask
+    keep_mask[0] = True
+    keep_mask[-1] = True
+
+    pending_ranges = [ ( 0, point_count - 1 ) ]
+    while pending_ranges:
+        start_idx, end_idx = pending_ranges.pop()
+        if ( end_idx - start_idx ) < 2:
+            continue
+        distances = get_segment_distances( points[start_idx + 1:end_idx],
+                                           points[start_idx],
+                                           points[end_idx] )
+        max_idx = int( np.argmax( distances ))
+        if distances[max_idx] <= tolerance:
+            continue
+        split_idx = start_idx + 1 + max_idx
+        keep_mask[split_idx] = True
+        pending_ranges.append( ( start_idx, split_idx ) )
+        pending_ranges.append( ( split_idx, end_idx ) )
+        continue
+
+    return keep_mask
+
+
+def simplify_douglas_peucker( points : np.ndarray, tolerance : float ):
+    """ The (N, 2) points reduced by Douglas-Peucker simplification. """
+    points = np.asarray( points, dtype = np.float64 )
+    if tolerance <= 0.0 or len(points) < 3:
+        return points
+    return points[get_douglas_peucker_mask( points, tolerance )]
+
+
+def simplify_ring( ring : np.ndarray, tolerance : float ):
+    """
+    Simplifies a closed ring (first point repeated as the last). Returns
+    None if the ring collapses to something smaller than a triangle at
+    this tolerance.
+    """
+    if len(ring) < 4:
+        return None
+    # Splitting at the point furthest from the start avoids the degenerate
+    # zero length segment from the start point back to itself.
+    offsets = ring - ring[0]
+    split_idx = int( np.argmax( np.hypot( offsets[:, 0], offsets[:, 1] )))
+    if split_idx == 0:
+        return None
+    first_half = simplify_douglas_peucker( ring[:split_idx + 1], tolerance )
+    second_half = simplify_douglas_peucker( ring[split_idx:], tolerance )
+    simplified_ring = np.concatenate([ first_half, second_half[1:] ])
+    if len(simplified_ring) < 4:
+        return None
+    return simplified_ring
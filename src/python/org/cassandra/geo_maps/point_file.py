@@ -0,0 +1,294 @@
+import hashlib
+import json
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+from .geo_maps import CompositeGeoMap, GeoMap
+
+
+MAGIC = b'GEOPTS01'
+FORMAT_VERSION = 1
+
+# Column data starts are aligned to this many bytes
+ALIGNMENT = 64
+
+COORDINATE_COLUMN_LIST = [ 'longitude', 'latitude', 'x', 'y' ]
+GEO_MAP_INDEX_COLUMN = 'geo_map_index'
+GEO_MAP_INDEX_DTYPE = np.dtype( np.uint8 )
+
+
+def get_geo_map_signature( geo_map : GeoMap ):
+    """ All the values that determine where a GeoMap puts a long/lat point on the SVG. """
+    projection = geo_map.projection
+    return {
+        'projection': {
+            'reference_longitude_deg': projection.reference_longitude_deg,
+            'reference_latitude_deg': projection.reference_latitude_deg,
+            'standard_parallel_1_deg': projection.standard_parallel_1_deg,
+            'standard_parallel_2_deg': projection.standard_parallel_2_deg,
+            'radius_miles': projection.radius_miles,
+            'n': projection.n,
+            'C': projection.C,
+            'rho_0': projection.rho_0,
+        },
+        'geo_bounds': [ geo_map.geo_bounds.longitude_min, geo_map.geo_bounds.longitude_max,
+                        geo_map.geo_bounds.latitude_min, geo_map.geo_bounds.latitude_max ],
+        'svg_template_name': geo_map.svg_template_name,
+        'view_box': [ geo_map.view_box.x, geo_map.view_box.y,
+                      geo_map.view_box.width, geo_map.view_box.height ],
+        'display_x_offset': geo_map.display_x_offset,
+        'display_y_offset': geo_map.display_y_offset,
+        'display_x_scale': geo_map.display_x_scale,
+        'display_y_scale': geo_map.display_y_scale,
+        'rotation_angle_deg': geo_map.rotation_angle_deg,
+        'calibration_points': [ list( x ) for x in geo_map.calibration_points or [] ],
+    }
+
+
+def get_composite_map_signature( composite_map : CompositeGeoMap ):
+    return {
+        'map_id': composite_map.map_id,
+        'geo_map_list': [ get_geo_map_signature( geo_map ) for geo_map in composite_map.geo_map_list ],
+    }
+
+
+def get_signature_digest( signature : dict ):
+    return hashlib.sha256( json.dumps( signature, sort_keys = True ).encode() ).hexdigest()
+
+
+def _align( offset : int ):
+    return ( ( offset + ALIGNMENT - 1 ) // ALIGNMENT ) * ALIGNMENT
+
+
+def _get_column_layout( header_end : int, point_count : int, coordinate_dtype : np.dtype ):
+    """ Column name -> ( dtype, byte offset ) for the column data following the header. """
+    column_layout = dict()
+    offset = _align( header_end )
+    for column_name in COORDINATE_COLUMN_LIST:
+        column_layout[column_name] = ( coordinate_dtype, offset )
+        offset = _align( offset + ( point_count * coordinate_dtype.itemsize ))
+        continue
+    column_layout[GEO_MAP_INDEX_COLUMN] = ( GEO_MAP_INDEX_DTYPE, offset )
+    return column_layout
+
+
+def _write_header( out_fh, composite_map : CompositeGeoMap, point_count : int, coordinate_dtype : np.dtype ):
+    """
+    File layout: magic, header length (uint32 little endian), JSON header,
+    then the column data, each column aligned. Returns the column layout.
+    """
+    signature = get_composite_map_signature( composite_map )
+    header = {
+        'version': FORMAT_VERSION,
+        'point_count': point_count,
+        'coordinate_dtype': coordinate_dtype.str,
+        'signature': signature,
+        'signature_digest': get_signature_digest( signature ),
+    }
+    header_bytes = json.dumps( header, sort_keys = True ).encode()
+    header_end = len(MAGIC) + 4 + len(header_bytes)
+    out_fh.write( MAGIC )
+    out_fh.write( struct.pack( '<I', len(header_bytes) ))
+    out_fh.write( header_bytes )
+    return _get_column_layout( header_end, point_count, coordinate_dtype )
+
+
+def write_point_file( filename : str,
+                      composite_map : CompositeGeoMap,
+                      longitude_deg : np.ndarray,
+                      latitude_deg : np.ndarray,
+                      x : np.ndarray = None,
+                      y : np.ndarray = None,
+                      geo_map_index_array : np.ndarray = None,
+                      coordinate_dtype = np.float64 ):
+    """
+    Writes the points (projecting them if x, y or the sub-map index are not
+    given) to a point file. The file is written under a temporary name and
+    renamed, so readers never see a partial file.
+    """
+    longitude_deg = np.asarray( longitude_deg, dtype = np.float64 )
+    latitude_deg = np.asarray( latitude_deg, dtype = np.float64 )
+    if geo_map_index_array is None:
+        geo_map_index_array = composite_map.get_geo_map_index_array( longitude_deg = longitude_deg,
+                                                                     latitude_deg = latitude_deg )
+    if ( x is None ) or ( y is None ):
+        x, y = composite_map.long_lat_deg_to_coords_array( longitude_deg = longitude_deg,
+                                                           latitude_deg = latitude_deg,
+                                                           geo_map_index_array = geo_map_index_array )
+    writer = PointFileWriter( filename = filename,
+                              composite_map = composite_map,
+                              coordinate_dtype = coordinate_dtype )
+    writer.write_chunk( longitude_deg, latitude_deg, x, y, geo_map_index_array )
+    writer.close()
+    return
+
+
+class PointFileWriter:
+    """
+    Writes a point file from chunks of points (e.g., the ProjectedChunk of
+    point_reader.StreamingProjector) when the total count is not known up
+    front. Columns are spooled to temporary files and assembled on close().
+    """
+
+    def __init__( self,
+                  filename : str,
+                  composite_map : CompositeGeoMap,
+                  coordinate_dtype = np.float64 ):
+        self._filename = filename
+        self._composite_map = composite_map
+        self._coordinate_dtype = np.dtype( coordinate_dtype )
+        self._point_count = 0
+        self._spool_fh_dict = { column_name: tempfile.TemporaryFile()
+                                for column_name in COORDINATE_COLUMN_LIST + [ GEO_MAP_INDEX_COLUMN ] }
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__( self, exc_type, exc_value, traceback ):
+        if exc_type is None:
+            self.close()
+        else:
+            self._close_spool_files()
+        return False
+
+    def write_projected_chunk( self, projected_chunk ):
+        self.write_chunk( projected_chunk.longitude_array,
+                          projected_chunk.latitude_array,
+                          projected_chunk.x_array,
+                          projected_chunk.y_array,
+                          projected_chunk.geo_map_index_array )
+        return
+
+    def write_chunk( self, longitude_deg, latitude_deg, x, y, geo_map_index_array ):
+        for column_name, column_array in zip( COORDINATE_COLUMN_LIST, [ longitude_deg, latitude_deg, x, y ] ):
+            self._spool_fh_dict[column_name].write(
+                np.ascontiguousarray( column_array, dtype = self._coordinate_dtype ).tobytes() )
+            continue
+        self._spool_fh_dict[GEO_MAP_INDEX_COLUMN].write(
+            np.ascontiguousarray( geo_map_index_array, dtype = GEO_MAP_INDEX_DTYPE ).tobytes() )
+        self._point_count += len(longitude_deg)
+        return
+
+    def close(self):
+        temp_filename = f'{self._filename}.tmp{os.getpid()}'
+        try:
+            with open( temp_filename, 'wb' ) as out_fh:
+                column_layout = _write_header( out_fh = out_fh,
+                                               composite_map = self._composite_map,
+                                               point_count = self._point_count,
+                                               coordinate_dtype = self._coordinate_dtype )
+                for column_name, ( _, offset ) in column_layout.items():
+                    out_fh.write( b'\0' * ( offset - out_fh.tell() ))
+                    spool_fh = self._spool_fh_dict[column_name]
+                    spool_fh.seek( 0 )
+                    while True:
+                        data = spool_fh.read( 1 << 20 )
+                        if not data:
+                            break
+                        out_fh.write( data )
+                        continue
+                    continue
+            os.replace( temp_filename, self._filename )
+        finally:
+            self._close_spool_files()
+            if os.path.exists( temp_filename ):
+                os.remove( temp_filename )
+        return
+
+    def _close_spool_files(self):
+        for spool_fh in self._spool_fh_dict.values():
+            spool_fh.close()
+            continue
+        return
+
+
+class PointFile:
+    """
+    Read-only view of a point file. The columns are numpy.memmap arrays
+    over the file, so nothing is copied or re-projected until used.
+    """
+
+    def __init__( self, filename : str ):
+        self._filename = filename
+        with open( filename, 'rb' ) as in_fh:
+            if in_fh.read( len(MAGIC) ) != MAGIC:
+                raise ValueError( f'Not a point file: {filename}' )
+            header_length, = struct.unpack( '<I', in_fh.read( 4 ))
+            self._header = json.loads( in_fh.read( header_length ).decode() )
+        if self._header.get( 'version' ) != FORMAT_VERSION:
+            raise ValueError( f'Unsupported point file version {self._header.get( "version" )}: {filename}' )
+
+        self._point_count = self._header['point_count']
+        column_layout = _get_column_layout( len(MAGIC) + 4 + header_length,
+                                            self._point_count,
+                                            np.dtype( self._header['coordinate_dtype'] ))
+        self._column_dict = dict()
+        for column_name, ( dtype, offset ) in column_layout.items():
+            if self._point_count == 0:
+                self._column_dict[column_name] = np.empty( 0, dtype = dtype )
+            else:
+                self._column_dict[column_name] = np.memmap( filename, dtype = dtype, mode = 'r',
+                                                            offset = offset, shape = ( self._point_count, ))
+            continue
+        return
+
+    def __len__(self):
+        return self._point_count
+
+    @property
+    def filename(self):
+        return self._filename
+
+    @property
+    def signature(self):
+        return self._header['signature']
+
+    @property
+    def signature_digest(self):
+        return self._header['signature_digest']
+
+    @property
+    def longitude_array(self):
+        return self._column_dict['longitude']
+
+    @property
+    def latitude_array(self):
+        return self._column_dict['latitude']
+
+    @property
+    def x_array(self):
+        return self._column_dict['x']
+
+    @property
+    def y_array(self):
+        return self._column_dict['y']
+
+    @property
+    def geo_map_index_array(self):
+        return self._column_dict[GEO_MAP_INDEX_COLUMN]
+
+    def is_valid_for( self, composite_map : CompositeGeoMap ):
+        """ Whether the file was written with the same map parameters as the given map has now. """
+        signature_digest = get_signature_digest( get_composite_map_signature( composite_map ))
+        return signature_digest == self.signature_digest
+
+
+def load_point_file( filename : str, composite_map : CompositeGeoMap, remove_stale : bool = True ):
+    """
+    The PointFile if it exists and matches the current composite map
+    parameters, otherwise None (and, if remove_stale, a stale file is
+    deleted) so the caller knows to re-project and re-write it.
+    """
+    if not os.path.exists( filename ):
+        return None
+    point_file = PointFile( filename )
+    if point_file.is_valid_for( composite_map ):
+        return point_file
+    del point_file
+    if remove_stale:
+        os.remove( filename )
+    return None
@@ -0,0 +1,270 @@
+import numpy as np
+
+from .geo_maps import CompositeGeoMap
+from .view_box import ViewBox
+
+
+class QuadTreeNode:
+    """ A square region of SVG display space holding point ids (leaf) or four children. """
+
+    __slots__ = ( 'x_min', 'y_min', 'size', 'depth', 'point_ids', 'children', 'count' )
+
+    def __init__( self, x_min : float, y_min : float, size : float, depth : int ):
+        self.x_min = x_min
+        self.y_min = y_min
+        self.size = size
+        self.depth = depth
+        self.point_ids = np.empty( 0, dtype = np.int64 )
+        self.children = None
+        self.count = 0
+        return
+
+    @property
+    def x_max(self):
+        return self.x_min + self.size
+
+    @property
+    def y_max(self):
+        return self.y_min + self.size
+
+    @property
+    def is_leaf(self):
+        return self.children is None
+
+    def get_child_index_array( self, x : np.ndarray, y : np.ndarray ):
+        """ Children are ordered: upper left, upper right, lower left, lower right. """
+        half_size = self.size / 2.0
+        return ( ( x >= self.x_min + half_size ).astype( np.int64 )
+                 + ( 2 * ( y >= self.y_min + half_size ).astype( np.int64 )))
+
+
+class ProjectedPointIndex:
+    """
+    Geo points projected once onto the map of a CompositeGeoMap and held
+    in a quadtree over SVG display space, so that finding the points in a
+    ViewBox only visits the parts of the tree overlapping the view box.
+    Each point gets an integer id when added, which is used for removing it.
+    """
+
+    def __init__( self,
+                  composite_map : CompositeGeoMap,
+                  max_leaf_points : int = 64,
+                  max_depth : int = 24 ):
+
+        self._composite_map = composite_map
+        self._max_leaf_points = max_leaf_points
+        self._max_depth = max_depth
+
+        # Columns indexed by point id. Removed points are flagged as not alive.
+        self._capacity = 0
+        self._point_count = 0
+        self._longitude_array = np.empty( 0, dtype = np.float64 )
+        self._latitude_array = np.empty( 0, dtype = np.float64 )
+        self._x_array = np.empty( 0, dtype = np.float64 )
+        self._y_array = np.empty( 0, dtype = np.float64 )
+        self._is_alive_array = np.empty( 0, dtype = bool )
+
+        view_box = composite_map.default_view_box
+        self._root = QuadTreeNode( x_min = view_box.min_x,
+                                   y_min = view_box.min_y,
+                                   size = max( view_box.width, view_box.height ),
+                                   depth = 0 )
+        return
+
+    def __len__(self):
+        return self._root.count
+
+    def add_points( self, longitude_deg : np.ndarray, latitude_deg : np.ndarray ):
+        """
+        Projects and adds the points, returning the array of their ids.
+        Points that do not project to finite coordinates (e.g., NaN
+        longitudes) still get ids, but are not indexed, so are never found
+        or counted, as if already removed.
+        """
+        longitude_deg = np.atleast_1d( np.asarray( longitude_deg, dtype = np.float64 ))
+        latitude_deg = np.atleast_1d( np.asarray( latitude_deg, dtype = np.float64 ))
+        x_array, y_array = self._composite_map.long_lat_deg_to_coords_array( longitude_deg = longitude_deg,
+                                                                             latitude_deg = latitude_deg )
+        point_ids = self._append_columns( longitude_deg, latitude_deg, x_array, y_array )
+
+        # No region can be grown to contain them
+        is_finite = np.isfinite( x_array ) & np.isfinite( y_array )
+        if not is_finite.all():
+            self._is_alive_array[point_ids[~is_finite]] = False
+            x_array, y_array = x_array[is_finite], y_array[is_finite]
+        if x_array.size == 0:
+            return point_ids
+
+        self._grow_root_to_contain( x_array, y_array )
+        self._insert( self._root, point_ids[is_finite] )
+        return point_ids
+
+    def add_point( self, longitude_deg : float, latitude_deg : float ):
+        return int( self.add_points( [ longitude_deg ], [ latitude_deg ] )[0] )
+
+    def remove_points( self, point_ids : np.ndarray ):
+        """ Removes the points with the given ids. Unknown or already removed ids are ignored. """
+        point_ids = np.unique( np.atleast_1d( np.asarray( point_ids, dtype = np.int64 )))
+        point_ids = point_ids[( point_ids >= 0 ) & ( point_ids < self._point_count )]
+        point_ids = point_ids[self._is_alive_array[point_ids]]
+        if point_ids.size:
+            self._remove( self._root, point_ids )
+            self._is_alive_array[point_ids] = False
+        return int( point_ids.size )
+
+    def remove_point( self, point_id : int ):
+        return self.remove_points( [ point_id ] ) == 1
+
+    def get_coords( self, point_ids : np.ndarray ):
+        """ The tuple ( x_array, y_array ) of SVG coordinates for the point ids. """
+        return ( self._x_array[point_ids], self._y_array[point_ids] )
+
+    def get_long_lat( self, point_ids : np.ndarray ):
+        """ The tuple ( longitude_array, latitude_array ) for the point ids. """
+        return ( self._longitude_array[point_ids], self._latitude_array[point_ids] )
+
+    def query_view_box( self, view_box : ViewBox ):
+        """ Sorted array of the ids of the points inside the view box (edges included). """
+        id_array_list = list()
+        pending_nodes = [ self._root ]
+        while pending_nodes:
+            node = pending_nodes.pop()
+            if ( node.count == 0
+                 or node.x_min > view_box.max_x or node.x_max < view_box.min_x
+                 or node.y_min > view_box.max_y or node.y_max < view_box.min_y ):
+                continue
+            is_node_inside = ( ( node.x_min >= view_box.min_x ) and ( node.x_max <= view_box.max_x )
+                               and ( node.y_min >= view_box.min_y ) and ( node.y_max <= view_box.max_y ))
+            if is_node_inside:
+                id_array_list.extend( self._get_subtree_id_arrays( node ))
+            elif node.is_leaf:
+                point_ids = node.point_ids
+                x_array = self._x_array[point_ids]
+                y_array = self._y_array[point_ids]
+                id_array_list.append( point_ids[( x_array >= view_box.min_x ) & ( x_array <= view_box.max_x )
+                                                & ( y_array >= view_box.min_y ) & ( y_array <= view_box.max_y )] )
+            else:
+                pending_nodes.extend( node.children )
+            continue
+
+        if not id_array_list:
+            return np.empty( 0, dtype = np.int64 )
+        return np.sort( np.concatenate( id_array_list ))
+
+    def _append_columns( self, longitude_deg, latitude_deg, x_array, y_array ):
+        new_count = self._point_count + len(x_array)
+        if new_count > self._capacity:
+            new_capacity = max( new_count, 2 * self._capacity, 1024 )
+            for attr_name in [ '_longitude_array', '_latitude_array', '_x_array', '_y_array', '_is_alive_array' ]:
+                old_array = getattr( self, attr_name )
+                new_array = np.empty( new_capacity, dtype = old_array.dtype )
+                new_array[:self._point_count] = old_array[:self._point_count]
+                setattr( self, attr_name, new_array )
+                continue
+            self._capacity = new_capacity
+
+        point_slice = slice( self._point_count, new_count )
+        self._longitude_array[point_slice] = longitude_deg
+        self._latitude_array[point_slice] = latitude_deg
+        self._x_array[point_slice] = x_array
+        self._y_array[point_slice] = y_array
+        self._is_alive_array[point_slice] = True
+        point_ids = np.arange( self._point_count, new_count, dtype = np.int64 )
+        self._point_count = new_count
+        return point_ids
+
+    def _grow_root_to_contain( self, x_array : np.ndarray, y_array : np.ndarray ):
+        """ Doubles the root region (old root becomes a child) until all points fit. """
+        x_min, x_max = float( x_array.min() ), float( x_array.max() )
+        y_min, y_max = float( y_array.min() ), float( y_array.max() )
+        while ( x_min < self._root.x_min or x_max >= self._root.x_max
+                or y_min < self._root.y_min or y_max >= self._root.y_max ):
+            old_root = self._root
+            grow_left = x_min < old_root.x_min
+            grow_up = y_min < old_root.y_min
+            new_root = QuadTreeNode( x_min = old_root.x_min - ( old_root.size if grow_left else 0.0 ),
+                                     y_min = old_root.y_min - ( old_root.size if grow_up else 0.0 ),
+                                     size = 2.0 * old_root.size,
+                                     depth = 0 )
+            new_root.count = old_root.count
+            if old_root.count:
+                new_root.children = [ QuadTreeNode( x_min = new_root.x_min + ( col * old_root.size ),
+                                                    y_min = new_root.y_min + ( row * old_root.size ),
+                                                    size = old_root.size,
+                                                    depth = 1 )
+                                      for row in ( 0, 1 ) for col in ( 0, 1 ) ]
+                new_root.children[( 2 if grow_up else 0 ) + ( 1 if grow_left else 0 )] = old_root
+                self._increment_depth( old_root )
+            self._root = new_root
+            continue
+        return
+
+    def _increment_depth( self, node : QuadTreeNode ):
+        pending_nodes = [ node ]
+        while pending_nodes:
+            node = pending_nodes.pop()
+            node.depth += 1
+            if not node.is_leaf:
+                pending_nodes.extend( node.children )
+            continue
+        return
+
+    def _insert( self, node : QuadTreeNode, point_ids : np.ndarray ):
+        node.count += len(point_ids)
+        if node.is_leaf:
+            node.point_ids = np.concatenate([ node.point_ids, point_ids ])
+            if ( len(node.point_ids) <= self._max_leaf_points ) or ( node.depth >= self._max_depth ):
+                return
+            # Split the leaf and push its points down
+            point_ids = node.point_ids
+            node.point_ids = np.empty( 0, dtype = np.int64 )
+            half_size = node.size / 2.0
+            node.children = [ QuadTreeNode( x_min = node.x_min + ( col * half_size ),
+                                            y_min = node.y_min + ( row * half_size ),
+                                            size = half_size,
+                                            depth = node.depth + 1 )
+                              for row in ( 0, 1 ) for col in ( 0, 1 ) ]
+            node.count -= len(point_ids)
+            self._insert( node, point_ids )
+            return
+
+        child_index_array = node.get_child_index_array( self._x_array[point_ids], self._y_array[point_ids] )
+        for child_idx, child in enumerate( node.children ):
+            child_point_ids = point_ids[child_index_array == child_idx]
+            if child_point_ids.size:
+                self._insert( child, child_point_ids )
+            continue
+        return
+
+    def _remove( self, node : QuadTreeNode, point_ids : np.ndarray ):
+        node.count -= len(point_ids)
+        if node.is_leaf:
+            node.point_ids = node.point_ids[~np.isin( node.point_ids, point_ids )]
+            return
+
+        child_index_array = node.get_child_index_array( self._x_array[point_ids], self._y_array[point_ids] )
+        for child_idx, child in enumerate( node.children ):
+            child_point_ids = point_ids[child_index_array == child_idx]
+            if child_point_ids.size:
+                self._remove( child, child_point_ids )
+            continue
+
+        # Merge the children back when they no longer need splitting
+        if node.count <= self._max_leaf_points // 2:
+            node.point_ids = np.concatenate( self._get_subtree_id_arrays( node ) + [ node.point_ids ] )
+            node.children = None
+        return
+
+    def _get_subtree_id_arrays( self, node : QuadTreeNode ):
+        id_array_list = list()
+        pending_nodes = [ node ]
+        while pending_nodes:
+            node = pending_nodes.pop()
+            if node.count == 0:
+                continue
+            if node.is_leaf:
+                id_array_list.append( node.point_ids )
+            else:
+                pending_nodes.extend( node.children )
+            continue
+        return id_array_list
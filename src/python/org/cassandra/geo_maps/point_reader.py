@@ -0,0 +1,432 @@
+import contextlib
+import csv
+from dataclasses import dataclass
+import itertools
+import json
+import os
+import re
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from .display_bounds import DisplayBounds
+from .geo_bounds import GeoBounds
+from .geo_maps import CompositeGeoMap
+
+
+DEFAULT_CHUNK_SIZE = 100000
+
+FEATURE_SEPARATOR_RE = re.compile( r'[\s,]*' )
+
+
+@contextlib.contextmanager
+def _open_text( file_or_filename ):
+    """ Accepts a filename (or path) or an already open text file object (left open). """
+    if isinstance( file_or_filename, ( str, os.PathLike )):
+        with open( file_or_filename, 'r', newline = '' ) as in_fh:
+            yield in_fh
+    else:
+        yield file_or_filename
+    return
+
+
+class _ChunkBuilder:
+    """ Fills fixed-size longitude/latitude arrays, handing off each full chunk. """
+
+    def __init__( self, chunk_size : int ):
+        self._chunk_size = chunk_size
+        self._longitude_array = np.empty( chunk_size, dtype = np.float64 )
+        self._latitude_array = np.empty( chunk_size, dtype = np.float64 )
+        self._count = 0
+        return
+
+    def add( self, longitude : float, latitude : float ):
+        """ Returns a full chunk when this point completes one, otherwise None. """
+        self._longitude_array[self._count] = longitude
+        self._latitude_array[self._count] = latitude
+        self._count += 1
+        if self._count == self._chunk_size:
+            return self.take()
+        return None
+
+    def add_arrays( self, longitude_array : np.ndarray, latitude_array : np.ndarray ):
+        """ Generator of the full chunks completed by adding these points. """
+        start = 0
+        while start < len(longitude_array):
+            stop = start + min( self._chunk_size - self._count, len(longitude_array) - start )
+            self._longitude_array[self._count:self._count + stop - start] = longitude_array[start:stop]
+            self._latitude_array[self._count:self._count + stop - start] = latitude_array[start:stop]
+            self._count += stop - start
+            start = stop
+            if self._count == self._chunk_size:
+                yield self.take()
+            continue
+        return
+
+    def take(self):
+        chunk = ( self._longitude_array[:self._count].copy(), self._latitude_array[:self._count].copy() )
+        self._count = 0
+        return chunk
+
+    def __len__(self):
+        return self._count
+
+
+def read_csv_chunks( file_or_filename,
+                     longitude_column : str = 'longitude',
+                     latitude_column : str = 'latitude',
+                     chunk_size : int = DEFAULT_CHUNK_SIZE,
+                     skip_invalid : bool = False,
+                     **csv_kwargs ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Yields ( longitude_array, latitude_array ) chunks of at most chunk_size
+    points from a CSV file with a header row. Rows with missing or
+    non-numeric values raise ValueError unless skip_invalid is set.
+
+    Each chunk of lines is parsed straight into arrays by np.loadtxt(),
+    falling back to the csv module (one row at a time) only for chunks
+    with invalid rows or quoted fields spanning lines. A chunk ending in
+    a quoted field is extended to the line that closes it. With csv
+    options beyond delimiter and quotechar (which np.loadtxt() does not
+    understand), all rows are read by the csv module.
+    """
+    delimiter = csv_kwargs.get( 'delimiter', ',' )
+    quotechar = csv_kwargs.get( 'quotechar', '"' )
+    with _open_text( file_or_filename ) as in_fh:
+        header_line = next( in_fh, None )
+        if header_line is None:
+            return
+        header = [ column.strip() for column in next( csv.reader( [ header_line ], **csv_kwargs ), [] ) ]
+        try:
+            usecols = ( header.index( longitude_column ), header.index( latitude_column ) )
+        except ValueError:
+            raise ValueError( f'CSV header missing "{longitude_column}" or "{latitude_column}": {header}' )
+
+        chunk_builder = _ChunkBuilder( chunk_size = chunk_size )
+        if set( csv_kwargs ) - { 'delimiter', 'quotechar' }:
+            reader = csv.reader( in_fh, **csv_kwargs )
+            while True:
+                line_num = reader.line_num
+                values = _read_csv_rows( reader, usecols, 1, skip_invalid, max_row_count = chunk_size )
+                if reader.line_num == line_num:
+                    break
+                yield from chunk_builder.add_arrays( values[:, 0], values[:, 1] )
+                continue
+        else:
+            line_number = 1
+            while True:
+                line_list = list( itertools.islice( in_fh, chunk_size ))
+                if not line_list:
+                    break
+                # An odd number of quotes means the last row continues on the next line
+                quote_count = ''.join( line_list ).count( quotechar )
+                while quote_count % 2:
+                    line = next( in_fh, None )
+                    if line is None:
+                        break
+                    line_list.append( line )
+                    quote_count += line.count( quotechar )
+                    continue
+                try:
+                    values = np.loadtxt( line_list, dtype = np.float64, delimiter = delimiter, quotechar = quotechar,
+                                         usecols = usecols, comments = None, ndmin = 2 )
+                except ValueError:
+                    values = _read_csv_rows( csv.reader( line_list, **csv_kwargs ), usecols, line_number,
+                                             skip_invalid )
+                line_number += len(line_list)
+                yield from chunk_builder.add_arrays( values[:, 0], values[:, 1] )
+                continue
+
+        if len(chunk_builder):
+            yield chunk_builder.take()
+    return
+
+
+def _read_csv_rows( reader,
+                    usecols : Tuple[int, int],
+                    line_number : int,
+                    skip_invalid : bool,
+                    max_row_count : int = None ):
+    """
+    The (N, 2) values of the csv reader's rows (up to max_row_count),
+    parsed one at a time to find (or skip) the invalid ones. The line
+    number is that of the line before the reader's first one.
+    """
+    value_list = list()
+    for row in itertools.islice( reader, max_row_count ):
+        try:
+            value_list.append( ( float( row[usecols[0]] ), float( row[usecols[1]] )) )
+        except ( IndexError, ValueError ):
+            if skip_invalid or not row:
+                continue
+            raise ValueError( f'Invalid CSV row at line {line_number + reader.line_num}: {row}' )
+        continue
+    return np.array( value_list, dtype = np.float64 ).reshape( -1, 2 )
+
+
+def read_ndjson_chunks( file_or_filename,
+                        longitude_key : str = 'longitude',
+                        latitude_key : str = 'latitude',
+                        chunk_size : int = DEFAULT_CHUNK_SIZE,
+                        skip_invalid : bool = False ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Yields ( longitude_array, latitude_array ) chunks from a file with one
+    JSON object per line. Lines that are GeoJSON Point features (e.g.,
+    GeoJSON text sequences) are also accepted.
+
+    Each chunk of lines is decoded with a single json.loads() call and its
+    coordinates converted to arrays together, falling back to one line at
+    a time only for chunks with invalid lines.
+    """
+    with _open_text( file_or_filename ) as in_fh:
+        chunk_builder = _ChunkBuilder( chunk_size = chunk_size )
+        line_number = 1
+        while True:
+            line_list = list( itertools.islice( in_fh, chunk_size ))
+            if not line_list:
+                break
+            # GeoJSON text sequences prefix records with the RS character
+            record_line_list = [ line.strip().lstrip( '\x1e' ) for line in line_list ]
+            try:
+                values = _get_record_values( json.loads( '[' + ','.join( x for x in record_line_list if x ) + ']' ),
+                                             longitude_key, latitude_key )
+            except ( KeyError, TypeError, ValueError, AttributeError, IndexError ):
+                values = _read_ndjson_lines( record_line_list, longitude_key, latitude_key,
+                                             line_number, skip_invalid )
+            line_number += len(line_list)
+            yield from chunk_builder.add_arrays( values[:, 0], values[:, 1] )
+            continue
+
+        if len(chunk_builder):
+            yield chunk_builder.take()
+    return
+
+
+def _get_record_values( record_list : List[dict], longitude_key : str, latitude_key : str ):
+    """ The (N, 2) longitude/latitude values of the decoded records (or Point features). """
+    if not any( record.get( 'type' ) == 'Feature' for record in record_list ):
+        return np.array( [ ( record[longitude_key], record[latitude_key] ) for record in record_list ],
+                         dtype = np.float64 ).reshape( -1, 2 )
+    point_list = list()
+    for record in record_list:
+        if record.get( 'type' ) == 'Feature':
+            point_list.extend( _get_feature_points( record ))
+        else:
+            point_list.append( ( float( record[longitude_key] ), float( record[latitude_key] )) )
+        continue
+    return np.array( point_list, dtype = np.float64 ).reshape( -1, 2 )
+
+
+def _read_ndjson_lines( record_line_list : List[str],
+                        longitude_key : str,
+                        latitude_key : str,
+                        line_number : int,
+                        skip_invalid : bool ):
+    """ The (N, 2) values of the lines, decoded one at a time to find (or skip) the invalid ones. """
+    values_list = list()
+    for line_offset, line in enumerate( record_line_list ):
+        if not line:
+            continue
+        try:
+            values_list.append( _get_record_values( [ json.loads( line ) ], longitude_key, latitude_key ))
+        except ( KeyError, TypeError, ValueError, AttributeError, IndexError ):
+            if skip_invalid:
+                continue
+            raise ValueError( f'Invalid JSON record at line {line_number + line_offset}: {line[:80]}' )
+        continue
+    if not values_list:
+        return np.empty( ( 0, 2 ), dtype = np.float64 )
+    return np.concatenate( values_list )
+
+
+def read_geojson_chunks( file_or_filename,
+                         chunk_size : int = DEFAULT_CHUNK_SIZE,
+                         skip_invalid : bool = False,
+                         read_size : int = 1 << 20 ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Yields ( longitude_array, latitude_array ) chunks from a GeoJSON
+    FeatureCollection of Point or MultiPoint features. The features are
+    decoded one at a time as the file is read, so the whole document is
+    never held in memory.
+    """
+    decoder = json.JSONDecoder()
+    with _open_text( file_or_filename ) as in_fh:
+        chunk_builder = _ChunkBuilder( chunk_size = chunk_size )
+        buffer = ''
+        position = 0
+        is_eof = False
+
+        def fill_buffer():
+            """ Appends more of the file, dropping the already decoded part of the buffer. """
+            nonlocal buffer, position, is_eof
+            data = in_fh.read( read_size )
+            if not data:
+                is_eof = True
+            buffer = buffer[position:] + data
+            position = 0
+            return
+
+        # Skip ahead to the start of the features array
+        while True:
+            features_idx = buffer.find( '"features"' )
+            if features_idx >= 0:
+                array_idx = buffer.find( '[', features_idx )
+                if array_idx >= 0:
+                    position = array_idx + 1
+                    break
+            if is_eof:
+                raise ValueError( 'No GeoJSON "features" array found.' )
+            fill_buffer()
+            continue
+
+        while True:
+            position = FEATURE_SEPARATOR_RE.match( buffer, position ).end()
+            if position >= len(buffer):
+                if is_eof:
+                    raise ValueError( 'Truncated GeoJSON features array.' )
+                fill_buffer()
+                continue
+            if buffer[position] == ']':
+                break
+            try:
+                feature, position = decoder.raw_decode( buffer, position )
+            except json.JSONDecodeError as e:
+                # Only invalid once the whole value has been read: until then, the
+                # read can have ended part way through it (e.g., in a number).
+                value_end = _get_json_value_end( buffer, position )
+                if value_end is None:
+                    if is_eof:
+                        raise ValueError( 'Truncated GeoJSON features array.' )
+                    fill_buffer()
+                    continue
+                if not skip_invalid:
+                    raise ValueError( f'Invalid GeoJSON feature ({e.msg}): {buffer[position:position + 80]}' )
+                position = value_end
+                continue
+            try:
+                point_list = _get_feature_points( feature )
+            except ( KeyError, TypeError, ValueError, AttributeError ):
+                if skip_invalid:
+                    continue
+                raise ValueError( f'Invalid GeoJSON feature: {str(feature)[:80]}' )
+            for longitude, latitude in point_list:
+                chunk = chunk_builder.add( longitude, latitude )
+                if chunk:
+                    yield chunk
+                continue
+            continue
+
+        if len(chunk_builder):
+            yield chunk_builder.take()
+    return
+
+
+def _get_json_value_end( text : str, position : int ):
+    """
+    The position just past the (possibly invalid) JSON object or array
+    starting at position, found by matching brackets outside of strings,
+    or None if it does not end within the text.
+    """
+    depth = 0
+    in_string = False
+    idx = position
+    while idx < len(text):
+        char = text[idx]
+        if in_string:
+            if char == '\\':
+                idx += 1
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in '{[':
+            depth += 1
+        elif char in '}]':
+            depth -= 1
+            if depth <= 0:
+                return idx + 1
+        elif ( depth == 0 ) and ( char == ',' ):
+            # Not an object or array, so up to the next separator
+            return idx
+        idx += 1
+        continue
+    return None
+
+
+def _get_feature_points( feature : dict ):
+    geometry = feature['geometry']
+    if geometry['type'] == 'Point':
+        coordinate_list = [ geometry['coordinates'] ]
+    elif geometry['type'] == 'MultiPoint':
+        coordinate_list = geometry['coordinates']
+    else:
+        raise ValueError( f'Unsupported geometry type "{geometry["type"]}".' )
+    return [ ( float( coordinates[0] ), float( coordinates[1] )) for coordinates in coordinate_list ]
+
+
+@dataclass
+class ProjectedChunk:
+    """ A chunk of points with their sub-map (index into the composite map's geo_map_list) and SVG coordinates. """
+
+    longitude_array      : np.ndarray
+    latitude_array       : np.ndarray
+    geo_map_index_array  : np.ndarray
+    x_array              : np.ndarray
+    y_array              : np.ndarray
+
+    def __len__(self):
+        return len(self.longitude_array)
+
+
+class StreamingProjector:
+    """
+    Routes and projects chunks of points through a CompositeGeoMap, keeping
+    the running GeoBounds and DisplayBounds of everything projected so far.
+    Once the chunks are consumed, the display bounds can be used for the
+    ViewBox without a second pass over the points.
+    """
+
+    def __init__( self, composite_map : CompositeGeoMap ):
+        self._composite_map = composite_map
+        self._geo_bounds = GeoBounds()
+        self._display_bounds = DisplayBounds()
+        self._point_count = 0
+        return
+
+    @property
+    def geo_bounds(self):
+        return self._geo_bounds
+
+    @property
+    def display_bounds(self):
+        return self._display_bounds
+
+    @property
+    def point_count(self):
+        return self._point_count
+
+    def project_chunks( self, chunk_iter : Iterable[Tuple[np.ndarray, np.ndarray]] ):
+        """ Generator of ProjectedChunk for each ( longitude_array, latitude_array ) chunk. """
+        for longitude_array, latitude_array in chunk_iter:
+            if len(longitude_array) == 0:
+                continue
+            geo_map_index_array = self._composite_map.get_geo_map_index_array(
+                longitude_deg = longitude_array,
+                latitude_deg = latitude_array,
+            )
+            x_array, y_array = self._composite_map.long_lat_deg_to_coords_array(
+                longitude_deg = longitude_array,
+                latitude_deg = latitude_array,
+                geo_map_index_array = geo_map_index_array,
+            )
+            self._geo_bounds.add_points( longitude_array, latitude_array )
+            self._display_bounds.add_points( x_array, y_array )
+            self._point_count += len(longitude_array)
+
+            yield ProjectedChunk( longitude_array = longitude_array,
+                                  latitude_array = latitude_array,
+                                  geo_map_index_array = geo_map_index_array,
+                                  x_array = x_array,
+                                  y_array = y_array )
+            continue
+        return
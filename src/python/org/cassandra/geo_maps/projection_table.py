@@ -0,0 +1,327 @@
+import json
+import math
+import os
+import struct
+
+import numpy as np
+
+from .geo_bounds import GeoBounds
+from .geo_maps import GeoMap
+from .point_file import ALIGNMENT, get_geo_map_signature, get_signature_digest
+
+
+MAGIC = b'GEOTBL01'
+FORMAT_VERSION = 1
+
+DEFAULT_STEP_DEG = 0.01
+
+# Table name -> the grid it is over
+TABLE_AXIS_DICT = {
+    'rho': 'latitude',
+    'rho_slope': 'latitude',
+    'x_factor': 'longitude',
+    'x_factor_slope': 'longitude',
+    'y_factor': 'longitude',
+    'y_factor_slope': 'longitude',
+}
+
+
+def _align( offset : int ):
+    return ( ( offset + ALIGNMENT - 1 ) // ALIGNMENT ) * ALIGNMENT
+
+
+class ProjectionTable:
+    """
+    Approximate GeoMap.long_lat_deg_to_coords_array() by table lookup for
+    points inside a fixed GeoBounds, for when the same area is projected
+    over and over.
+
+    The Albers radius depends only on the latitude and the angle only on
+    the longitude, and the display rotation, scale and offset are linear,
+    so the SVG coordinates are:
+
+        x = ( rho( latitude ) * x_factor( longitude )) + x_offset
+        y = ( rho( latitude ) * y_factor( longitude )) + y_offset
+
+    The three functions are tabulated on grids step_deg apart and linearly
+    interpolated. That needs only a few gathers from small (cache
+    resident) tables per point instead of the trig, and points on the grid
+    (e.g., coordinates quantized to the step) are exact. max_error is a
+    bound on the distance from the exact projection (in SVG units),
+    estimated from the interpolation errors at the grid cell midpoints.
+    Points outside the table use the exact projection.
+
+    Tables can be saved and then loaded (memory mapped) with
+    load_projection_table().
+    """
+
+    def __init__( self,
+                  geo_map : GeoMap,
+                  longitude_min : float,
+                  latitude_min : float,
+                  step_deg : float,
+                  table_dict : dict,
+                  max_error : float ):
+        """ Use build() or load_projection_table(). """
+        self._geo_map = geo_map
+        self._longitude_min = longitude_min
+        self._latitude_min = latitude_min
+        self._step_deg = step_deg
+        self._inverse_step = 1.0 / step_deg
+        self._table_dict = table_dict
+        self._max_error = max_error
+
+        # The grids have one more point than the slope tables have cells.
+        self._longitude_count = len(table_dict['x_factor'])
+        self._latitude_count = len(table_dict['rho'])
+
+        ( a, b, c ), ( d, e, f ) = geo_map._affine_matrix.tolist()
+        self._x_offset = ( b * geo_map.projection.rho_0 ) + c
+        self._y_offset = ( e * geo_map.projection.rho_0 ) + f
+        return
+
+    @staticmethod
+    def build( geo_map : GeoMap,
+               step_deg : float = DEFAULT_STEP_DEG,
+               geo_bounds : GeoBounds = None ):
+        """ A table over the given bounds (by default, the GeoMap's own) with grid points step_deg apart. """
+        if step_deg <= 0.0:
+            raise ValueError( f'Table step must be positive, not {step_deg}' )
+        if geo_map._affine_matrix is None:
+            raise ValueError( 'GeoMap display scale and offset values must be set.' )
+        if geo_bounds is None:
+            geo_bounds = geo_map.geo_bounds
+        longitude_count = max( 2, math.ceil( geo_bounds.longitude_span / step_deg ) + 1 )
+        latitude_count = max( 2, math.ceil( geo_bounds.latitude_span / step_deg ) + 1 )
+        longitude_array = geo_bounds.longitude_min + ( step_deg * np.arange( longitude_count ))
+        latitude_array = geo_bounds.latitude_min + ( step_deg * np.arange( latitude_count ))
+
+        rho_table = _get_rho_array( geo_map, latitude_array )
+        if np.isnan( rho_table ).any():
+            raise ValueError( f'Projection is undefined for some latitudes in {geo_bounds}' )
+        x_factor_table, y_factor_table = _get_factor_arrays( geo_map, longitude_array )
+        table_dict = {
+            'rho': rho_table,
+            'rho_slope': np.diff( rho_table ),
+            'x_factor': x_factor_table,
+            'x_factor_slope': np.diff( x_factor_table ),
+            'y_factor': y_factor_table,
+            'y_factor_slope': np.diff( y_factor_table ),
+        }
+
+        # Linear interpolation errors are largest mid-cell.
+        rho_error = np.abs( ( rho_table[:-1] + ( table_dict['rho_slope'] / 2.0 ))
+                            - _get_rho_array( geo_map, latitude_array[:-1] + ( step_deg / 2.0 ))).max()
+        mid_x_factor_array, mid_y_factor_array = _get_factor_arrays( geo_map, longitude_array[:-1] + ( step_deg / 2.0 ))
+        x_factor_error = np.abs( x_factor_table[:-1] + ( table_dict['x_factor_slope'] / 2.0 )
+                                 - mid_x_factor_array ).max()
+        y_factor_error = np.abs( y_factor_table[:-1] + ( table_dict['y_factor_slope'] / 2.0 )
+                                 - mid_y_factor_array ).max()
+        max_rho = np.abs( rho_table ).max()
+        x_error = ( rho_error * ( np.abs( x_factor_table ).max() + x_factor_error )) + ( max_rho * x_factor_error )
+        y_error = ( rho_error * ( np.abs( y_factor_table ).max() + y_factor_error )) + ( max_rho * y_factor_error )
+
+        return ProjectionTable( geo_map = geo_map,
+                                longitude_min = geo_bounds.longitude_min,
+                                latitude_min = geo_bounds.latitude_min,
+                                step_deg = step_deg,
+                                table_dict = table_dict,
+                                max_error = float( math.hypot( x_error, y_error )) )
+
+    @property
+    def geo_map(self):
+        return self._geo_map
+
+    @property
+    def step_deg(self):
+        return self._step_deg
+
+    @property
+    def max_error(self):
+        """ Bound on the interpolation error, in SVG units. """
+        return self._max_error
+
+    @property
+    def geo_bounds(self):
+        """ The area covered by the table (the requested bounds, rounded out to whole steps). """
+        return GeoBounds( longitude_min = self._longitude_min,
+                          longitude_max = self._longitude_min + ( self._step_deg * ( self._longitude_count - 1 )),
+                          latitude_min = self._latitude_min,
+                          latitude_max = self._latitude_min + ( self._step_deg * ( self._latitude_count - 1 )) )
+
+    @property
+    def nbytes(self):
+        return sum( table.nbytes for table in self._table_dict.values() )
+
+    def contains_point_array( self, longitude_deg : np.ndarray, latitude_deg : np.ndarray ):
+        """ Boolean array of which points the table covers. """
+        longitude_offset = ( np.asarray( longitude_deg, dtype = np.float64 ) - self._longitude_min ) * self._inverse_step
+        latitude_offset = ( np.asarray( latitude_deg, dtype = np.float64 ) - self._latitude_min ) * self._inverse_step
+        return self._get_is_inside( longitude_offset, latitude_offset )
+
+    def _get_is_inside( self, longitude_offset : np.ndarray, latitude_offset : np.ndarray ):
+        return ( ( longitude_offset >= 0.0 ) & ( longitude_offset <= self._longitude_count - 1 )
+                 & ( latitude_offset >= 0.0 ) & ( latitude_offset <= self._latitude_count - 1 ))
+
+    def long_lat_deg_to_coords_array( self, longitude_deg : np.ndarray, latitude_deg : np.ndarray ):
+        """
+        Same as GeoMap.long_lat_deg_to_coords_array() to within max_error.
+        Returns the tuple ( x_array, y_array ) in SVG coordinates.
+        """
+        longitude_deg, latitude_deg = np.broadcast_arrays( np.asarray( longitude_deg, dtype = np.float64 ),
+                                                           np.asarray( latitude_deg, dtype = np.float64 ))
+        shape = longitude_deg.shape
+        longitude_deg = longitude_deg.reshape( -1 )
+        latitude_deg = latitude_deg.reshape( -1 )
+
+        # In place arithmetic from here on: the temporaries are most of the cost.
+        longitude_offset = longitude_deg - self._longitude_min
+        longitude_offset *= self._inverse_step
+        latitude_offset = latitude_deg - self._latitude_min
+        latitude_offset *= self._inverse_step
+
+        # The min/max check is cheaper than a mask, and NaN fails it too.
+        is_inside = None
+        if ( longitude_offset.size == 0 ) or not (
+                ( longitude_offset.min() >= 0.0 ) and ( longitude_offset.max() <= self._longitude_count - 1 )
+                and ( latitude_offset.min() >= 0.0 ) and ( latitude_offset.max() <= self._latitude_count - 1 )):
+            is_inside = self._get_is_inside( longitude_offset, latitude_offset )
+            # Any in range offset will do for the outside points; they are replaced below.
+            longitude_offset[~is_inside] = 0.0
+            latitude_offset[~is_inside] = 0.0
+
+        # The far edges use the last cell, with a fraction of 1.
+        longitude_idx = longitude_offset.astype( np.intp )
+        np.minimum( longitude_idx, self._longitude_count - 2, out = longitude_idx )
+        latitude_idx = latitude_offset.astype( np.intp )
+        np.minimum( latitude_idx, self._latitude_count - 2, out = latitude_idx )
+        longitude_offset -= longitude_idx
+        latitude_offset -= latitude_idx
+
+        table_dict = self._table_dict
+        rho = table_dict['rho_slope'].take( latitude_idx )
+        rho *= latitude_offset
+        rho += table_dict['rho'].take( latitude_idx )
+
+        x_array = table_dict['x_factor_slope'].take( longitude_idx )
+        x_array *= longitude_offset
+        x_array += table_dict['x_factor'].take( longitude_idx )
+        x_array *= rho
+        x_array += self._x_offset
+
+        y_array = table_dict['y_factor_slope'].take( longitude_idx )
+        y_array *= longitude_offset
+        y_array += table_dict['y_factor'].take( longitude_idx )
+        y_array *= rho
+        y_array += self._y_offset
+
+        if is_inside is not None:
+            is_outside = ~is_inside
+            outside_x, outside_y = self._geo_map.long_lat_deg_to_coords_array( longitude_deg = longitude_deg[is_outside],
+                                                                               latitude_deg = latitude_deg[is_outside] )
+            x_array[is_outside] = outside_x
+            y_array[is_outside] = outside_y
+        return ( x_array.reshape( shape ), y_array.reshape( shape ))
+
+    def save( self, filename : str ):
+        """
+        File layout: magic, header length (uint32 little endian), JSON
+        header, then the tables (float64), each aligned. Written under a
+        temporary name and renamed, so readers never see a partial file.
+        """
+        signature = get_geo_map_signature( self._geo_map )
+        header = {
+            'version': FORMAT_VERSION,
+            'longitude_min': self._longitude_min,
+            'latitude_min': self._latitude_min,
+            'longitude_count': self._longitude_count,
+            'latitude_count': self._latitude_count,
+            'step_deg': self._step_deg,
+            'max_error': self._max_error,
+            'signature': signature,
+            'signature_digest': get_signature_digest( signature ),
+        }
+        header_bytes = json.dumps( header, sort_keys = True ).encode()
+        table_layout = _get_table_layout( len(header_bytes), self._longitude_count, self._latitude_count )
+        temp_filename = f'{filename}.tmp{os.getpid()}'
+        try:
+            with open( temp_filename, 'wb' ) as out_fh:
+                out_fh.write( MAGIC )
+                out_fh.write( struct.pack( '<I', len(header_bytes) ))
+                out_fh.write( header_bytes )
+                for table_name, ( offset, _ ) in table_layout.items():
+                    out_fh.write( b'\0' * ( offset - out_fh.tell() ))
+                    out_fh.write( np.ascontiguousarray( self._table_dict[table_name], dtype = '<f8' ).tobytes() )
+                    continue
+            os.replace( temp_filename, filename )
+        finally:
+            if os.path.exists( temp_filename ):
+                os.remove( temp_filename )
+        return
+
+
+def _get_rho_array( geo_map : GeoMap, latitude_deg : np.ndarray ):
+    """ The projection radius for each latitude (NaN where undefined). """
+    projection = geo_map.projection
+    rho_basis = projection.C - ( 2 * projection.n * np.sin( np.radians( latitude_deg )))
+    return projection._radius_over_n * np.sqrt( np.where( rho_basis < 0.0, np.nan, rho_basis ))
+
+
+def _get_factor_arrays( geo_map : GeoMap, longitude_deg : np.ndarray ):
+    """ The ( x, y ) SVG coordinate per unit of radius for each longitude, from the display affine matrix. """
+    projection = geo_map.projection
+    theta = projection.n * ( np.radians( longitude_deg ) - projection._reference_longitude_radians )
+    sine_theta = np.sin( theta )
+    cosine_theta = np.cos( theta )
+    ( a, b, _ ), ( d, e, _ ) = geo_map._affine_matrix.tolist()
+    return ( ( a * sine_theta ) - ( b * cosine_theta ),
+             ( d * sine_theta ) - ( e * cosine_theta ) )
+
+
+def _get_table_layout( header_length : int, longitude_count : int, latitude_count : int ):
+    """ Table name -> ( byte offset, length ) for the tables following the header. """
+    table_layout = dict()
+    offset = _align( len(MAGIC) + 4 + header_length )
+    for table_name, axis in TABLE_AXIS_DICT.items():
+        length = longitude_count if axis == 'longitude' else latitude_count
+        if table_name.endswith( '_slope' ):
+            length -= 1
+        table_layout[table_name] = ( offset, length )
+        offset = _align( offset + ( length * 8 ))
+        continue
+    return table_layout
+
+
+def load_projection_table( filename : str, geo_map : GeoMap, remove_stale : bool = True ):
+    """
+    The saved ProjectionTable, with its tables memory mapped, if the file
+    exists and was built with the current GeoMap parameters. Otherwise
+    None (and, if remove_stale, a stale file is deleted) so the caller
+    knows to build and save it again.
+    """
+    if not os.path.exists( filename ):
+        return None
+    with open( filename, 'rb' ) as in_fh:
+        if in_fh.read( len(MAGIC) ) != MAGIC:
+            raise ValueError( f'Not a projection table file: {filename}' )
+        header_length, = struct.unpack( '<I', in_fh.read( 4 ))
+        header = json.loads( in_fh.read( header_length ).decode() )
+    if header.get( 'version' ) != FORMAT_VERSION:
+        raise ValueError( f'Unsupported projection table version {header.get( "version" )}: {filename}' )
+
+    if header['signature_digest'] != get_signature_digest( get_geo_map_signature( geo_map )):
+        if remove_stale:
+            os.remove( filename )
+        return None
+
+    table_dict = dict()
+    table_layout = _get_table_layout( header_length, header['longitude_count'], header['latitude_count'] )
+    for table_name, ( offset, length ) in table_layout.items():
+        table_dict[table_name] = np.memmap( filename, dtype = '<f8', mode = 'r', offset = offset, shape = ( length, ))
+        continue
+    return ProjectionTable( geo_map = geo_map,
+                            longitude_min = header['longitude_min'],
+                            latitude_min = header['latitude_min'],
+                            step_deg = header['step_deg'],
+                            table_dict = table_dict,
+                            max_error = header['max_error'] )
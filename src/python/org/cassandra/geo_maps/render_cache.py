@@ -0,0 +1,307 @@
+from collections import OrderedDict
+import hashlib
+import io
+import os
+import threading
+from typing import Callable
+
+import numpy as np
+
+from .view_box import ViewBox
+
+
+def get_points_digest( longitude_deg : np.ndarray, latitude_deg : np.ndarray ):
+    """ Hash of the point coordinates (as float64), so equal point sets give equal digests. """
+    longitude_deg = np.ascontiguousarray( longitude_deg, dtype = np.float64 )
+    latitude_deg = np.ascontiguousarray( latitude_deg, dtype = np.float64 )
+    digest = hashlib.sha256()
+    digest.update( str( longitude_deg.size ).encode() )
+    digest.update( longitude_deg.data )
+    digest.update( latitude_deg.data )
+    return digest.hexdigest()
+
+
+def get_view_box_key( view_box : ViewBox, decimals : int = 2 ):
+    """ Canonical text for the view box with values rounded to the given decimals. """
+    # Adding 0.0 turns a rounded -0.0 into 0.0
+    return ','.join( f'{round( value, decimals ) + 0.0:.{decimals}f}'
+                     for value in ( view_box.x, view_box.y, view_box.width, view_box.height ))
+
+
+class RenderCache:
+    """
+    Rendered map content (bytes) keyed by the composite map id, the view
+    box (rounded to view_box_decimals) and a digest of the points drawn.
+
+    Entries are evicted least recently used first once their total size
+    exceeds max_bytes. If a spill directory is given, evicted entries are
+    written there (up to max_spill_bytes, including those left by earlier
+    instances) and read back on a later request instead of re-rendering.
+    Entries larger than max_bytes go straight to the spill directory, or
+    are not cached at all without one. Spill filenames are hashes of the
+    keys, so any key can be used.
+    """
+
+    def __init__( self,
+                  max_bytes : int = 64 * 1024 * 1024,
+                  spill_directory : str = None,
+                  max_spill_bytes : int = 1024 * 1024 * 1024,
+                  view_box_decimals : int = 2 ):
+        self._max_bytes = max_bytes
+        self._spill_directory = spill_directory
+        self._max_spill_bytes = max_spill_bytes
+        self._view_box_decimals = view_box_decimals
+        if spill_directory:
+            os.makedirs( spill_directory, exist_ok = True )
+
+        # key -> bytes, and spill name (see _get_spill_name()) -> size of
+        # the files in the spill directory, oldest first
+        self._entry_cache = OrderedDict()
+        self._spill_cache = OrderedDict()
+        self._total_bytes = 0
+        self._total_spill_bytes = 0
+
+        self._hit_count = 0
+        self._spill_hit_count = 0
+        self._miss_count = 0
+        self._eviction_count = 0
+        self._spill_eviction_count = 0
+        self._lock = threading.Lock()
+        if spill_directory:
+            self._load_spill_directory()
+        return
+
+    def __len__(self):
+        return len(self._entry_cache)
+
+    def __contains__( self, key : str ):
+        return key in self._entry_cache
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
+
+    @property
+    def total_spill_bytes(self):
+        """ Bytes in the spill directory, including files left by earlier instances. """
+        return self._total_spill_bytes
+
+    @property
+    def hit_count(self):
+        """ Requests served from memory or the spill directory. """
+        return self._hit_count
+
+    @property
+    def spill_hit_count(self):
+        """ The part of hit_count served from the spill directory. """
+        return self._spill_hit_count
+
+    @property
+    def miss_count(self):
+        return self._miss_count
+
+    @property
+    def eviction_count(self):
+        """ Entries evicted from memory (whether or not they were spilled). """
+        return self._eviction_count
+
+    @property
+    def spill_eviction_count(self):
+        return self._spill_eviction_count
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'entry_count': len(self._entry_cache),
+                'total_bytes': self._total_bytes,
+                'spill_entry_count': len(self._spill_cache),
+                'total_spill_bytes': self._total_spill_bytes,
+                'hit_count': self._hit_count,
+                'spill_hit_count': self._spill_hit_count,
+                'miss_count': self._miss_count,
+                'eviction_count': self._eviction_count,
+                'spill_eviction_count': self._spill_eviction_count,
+            }
+
+    def get_key( self,
+                 map_id : int,
+                 view_box : ViewBox,
+                 points_digest : str = '',
+                 variant : str = '' ):
+        """
+        The cache key. The points digest comes from get_points_digest() and
+        the variant can be used for anything else that changes the output
+        (e.g., labels or styling).
+        """
+        canonical_key = '|'.join([ str( map_id ),
+                                   get_view_box_key( view_box, decimals = self._view_box_decimals ),
+                                   points_digest,
+                                   variant ])
+        return hashlib.sha256( canonical_key.encode() ).hexdigest()
+
+    def get( self, key : str ):
+        """ The cached bytes, or None (counted as a miss). """
+        with self._lock:
+            content = self._entry_cache.get( key )
+            if content is not None:
+                self._entry_cache.move_to_end( key )
+                self._hit_count += 1
+                return content
+
+        content = self._read_spill_file( key )
+        with self._lock:
+            if content is None:
+                self._miss_count += 1
+                return None
+            self._hit_count += 1
+            self._spill_hit_count += 1
+        if len(content) <= self._max_bytes:
+            self.put( key, content )
+        return content
+
+    def put( self, key : str, content : bytes ):
+        content = bytes( content )
+        if len(content) > self._max_bytes:
+            # Would evict everything else and still not fit
+            with self._lock:
+                old_content = self._entry_cache.pop( key, None )
+                if old_content is not None:
+                    self._total_bytes -= len(old_content)
+            self._write_spill_file( key, content )
+            return
+        evicted_list = list()
+        with self._lock:
+            old_content = self._entry_cache.pop( key, None )
+            if old_content is not None:
+                self._total_bytes -= len(old_content)
+            self._entry_cache[key] = content
+            self._total_bytes += len(content)
+            while ( self._total_bytes > self._max_bytes ) and ( len(self._entry_cache) > 1 ):
+                evicted_key, evicted_content = self._entry_cache.popitem( last = False )
+                self._total_bytes -= len(evicted_content)
+                self._eviction_count += 1
+                evicted_list.append( ( evicted_key, evicted_content ))
+                continue
+
+        for evicted_key, evicted_content in evicted_list:
+            self._write_spill_file( evicted_key, evicted_content )
+            continue
+        return
+
+    def get_or_render( self, key : str, render_function : Callable ):
+        """
+        The cached bytes, or renders them by calling render_function with a
+        binary file object to write to, caching the result.
+        """
+        content = self.get( key )
+        if content is None:
+            # Benign race: concurrent misses for the same key may each render.
+            out_fh = io.BytesIO()
+            render_function( out_fh )
+            content = out_fh.getvalue()
+            self.put( key, content )
+        return content
+
+    def invalidate( self, key : str = None ):
+        """ Drops the given entry, or all of them, from memory and the spill directory. """
+        with self._lock:
+            if key is None:
+                spill_name_list = list( self._spill_cache )
+                if self._spill_directory:
+                    # Including files spilled by other instances since this one started
+                    spill_name_list.extend( dir_entry.name[:-len('.cache')]
+                                            for dir_entry in os.scandir( self._spill_directory )
+                                            if dir_entry.name.endswith( '.cache' ))
+                self._entry_cache.clear()
+                self._total_bytes = 0
+            else:
+                spill_name_list = [ self._get_spill_name( key ) ]
+                content = self._entry_cache.pop( key, None )
+                if content is not None:
+                    self._total_bytes -= len(content)
+        for spill_name in spill_name_list:
+            self._remove_spill_file( spill_name )
+            continue
+        return
+
+    @staticmethod
+    def _get_spill_name( key : str ):
+        return hashlib.sha256( key.encode() ).hexdigest()
+
+    def _get_spill_filename( self, spill_name : str ):
+        return os.path.join( self._spill_directory, f'{spill_name}.cache' )
+
+    def _load_spill_directory(self):
+        """ Counts the files left by earlier instances, oldest first, removing any over max_spill_bytes. """
+        dir_entry_list = [ dir_entry for dir_entry in os.scandir( self._spill_directory )
+                           if dir_entry.name.endswith( '.cache' ) and dir_entry.is_file() ]
+        dir_entry_list.sort( key = lambda dir_entry: dir_entry.stat().st_mtime )
+        removed_spill_name_list = list()
+        with self._lock:
+            for dir_entry in dir_entry_list:
+                self._spill_cache[dir_entry.name[:-len('.cache')]] = dir_entry.stat().st_size
+                self._total_spill_bytes += dir_entry.stat().st_size
+                continue
+            removed_spill_name_list = self._trim_spill_cache()
+        for spill_name in removed_spill_name_list:
+            self._remove_spill_file( spill_name, is_tracked = False )
+            continue
+        return
+
+    def _trim_spill_cache(self):
+        """ Drops the oldest spill files over max_spill_bytes from the accounting (lock held), returning their names. """
+        removed_spill_name_list = list()
+        while self._total_spill_bytes > self._max_spill_bytes:
+            spill_name, size = self._spill_cache.popitem( last = False )
+            removed_spill_name_list.append( spill_name )
+            self._total_spill_bytes -= size
+            self._spill_eviction_count += 1
+            continue
+        return removed_spill_name_list
+
+    def _read_spill_file( self, key : str ):
+        if not self._spill_directory:
+            return None
+        spill_name = self._get_spill_name( key )
+        try:
+            with open( self._get_spill_filename( spill_name ), 'rb' ) as in_fh:
+                content = in_fh.read()
+        except FileNotFoundError:
+            return None
+        # Back in memory, so the file is no longer needed, unless it is too big to keep there
+        if len(content) <= self._max_bytes:
+            self._remove_spill_file( spill_name )
+        return content
+
+    def _write_spill_file( self, key : str, content : bytes ):
+        if ( not self._spill_directory ) or ( len(content) > self._max_spill_bytes ):
+            return
+        spill_name = self._get_spill_name( key )
+        filename = self._get_spill_filename( spill_name )
+        temp_filename = f'{filename}.tmp{os.getpid()}.{threading.get_ident()}'
+        with open( temp_filename, 'wb' ) as out_fh:
+            out_fh.write( content )
+        os.replace( temp_filename, filename )
+
+        with self._lock:
+            self._total_spill_bytes -= self._spill_cache.pop( spill_name, 0 )
+            self._spill_cache[spill_name] = len(content)
+            self._total_spill_bytes += len(content)
+            removed_spill_name_list = self._trim_spill_cache()
+
+        for removed_spill_name in removed_spill_name_list:
+            self._remove_spill_file( removed_spill_name, is_tracked = False )
+            continue
+        return
+
+    def _remove_spill_file( self, spill_name : str, is_tracked : bool = True ):
+        if not self._spill_directory:
+            return
+        if is_tracked:
+            with self._lock:
+                self._total_spill_bytes -= self._spill_cache.pop( spill_name, 0 )
+        try:
+            os.remove( self._get_spill_filename( spill_name ))
+        except FileNotFoundError:
+            pass
+        return
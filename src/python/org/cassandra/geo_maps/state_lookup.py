@@ -0,0 +1,184 @@
+import math
+import weakref
+
+import numpy as np
+
+from .geo_maps import CompositeGeoMap
+from .svg_paths import SvgMapTemplate
+from .svg_templates import DEFAULT_SVG_TEMPLATE_STORE, SvgTemplateStore
+
+
+class StateLookup:
+    """
+    Finds which template path (the states of usa_continental.svg) contains
+    each geo point. Points are projected onto the SVG and tested against
+    the path polygons, using a uniform grid over SVG space so that each
+    point is only tested against the paths near it, and then only against
+    the edges of those paths in the same grid row.
+    """
+
+    # Upper bound of point-edge pairs tested at once, to bound memory use.
+    MAX_BLOCK_PAIRS = 1 << 22
+
+    def __init__( self,
+                  composite_map : CompositeGeoMap,
+                  map_template : SvgMapTemplate,
+                  grid_cell_size : float = 16.0 ):
+
+        self._composite_map = composite_map
+        self._path_id_array = np.array( [ path.path_id for path in map_template.path_list ] + [ None ],
+                                        dtype = object )
+        self._grid_cell_size = grid_cell_size
+
+        # Each row is an edge ( x0, y0, x1, y1 ), one array per path
+        self._path_edges_list = list()
+        for path in map_template.path_list:
+            edge_array_list = [ np.hstack([ subpath[:-1], subpath[1:] ]) for subpath in path.subpath_list ]
+            # Rings not explicitly closed still bound an area
+            edge_array_list.extend([ np.hstack([ subpath[-1:], subpath[:1] ])
+                                     for subpath in path.subpath_list
+                                     if not np.array_equal( subpath[0], subpath[-1] ) ])
+            if edge_array_list:
+                self._path_edges_list.append( np.vstack( edge_array_list ))
+            else:
+                self._path_edges_list.append( np.empty( ( 0, 4 ), dtype = np.float64 ))
+            continue
+
+        all_edges = np.vstack( self._path_edges_list + [ np.zeros( ( 1, 4 )) ] )
+        self._grid_x_min = float( min( all_edges[:, 0].min(), all_edges[:, 2].min() ))
+        self._grid_y_min = float( min( all_edges[:, 1].min(), all_edges[:, 3].min() ))
+        grid_x_max = float( max( all_edges[:, 0].max(), all_edges[:, 2].max() ))
+        grid_y_max = float( max( all_edges[:, 1].max(), all_edges[:, 3].max() ))
+        self._grid_column_count = max( 1, math.ceil( ( grid_x_max - self._grid_x_min ) / grid_cell_size ))
+        self._grid_row_count = max( 1, math.ceil( ( grid_y_max - self._grid_y_min ) / grid_cell_size ))
+
+        # ( cell, path ) -> whether path bounds overlap the cell, and
+        # per path, the edge indices that overlap each grid row.
+        cell_count = self._grid_row_count * self._grid_column_count
+        self._cell_path_mask = np.zeros( ( cell_count, len(self._path_edges_list) ), dtype = bool )
+        self._path_row_edges_list = list()
+        for path_idx, path_edges in enumerate( self._path_edges_list ):
+            row_edges_dict = dict()
+            self._path_row_edges_list.append( row_edges_dict )
+            if len(path_edges) == 0:
+                continue
+            first_column, last_column = self._get_grid_index_range(
+                np.minimum( path_edges[:, 0], path_edges[:, 2] ).min(),
+                np.maximum( path_edges[:, 0], path_edges[:, 2] ).max(),
+                self._grid_x_min, self._grid_column_count )
+            edge_first_row, edge_last_row = self._get_grid_index_range(
+                np.minimum( path_edges[:, 1], path_edges[:, 3] ),
+                np.maximum( path_edges[:, 1], path_edges[:, 3] ),
+                self._grid_y_min, self._grid_row_count )
+            for row in range( int( edge_first_row.min() ), int( edge_last_row.max() ) + 1 ):
+                row_edge_indices = np.flatnonzero( ( edge_first_row <= row ) & ( edge_last_row >= row ))
+                if row_edge_indices.size == 0:
+                    continue
+                row_edges_dict[row] = row_edge_indices
+                row_start_cell = row * self._grid_column_count
+                self._cell_path_mask[row_start_cell + first_column:row_start_cell + last_column + 1,
+                                     path_idx] = True
+                continue
+            continue
+        return
+
+    def _get_grid_index_range( self, value_min, value_max, grid_min : float, grid_count : int ):
+        first_idx = np.clip( np.floor( ( value_min - grid_min ) / self._grid_cell_size ), 0, grid_count - 1 )
+        last_idx = np.clip( np.floor( ( value_max - grid_min ) / self._grid_cell_size ), 0, grid_count - 1 )
+        return ( first_idx.astype( np.int64 ), last_idx.astype( np.int64 ))
+
+    @property
+    def path_id_list(self):
+        return list( self._path_id_array[:-1] )
+
+    def get_path_index_array_for_coords( self, x : np.ndarray, y : np.ndarray ):
+        """
+        Index into path_id_list of the path containing each SVG point, or -1
+        if the point is not in any path.
+        """
+        x = np.asarray( x, dtype = np.float64 )
+        y = np.asarray( y, dtype = np.float64 )
+        path_index_array = np.full( x.shape, -1, dtype = np.int64 )
+
+        column_array = np.floor( ( x - self._grid_x_min ) / self._grid_cell_size )
+        row_array = np.floor( ( y - self._grid_y_min ) / self._grid_cell_size )
+        in_grid_indices = np.flatnonzero( ( column_array >= 0 ) & ( column_array < self._grid_column_count )
+                                          & ( row_array >= 0 ) & ( row_array < self._grid_row_count ))
+        if in_grid_indices.size == 0:
+            return path_index_array
+        row_array = row_array[in_grid_indices].astype( np.int64 )
+        cell_array = ( row_array * self._grid_column_count ) + column_array[in_grid_indices].astype( np.int64 )
+
+        candidate_mask = self._cell_path_mask[cell_array]
+        for path_idx, row_edges_dict in enumerate( self._path_row_edges_list ):
+            candidate_positions = np.flatnonzero( candidate_mask[:, path_idx] )
+            if candidate_positions.size == 0:
+                continue
+            candidate_rows = row_array[candidate_positions]
+            for row in np.unique( candidate_rows ).tolist():
+                row_edge_indices = row_edges_dict.get( row )
+                if row_edge_indices is None:
+                    continue
+                point_indices = in_grid_indices[candidate_positions[candidate_rows == row]]
+                is_inside = self._get_is_inside( x[point_indices],
+                                                 y[point_indices],
+                                                 self._path_edges_list[path_idx][row_edge_indices] )
+                path_index_array[point_indices[is_inside]] = path_idx
+                continue
+            continue
+
+        return path_index_array
+
+    def get_path_index_array( self, longitude_deg : np.ndarray, latitude_deg : np.ndarray ):
+        x, y = self._composite_map.long_lat_deg_to_coords_array( longitude_deg = longitude_deg,
+                                                                 latitude_deg = latitude_deg )
+        return self.get_path_index_array_for_coords( x = x, y = y )
+
+    def get_state_id_array( self, longitude_deg : np.ndarray, latitude_deg : np.ndarray ):
+        """ Array of the path id (e.g., "NY") containing each point, or None if not in any. """
+        return self._path_id_array[self.get_path_index_array( longitude_deg = longitude_deg,
+                                                              latitude_deg = latitude_deg )]
+
+    def get_state_id( self, longitude_deg : float, latitude_deg : float ):
+        return self.get_state_id_array( [ longitude_deg ], [ latitude_deg ] )[0]
+
+    def _get_is_inside( self, x : np.ndarray, y : np.ndarray, edges : np.ndarray ):
+        """ Even-odd ray crossing test of each point against all the edges (handles holes). """
+        is_inside = np.zeros( x.shape, dtype = bool )
+        x0, y0, x1, y1 = edges.T
+        dy = y1 - y0
+        safe_dy = np.where( dy == 0.0, 1.0, dy )
+        block_size = max( 1, self.MAX_BLOCK_PAIRS // max( 1, len(edges) ))
+        for block_start in range( 0, len(x), block_size ):
+            block_x = x[block_start:block_start + block_size, np.newaxis]
+            block_y = y[block_start:block_start + block_size, np.newaxis]
+            # Horizontal edges never satisfy the straddle condition
+            is_straddling = ( y0 > block_y ) != ( y1 > block_y )
+            crossing_x = x0 + ( ( block_y - y0 ) * ( x1 - x0 ) / safe_dy )
+            crossing_count = np.count_nonzero( is_straddling & ( block_x < crossing_x ), axis = 1 )
+            is_inside[block_start:block_start + block_size] = ( crossing_count % 2 ) == 1
+            continue
+        return is_inside
+
+
+# SvgMapTemplate -> { map_id -> StateLookup }, entries go away with the
+# parsed template, i.e., when the template store re-reads a changed file.
+_STATE_LOOKUP_CACHE = weakref.WeakKeyDictionary()
+
+
+def get_state_lookup( composite_map : CompositeGeoMap,
+                      template_store : SvgTemplateStore = DEFAULT_SVG_TEMPLATE_STORE,
+                      svg_template_name : str = None ):
+    """
+    The (cached) StateLookup for the composite map's template. The first
+    template is used if the map has more than one and none is given.
+    """
+    if svg_template_name is None:
+        svg_template_name = composite_map.svg_template_name_list[0]
+    map_template = template_store.get_map_template( svg_template_name )
+    map_lookup_dict = _STATE_LOOKUP_CACHE.setdefault( map_template, dict() )
+    state_lookup = map_lookup_dict.get( composite_map.map_id )
+    if state_lookup is None:
+        state_lookup = StateLookup( composite_map = composite_map, map_template = map_template )
+        map_lookup_dict[composite_map.map_id] = state_lookup
+    return state_lookup
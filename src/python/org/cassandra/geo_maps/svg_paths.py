@@ -0,0 +1,311 @@
+from dataclasses import dataclass
+import re
+from typing import List, Tuple
+
+import numpy as np
+
+from .display_bounds import DisplayBounds
+from .path_simplify import simplify_douglas_peucker, simplify_ring
+from .view_box import ViewBox
+
+
+PATH_ELEMENT_RE = re.compile( rb'<path\b[^>]*?(?:/>|>.*?</path>)', re.DOTALL )
+ID_ATTRIBUTE_RE = re.compile( rb'\sid="([^"]*)"' )
+D_ATTRIBUTE_RE = re.compile( rb'\sd="([^"]*)"' )
+TRANSLATE_RE = re.compile( rb'transform="translate\(\s*([-+.\deE]+)(?:[\s,]+([-+.\deE]+))?\s*\)"' )
+PATH_TOKEN_RE = re.compile( r'[MmLlHhVvCcSsQqTtZz]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?' )
+
+# Number of values each path command consumes per segment
+PATH_COMMAND_ARG_COUNTS = {
+    'M': 2, 'L': 2, 'H': 1, 'V': 1, 'C': 6, 'S': 4, 'Q': 4, 'T': 2, 'Z': 0,
+}
+
+# Simplification tolerances (in SVG units) of the precomputed path levels
+# of detail, from most to least detailed.
+DEFAULT_LOD_TOLERANCE_LIST = [ 0.25, 0.5, 1.0, 2.0 ]
+
+
+def parse_path_d( d : str ):
+    """
+    Converts the "d" attribute of an SVG path into a list of sub-paths,
+    each an (N, 2) array of absolute x, y vertices. Curves are reduced to
+    their end points, which is fine for the short curve segments in the
+    map templates, but means the vertices are an approximation of curved
+    paths.
+    """
+    subpath_list = list()
+    vertex_list = list()
+    current_x, current_y = 0.0, 0.0
+    start_x, start_y = 0.0, 0.0
+    command = None
+
+    def add_vertex( x, y ):
+        vertex_list.append( ( x, y ) )
+        return
+
+    def end_subpath():
+        if len(vertex_list) > 1:
+            subpath_list.append( np.array( vertex_list, dtype = np.float64 ))
+        vertex_list.clear()
+        return
+
+    tokens = PATH_TOKEN_RE.findall( d )
+    token_idx = 0
+    while token_idx < len(tokens):
+        token = tokens[token_idx]
+        if token.isalpha():
+            command = token
+            token_idx += 1
+            if command in 'Zz':
+                current_x, current_y = start_x, start_y
+                add_vertex( current_x, current_y )
+                end_subpath()
+            continue
+
+        if command is None:
+            raise ValueError( f'Path data must start with a command: "{d[:32]}"' )
+
+        arg_count = PATH_COMMAND_ARG_COUNTS[command.upper()]
+        values = [ float(x) for x in tokens[token_idx:token_idx + arg_count] ]
+        token_idx += arg_count
+        if len(values) < arg_count:
+            raise ValueError( f'Incomplete path data for command "{command}".' )
+
+        is_relative = command.islower()
+        upper_command = command.upper()
+        if upper_command == 'H':
+            current_x = values[0] + ( current_x if is_relative else 0.0 )
+        elif upper_command == 'V':
+            current_y = values[0] + ( current_y if is_relative else 0.0 )
+        elif is_relative:
+            current_x += values[-2]
+            current_y += values[-1]
+        else:
+            current_x, current_y = values[-2], values[-1]
+
+        if upper_command == 'M':
+            end_subpath()
+            start_x, start_y = current_x, current_y
+            # Subsequent coordinate pairs are implicit line-to commands
+            command = 'l' if is_relative else 'L'
+        add_vertex( current_x, current_y )
+        continue
+
+    end_subpath()
+    return subpath_list
+
+
+def is_closed_subpath( subpath : np.ndarray ):
+    return ( len(subpath) > 2 ) and np.array_equal( subpath[0], subpath[-1] )
+
+
+def get_path_d( subpath_list : List[np.ndarray], decimals : int = 2 ):
+    """
+    Compact "d" attribute value for the sub-paths: an absolute move to the
+    start, then relative line-to offsets. Offsets are taken between the
+    rounded coordinates, so rounding errors do not accumulate along the
+    path.
+    """
+    scale = 10 ** decimals
+    number_format = f'%.{decimals}f'
+    pair_format = f' {number_format},{number_format}'
+    d_part_list = list()
+    for subpath in subpath_list:
+        is_closed = is_closed_subpath( subpath )
+        if is_closed:
+            subpath = subpath[:-1]
+        scaled_subpath = np.round( subpath * scale )
+        offsets = np.diff( scaled_subpath, axis = 0 ) / scale
+        start = scaled_subpath[0] / scale
+        d_part_list.append( f'M{number_format},{number_format}' % ( start[0], start[1] ))
+        if len(offsets):
+            d_part_list.append( 'l' + ( pair_format * len(offsets) ) % tuple( offsets.ravel().tolist() ))
+        if is_closed:
+            d_part_list.append( 'z' )
+        continue
+    return ''.join( d_part_list )
+
+
+def simplify_subpath_list( subpath_list : List[np.ndarray], tolerance : float ):
+    """
+    Sub-paths simplified to the given tolerance. Closed rings that
+    collapse at this tolerance (e.g., small islands) are dropped.
+    """
+    simplified_subpath_list = list()
+    for subpath in subpath_list:
+        if is_closed_subpath( subpath ):
+            simplified_subpath = simplify_ring( subpath, tolerance )
+            if simplified_subpath is None:
+                continue
+        else:
+            simplified_subpath = simplify_douglas_peucker( subpath, tolerance )
+        simplified_subpath_list.append( simplified_subpath )
+        continue
+    return simplified_subpath_list
+
+
+def get_lod_element_bytes_list( element_bytes : bytes,
+                                subpath_list : List[np.ndarray],
+                                translate : Tuple[float, float],
+                                lod_tolerance_list : List[float] ):
+    """
+    The path element with its path data simplified at each tolerance. The
+    subpaths are in display coordinates, i.e., including the template's
+    group translation.
+    """
+    if not subpath_list:
+        return [ element_bytes ] * len(lod_tolerance_list)
+
+    # Path data is written inside the translated groups
+    template_subpath_list = [ subpath - translate for subpath in subpath_list ]
+    lod_element_bytes_list = list()
+    for tolerance in lod_tolerance_list:
+        simplified_subpath_list = simplify_subpath_list( template_subpath_list, tolerance )
+        if not simplified_subpath_list:
+            # Everything collapsed (a very small area), so keep the previous level.
+            lod_element_bytes_list.append( lod_element_bytes_list[-1] if lod_element_bytes_list
+                                           else element_bytes )
+            continue
+        d_attribute = b' d="' + get_path_d( simplified_subpath_list ).encode() + b'"'
+        lod_element_bytes_list.append( D_ATTRIBUTE_RE.sub( lambda match: d_attribute,
+                                                           element_bytes, count = 1 ))
+        continue
+    return lod_element_bytes_list
+
+
+@dataclass
+class SvgStatePath:
+    """ One <path> element of a map template and its geometry in SVG display coordinates. """
+
+    path_id         : str
+    element_bytes   : bytes
+    subpath_list    : List[np.ndarray]
+    display_bounds  : DisplayBounds
+
+    # The element with simplified path data, one for each of the template's
+    # level of detail tolerances.
+    lod_element_bytes_list  : List[bytes]  = None
+
+    def get_element_bytes( self, lod_level : int = None ):
+        """ The element at the given level of detail, or the original if level is None. """
+        if lod_level is None:
+            return self.element_bytes
+        return self.lod_element_bytes_list[lod_level]
+
+
+class SvgMapTemplate:
+    """
+    A map template split into its path elements so that subsets of them
+    can be written out. The template is expected to be the same form as
+    usa_continental.svg: <path> elements inside (possibly translated)
+    <g> elements. Path geometry is adjusted by the group translations so
+    that it is in the same coordinates as the GeoMap projections.
+
+    Each path is also simplified at each of the lod_tolerance_list
+    tolerances for rendering at lower levels of detail. If an executor
+    (concurrent.futures) is given, the paths are simplified on it.
+    """
+
+    def __init__( self,
+                  template_bytes : bytes,
+                  lod_tolerance_list : List[float] = DEFAULT_LOD_TOLERANCE_LIST,
+                  executor = None ):
+
+        self._lod_tolerance_list = sorted( lod_tolerance_list )
+
+        match_list = list( PATH_ELEMENT_RE.finditer( template_bytes ))
+        if match_list:
+            self._prefix_bytes = template_bytes[:match_list[0].start()]
+            self._suffix_bytes = template_bytes[match_list[-1].end():]
+        else:
+            self._prefix_bytes = template_bytes
+            self._suffix_bytes = b''
+
+        self._translate_x, self._translate_y = 0.0, 0.0
+        for translate_match in TRANSLATE_RE.finditer( self._prefix_bytes ):
+            self._translate_x += float( translate_match.group(1) )
+            self._translate_y += float( translate_match.group(2) or 0.0 )
+            continue
+
+        self._path_list = list()
+        for match in match_list:
+            element_bytes = match.group(0)
+            id_match = ID_ATTRIBUTE_RE.search( element_bytes )
+            d_match = D_ATTRIBUTE_RE.search( element_bytes )
+            subpath_list = list()
+            if d_match:
+                subpath_list = [ subpath + ( self._translate_x, self._translate_y )
+                                 for subpath in parse_path_d( d_match.group(1).decode() ) ]
+            display_bounds = DisplayBounds()
+            for subpath in subpath_list:
+                display_bounds.add_points( subpath[:, 0], subpath[:, 1] )
+                continue
+            self._path_list.append( SvgStatePath(
+                path_id = id_match.group(1).decode() if id_match else None,
+                element_bytes = element_bytes,
+                subpath_list = subpath_list,
+                display_bounds = display_bounds,
+            ))
+            continue
+
+        map_function = executor.map if executor else map
+        lod_element_bytes_list_iter = map_function(
+            get_lod_element_bytes_list,
+            [ path.element_bytes for path in self._path_list ],
+            [ path.subpath_list for path in self._path_list ],
+            [ self.translate ] * len(self._path_list),
+            [ self._lod_tolerance_list ] * len(self._path_list),
+        )
+        for path, lod_element_bytes_list in zip( self._path_list, lod_element_bytes_list_iter ):
+            path.lod_element_bytes_list = lod_element_bytes_list
+            continue
+
+        # Rows of ( x_min, x_max, y_min, y_max ) for batch visibility tests.
+        # Paths with no geometry are never considered visible.
+        self._bounds_array = np.array( [ ( path.display_bounds.x_min, path.display_bounds.x_max,
+                                           path.display_bounds.y_min, path.display_bounds.y_max )
+                                         for path in self._path_list ],
+                                       dtype = np.float64 ).reshape( -1, 4 )
+        return
+
+    @property
+    def prefix_bytes(self):
+        """ Template content before the first path, i.e., the opening of the enclosing groups. """
+        return self._prefix_bytes
+
+    @property
+    def suffix_bytes(self):
+        """ Template content after the last path. """
+        return self._suffix_bytes
+
+    @property
+    def translate(self):
+        return ( self._translate_x, self._translate_y )
+
+    @property
+    def path_list(self):
+        return self._path_list
+
+    @property
+    def lod_tolerance_list(self):
+        return self._lod_tolerance_list
+
+    def get_lod_level( self, tolerance : float ):
+        """
+        The least detailed level whose tolerance does not exceed the given
+        tolerance (SVG units), or None if the full detail paths are needed.
+        """
+        lod_level = None
+        for level, lod_tolerance in enumerate( self._lod_tolerance_list ):
+            if lod_tolerance > tolerance:
+                break
+            lod_level = level
+            continue
+        return lod_level
+
+    def get_visible_path_list( self, view_box : ViewBox ):
+        """ The paths whose bounding box intersects the view box. """
+        x_min, x_max, y_min, y_max = self._bounds_array.T
+        is_visible = ( ( x_max >= view_box.min_x ) & ( x_min <= view_box.max_x )
+                       & ( y_max >= view_box.min_y ) & ( y_min <= view_box.max_y ) )
+        return [ self._path_list[idx] for idx in np.flatnonzero( is_visible ) ]
@@ -0,0 +1,79 @@
+from .geo_maps import CompositeGeoMap
+from .svg_paths import SvgMapTemplate
+from .svg_templates import DEFAULT_SVG_TEMPLATE_STORE, SvgTemplateStore, get_binary_file
+from .view_box import ViewBox
+
+
+class SvgMapRenderer:
+    """
+    Writes the base map SVG content for a CompositeGeoMap. Only the
+    template paths that are (at least partly) inside the view box are
+    written, so zoomed in maps do not carry the whole country.
+
+    Paths are written at the lowest level of detail that stays within
+    lod_pixel_tolerance, assuming the map is displayed at the template's
+    native size, e.g., the full country view box uses paths simplified
+    by about half an SVG unit, while a view box a tenth of that width gets
+    full detail paths. Set lod_pixel_tolerance to None to always write the
+    full detail paths.
+    """
+
+    def __init__( self,
+                  template_store : SvgTemplateStore = DEFAULT_SVG_TEMPLATE_STORE,
+                  lod_pixel_tolerance : float = 0.5 ):
+        self._template_store = template_store
+        self._lod_pixel_tolerance = lod_pixel_tolerance
+        return
+
+    @property
+    def template_store(self):
+        return self._template_store
+
+    def write_base_map( self,
+                        composite_map : CompositeGeoMap,
+                        view_box : ViewBox,
+                        out_fh ):
+        """
+        Output is written as bytes, so text file objects are written via
+        their buffer (see svg_templates.get_binary_file()).
+        """
+        out_fh = get_binary_file( out_fh )
+
+        for svg_template_name in composite_map.svg_template_name_list:
+            self.write_template( svg_template_name = svg_template_name,
+                                 view_box = view_box,
+                                 template_view_box = composite_map.default_view_box,
+                                 out_fh = out_fh )
+            continue
+        return
+
+    def write_template( self,
+                        svg_template_name : str,
+                        view_box : ViewBox,
+                        out_fh,
+                        template_view_box : ViewBox = None ):
+        """ The template view box (full map extent) is needed for picking the level of detail. """
+        
+        map_template = self._template_store.get_map_template( svg_template_name )
+        if view_box is None:
+            path_list = map_template.path_list
+        else:
+            path_list = map_template.get_visible_path_list( view_box = view_box )
+
+        lod_level = self.get_lod_level( map_template = map_template,
+                                        view_box = view_box or template_view_box,
+                                        template_view_box = template_view_box )
+        
+        out_fh.write( map_template.prefix_bytes )
+        out_fh.write( b'\n'.join( [ path.get_element_bytes( lod_level ) for path in path_list ] ))
+        out_fh.write( map_template.suffix_bytes )
+        return
+
+    def get_lod_level( self,
+                       map_template : SvgMapTemplate,
+                       view_box : ViewBox,
+                       template_view_box : ViewBox ):
+        if ( self._lod_pixel_tolerance is None ) or ( view_box is None ) or ( template_view_box is None ):
+            return None
+        tolerance = self._lod_pixel_tolerance * view_box.width / template_view_box.width
+        return map_template.get_lod_level( tolerance = tolerance )
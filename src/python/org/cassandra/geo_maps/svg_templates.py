@@ -0,0 +1,114 @@
+from collections import OrderedDict
+import io
+import os
+import threading
+
+from .svg_paths import SvgMapTemplate
+
+
+def get_binary_file( out_fh ):
+    """
+    The file object to write bytes to: the given one, or the underlying
+    binary buffer of a text file object (flushed first, so text already
+    written comes before the bytes). Text streams without a buffer (e.g.,
+    io.StringIO) raise ValueError.
+    """
+    if not isinstance( out_fh, io.TextIOBase ):
+        return out_fh
+    if not hasattr( out_fh, 'buffer' ):
+        raise ValueError( f'Cannot write bytes to "{type( out_fh ).__name__}" text streams.' )
+    out_fh.flush()
+    return out_fh.buffer
+
+
+class SvgTemplateStore:
+    """
+    Loads each SVG template file once and keeps its content in memory as
+    bytes, ready to be written straight to the output. Entries are keyed
+    by the template name and the file's modification time, so a changed
+    file is re-read on next use, and least recently used templates are
+    evicted once there are more than max_templates. The parsed form of a
+    template (SvgMapTemplate) is cached alongside its bytes.
+    """
+
+    def __init__( self, template_directory : str = None, max_templates : int = 16 ):
+        """ The template directory defaults to the one holding the provided SVG templates. """
+
+        if template_directory is None:
+            template_directory = os.path.dirname( __file__ )
+        self._template_directory = template_directory
+        self._max_templates = max_templates
+
+        # svg_template_name -> [ mtime_ns, template bytes, SvgMapTemplate (when needed) ]
+        self._template_cache = OrderedDict()
+        self._lock = threading.Lock()
+        return
+
+    @property
+    def template_directory(self):
+        return self._template_directory
+
+    def __len__(self):
+        return len(self._template_cache)
+
+    def __contains__( self, svg_template_name : str ):
+        return svg_template_name in self._template_cache
+
+    def get_template_filename( self, svg_template_name : str ):
+        return os.path.join( self._template_directory, svg_template_name )
+
+    def get_template_bytes( self, svg_template_name : str ):
+        """ The (shared, so do not modify) bytes of the template content. """
+        return self._get_cache_entry( svg_template_name )[1]
+
+    def get_map_template( self, svg_template_name : str ):
+        """ The template parsed into its path elements (parsed once per template version). """
+        cache_entry = self._get_cache_entry( svg_template_name )
+        if cache_entry[2] is None:
+            # Benign race: concurrent first calls may each parse the template.
+            cache_entry[2] = SvgMapTemplate( template_bytes = cache_entry[1] )
+        return cache_entry[2]
+
+    def _get_cache_entry( self, svg_template_name : str ):
+        filename = self.get_template_filename( svg_template_name )
+        mtime_ns = os.stat( filename ).st_mtime_ns
+
+        with self._lock:
+            cache_entry = self._template_cache.get( svg_template_name )
+            if cache_entry and ( cache_entry[0] == mtime_ns ):
+                self._template_cache.move_to_end( svg_template_name )
+                return cache_entry
+
+        cache_entry = [ mtime_ns, self._read_template_bytes( filename ), None ]
+        with self._lock:
+            self._template_cache[svg_template_name] = cache_entry
+            self._template_cache.move_to_end( svg_template_name )
+            while len(self._template_cache) > self._max_templates:
+                self._template_cache.popitem( last = False )
+                continue
+        return cache_entry
+
+    def _read_template_bytes( self, filename : str ):
+        with open( filename, 'rb' ) as in_fh:
+            return in_fh.read()
+
+    def write_template( self, svg_template_name : str, out_fh ):
+        """
+        Writes the template content to a binary file-like object, or to the
+        underlying binary buffer of a text file object (see get_binary_file()).
+        """
+        template_bytes = self.get_template_bytes( svg_template_name )
+        get_binary_file( out_fh ).write( memoryview( template_bytes ))
+        return
+
+    def invalidate( self, svg_template_name : str = None ):
+        """ Drop the given template from the cache, or all templates if no name given. """
+        with self._lock:
+            if svg_template_name is None:
+                self._template_cache.clear()
+            else:
+                self._template_cache.pop( svg_template_name, None )
+        return
+
+
+DEFAULT_SVG_TEMPLATE_STORE = SvgTemplateStore()
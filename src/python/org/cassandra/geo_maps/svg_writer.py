@@ -0,0 +1,278 @@
+from html import escape
+from typing import Dict, List
+import zlib
+
+import numpy as np
+
+from .geometry import DEFAULT_PIXEL_TOLERANCE, get_subpath_list_d, get_svg_tolerance, get_tolerance_decimals
+from .svg_templates import get_binary_file
+from .view_box import ViewBox
+
+
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+# Elements formatted per batch, which bounds the memory used for the text
+DEFAULT_BATCH_SIZE = 4096
+
+SVG_NAMESPACE = 'http://www.w3.org/2000/svg'
+
+
+def get_view_box_decimals( view_box : ViewBox,
+                           display_width : float,
+                           pixel_tolerance : float = DEFAULT_PIXEL_TOLERANCE ):
+    """ Decimals for coordinates that stay within the pixel tolerance at the display width. """
+    return get_tolerance_decimals( get_svg_tolerance( view_box = view_box,
+                                                      display_width = display_width,
+                                                      pixel_tolerance = pixel_tolerance ))
+
+
+def get_rounded_value_list( value_array : np.ndarray, decimals : int ):
+    """
+    The values rounded to the decimals in one batch, as a flat list ready
+    for %-formatting. Adding 0.0 turns a rounded -0.0 into 0.0.
+    """
+    return ( np.round( np.asarray( value_array, dtype = np.float64 ), decimals ) + 0.0 ).ravel().tolist()
+
+
+def get_attributes_text( attribute_dict : Dict[str, str] ):
+    """ The attributes as text for an element's start tag (with a leading space), values escaped. """
+    if not attribute_dict:
+        return ''
+    return ''.join( f' {name}="{escape( str( value ), quote = True )}"'
+                    for name, value in attribute_dict.items() if value is not None )
+
+
+class SvgWriter:
+    """
+    Writes SVG markup to a binary sink: a file object, an io.BytesIO, or
+    a socket (anything with a write() or sendall() method). Output is
+    collected in a fixed size buffer and passed on when it fills, so the
+    sink sees a few large writes rather than one per element. Text file
+    objects are written via their buffer, so those without one (e.g.,
+    io.StringIO) are not supported (see svg_templates.get_binary_file()).
+    The sink gets views of the buffer, so must use (e.g., copy or send)
+    the data before returning.
+
+    Coordinates are written with the given decimals, or those following
+    the view box scale (see get_view_box_decimals()), and elements are
+    formatted in batches from NumPy arrays.
+
+    For streaming responses, the output can be gzip compressed and/or
+    framed with HTTP chunked transfer encoding (see http_header_list).
+    Each flush() passes on everything written so far (a gzip sync flush),
+    so clients can start on, e.g., the base map while points are still
+    being rendered. close() ends the stream, but leaves the sink open.
+    """
+
+    def __init__( self,
+                  out_fh,
+                  view_box : ViewBox,
+                  display_width : float = None,
+                  decimals : int = None,
+                  buffer_size : int = DEFAULT_BUFFER_SIZE,
+                  gzip_level : int = None,
+                  chunked : bool = False ):
+        """ The display width defaults to the view box width, i.e., one pixel per SVG unit. """
+        out_fh = get_binary_file( out_fh )
+        if hasattr( out_fh, 'write' ):
+            self._sink_write = out_fh.write
+        elif hasattr( out_fh, 'sendall' ):
+            self._sink_write = out_fh.sendall
+        else:
+            raise ValueError( f'Cannot write to "{type( out_fh ).__name__}" objects.' )
+        self._sink_flush = getattr( out_fh, 'flush', None )
+
+        if decimals is None:
+            decimals = get_view_box_decimals( view_box = view_box,
+                                              display_width = display_width or view_box.width )
+        self._view_box = view_box
+        self._decimals = decimals
+        self._number_format = f'%.{decimals}f'
+        # Preallocated, so large outputs do not keep reallocating it
+        self._buffer = bytearray( buffer_size )
+        self._buffer_view = memoryview( self._buffer )
+        self._buffer_length = 0
+        self._chunked = chunked
+        self._compressor = None
+        if gzip_level is not None:
+            # wbits of 16 + MAX_WBITS gives the gzip header and trailer
+            self._compressor = zlib.compressobj( gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS )
+        self._is_closed = False
+        self._rendered_byte_count = 0
+        self._sink_byte_count = 0
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__( self, exc_type, exc_value, traceback ):
+        self.close()
+        return False
+
+    @property
+    def view_box(self):
+        return self._view_box
+
+    @property
+    def decimals(self):
+        return self._decimals
+
+    @property
+    def rendered_byte_count(self):
+        """ Bytes of SVG markup written, before any compression. """
+        return self._rendered_byte_count
+
+    @property
+    def sink_byte_count(self):
+        """ Bytes passed to the sink so far. """
+        return self._sink_byte_count
+
+    @property
+    def http_header_list(self):
+        """ The ( name, value ) HTTP response headers matching the output encoding. """
+        header_list = [ ( 'Content-Type', 'image/svg+xml' ) ]
+        if self._compressor is not None:
+            header_list.append( ( 'Content-Encoding', 'gzip' ) )
+        if self._chunked:
+            header_list.append( ( 'Transfer-Encoding', 'chunked' ) )
+        return header_list
+
+    def write( self, data ):
+        """ Raw markup, as bytes or text, so this can be passed where a binary file object is expected. """
+        if self._is_closed:
+            raise ValueError( 'Write to a closed SvgWriter.' )
+        if isinstance( data, str ):
+            data = data.encode()
+        data_length = len(data)
+        self._rendered_byte_count += data_length
+        if self._buffer_length + data_length > len(self._buffer):
+            self._write_buffer()
+            if data_length >= len(self._buffer):
+                # Passed on as is, rather than copied through the buffer
+                self._write_data( data )
+                return data_length
+        self._buffer_view[self._buffer_length:self._buffer_length + data_length] = data
+        self._buffer_length += data_length
+        return data_length
+
+    def write_svg_start( self, attribute_dict : Dict[str, str] = None ):
+        view_box = self._view_box
+        view_box_text = ' '.join( self._number_format % value for value in get_rounded_value_list(
+            [ view_box.x, view_box.y, view_box.width, view_box.height ], self._decimals ))
+        self.write( f'<svg{get_attributes_text( attribute_dict )}'
+                    f' xmlns="{SVG_NAMESPACE}" viewBox="{view_box_text}">' )
+        return
+
+    def write_svg_end(self):
+        self.write( b'</svg>' )
+        return
+
+    def write_circles( self,
+                       x_array : np.ndarray,
+                       y_array : np.ndarray,
+                       radius = 3.0,
+                       attribute_dict : Dict[str, str] = None,
+                       batch_size : int = DEFAULT_BATCH_SIZE ):
+        """
+        A circle element per point, for a radius or an array of them.
+        Points that are not finite (e.g., not projected) are skipped.
+        """
+        x_array = np.ravel( x_array )
+        values = np.empty( ( x_array.size, 3 ), dtype = np.float64 )
+        values[:, 0] = x_array
+        values[:, 1] = np.ravel( y_array )
+        values[:, 2] = np.ravel( radius )
+        is_finite = np.isfinite( values ).all( axis = 1 )
+        if not is_finite.all():
+            values = values[is_finite]
+        element_format = ( f'<circle cx="{self._number_format}" cy="{self._number_format}"'
+                           f' r="{self._number_format}"'
+                           f'{get_attributes_text( attribute_dict ).replace( "%", "%%" )}></circle>\n' )
+        for start in range( 0, len(values), batch_size ):
+            batch_values = values[start:start + batch_size]
+            self.write( ( element_format * len(batch_values) )
+                        % tuple( get_rounded_value_list( batch_values, self._decimals )))
+            continue
+        return
+
+    def write_texts( self,
+                     x_array : np.ndarray,
+                     y_array : np.ndarray,
+                     text_list : List[str],
+                     attribute_dict : Dict[str, str] = None,
+                     batch_size : int = DEFAULT_BATCH_SIZE ):
+        """ A text element per point, with the (escaped) text. Points that are not finite are skipped. """
+        values = np.column_stack([ np.ravel( x_array ), np.ravel( y_array ) ]).astype( np.float64 )
+        is_finite = np.isfinite( values ).all( axis = 1 )
+        values = values[is_finite]
+        text_list = [ escape( str( text ), quote = False )
+                      for text, is_kept in zip( text_list, is_finite.tolist() ) if is_kept ]
+        element_format = ( f'<text x="{self._number_format}" y="{self._number_format}"'
+                           f'{get_attributes_text( attribute_dict ).replace( "%", "%%" )}>%s</text>\n' )
+        for start in range( 0, len(values), batch_size ):
+            rounded_value_list = get_rounded_value_list( values[start:start + batch_size], self._decimals )
+            argument_list = list()
+            for x, y, text in zip( rounded_value_list[0::2], rounded_value_list[1::2],
+                                   text_list[start:start + batch_size] ):
+                argument_list.extend( ( x, y, text ) )
+                continue
+            self.write( ( element_format * ( len(argument_list) // 3 )) % tuple( argument_list ))
+            continue
+        return
+
+    def write_paths( self,
+                     subpath_list_list : List[List[np.ndarray]],
+                     attribute_dict : Dict[str, str] = None ):
+        """
+        A path element for each list of projected sub-paths, e.g., from
+        geometry.project_geometry_list() or
+        great_circle.project_great_circle_arcs(). Empty ones are skipped.
+        """
+        attributes_text = get_attributes_text( attribute_dict )
+        for subpath_list in subpath_list_list:
+            d = get_subpath_list_d( subpath_list, decimals = self._decimals )
+            if not d:
+                continue
+            self.write( f'<path d="{d}"{attributes_text}></path>\n' )
+            continue
+        return
+
+    def flush(self):
+        """ Passes everything written so far on to the sink. """
+        self._write_buffer( zlib_flush_mode = zlib.Z_SYNC_FLUSH )
+        if self._sink_flush is not None:
+            self._sink_flush()
+        return
+
+    def close(self):
+        """ Ends the output (gzip trailer and last chunk). The sink is not closed. """
+        if self._is_closed:
+            return
+        self._write_buffer( zlib_flush_mode = zlib.Z_FINISH )
+        if self._chunked:
+            self._write_sink( b'0\r\n\r\n' )
+        self._is_closed = True
+        return
+
+    def _write_buffer( self, zlib_flush_mode : int = None ):
+        data = self._buffer_view[:self._buffer_length]
+        self._buffer_length = 0
+        self._write_data( data, zlib_flush_mode = zlib_flush_mode )
+        return
+
+    def _write_data( self, data : bytes, zlib_flush_mode : int = None ):
+        if self._compressor is not None:
+            data = self._compressor.compress( data )
+            if zlib_flush_mode is not None:
+                data += self._compressor.flush( zlib_flush_mode )
+        if not len(data):
+            return
+        if self._chunked:
+            data = b''.join([ b'%X\r\n' % len(data), data, b'\r\n' ])
+        self._write_sink( data )
+        return
+
+    def _write_sink( self, data : bytes ):
+        self._sink_write( data )
+        self._sink_byte_count += len(data)
+        return
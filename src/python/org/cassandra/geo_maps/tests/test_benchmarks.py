@@ -0,0 +1,64 @@
+import logging
+import unittest
+
+from org.cassandra.geo_maps import benchmarks
+import org.cassandra.geo_maps.geo_maps as geo_maps
+
+logging.disable(logging.CRITICAL)
+
+
+class BenchmarksTestCase(unittest.TestCase):
+
+    def test_get_point_count_list(self):
+        self.assertEqual( [ 1, 10, 100 ], benchmarks.get_point_count_list( 999 ))
+        self.assertEqual( [ 1, 10, 100, 1000 ], benchmarks.get_point_count_list( 1000 ))
+        return
+
+    def test_run_benchmarks(self):
+
+        result_list = benchmarks.run_benchmarks( max_points = 10, max_scalar_points = 1, repeat = 1 )
+        result_key_set = { ( result['name'], result['variant'], result['point_count'] ) for result in result_list }
+        for name, variant_dict in benchmarks.BENCHMARK_DICT.items():
+            for variant in variant_dict:
+                self.assertIn( ( name, variant, 1 ), result_key_set )
+                continue
+            self.assertNotIn( ( name, benchmarks.SCALAR, 10 ), result_key_set )
+            continue
+        self.assertIn( 'render.svg', benchmarks.format_results( result_list ))
+
+        # View box benchmarks are timed per view box, for at most max_view_boxes of them
+        view_box_result_list = [ result for result in result_list
+                                 if result['name'] in benchmarks.VIEW_BOX_BENCHMARK_NAME_SET ]
+        self.assertTrue( view_box_result_list )
+        for result in view_box_result_list:
+            self.assertEqual( min( result['point_count'], benchmarks.DEFAULT_MAX_VIEW_BOXES ), result['item_count'] )
+            continue
+        return
+
+    def test_benchmark_context(self):
+
+        context = benchmarks.BenchmarkContext( geo_maps.UsaContinentalCompositeGeoMap, 100,
+                                               max_scalar_points = 10, max_view_boxes = 20 )
+        self.assertEqual( 100, context.longitude_array.size )
+        self.assertIsNone( context.longitude_list )
+        self.assertEqual( 20, len(context.view_box_list) )
+        self.assertEqual( 20, context.get_item_count( 'composite_map.view_box_to_geo_bounds_list' ))
+        self.assertEqual( 100, context.get_item_count( 'render.svg' ))
+        return
+
+    def test_compare_results(self):
+
+        baseline_result_list = [
+            { 'name': 'a', 'variant': 'batch', 'point_count': 10, 'seconds': 1.0 },
+            { 'name': 'b', 'variant': 'batch', 'point_count': 10, 'seconds': 1.0 },
+        ]
+        result_list = [
+            { 'name': 'a', 'variant': 'batch', 'point_count': 10, 'seconds': 1.1, 'ns_per_point': 1.0 },
+            { 'name': 'b', 'variant': 'batch', 'point_count': 10, 'seconds': 1.5, 'ns_per_point': 1.0 },
+            { 'name': 'c', 'variant': 'batch', 'point_count': 10, 'seconds': 1.0, 'ns_per_point': 1.0 },
+        ]
+        regression_list = benchmarks.compare_results( result_list, baseline_result_list, regression_threshold = 0.2 )
+        self.assertEqual( [ 'b' ], [ result['name'] for result in regression_list ] )
+        self.assertAlmostEqual( 1.1, result_list[0]['ratio'] )
+        self.assertNotIn( 'ratio', result_list[2] )
+        return
@@ -0,0 +1,76 @@
+import logging
+import unittest
+
+from org.cassandra.geo_maps.calibration import calibrate, calibrate_geo_map
+import org.cassandra.geo_maps.geo_maps as geo_maps
+
+logging.disable(logging.CRITICAL)
+
+
+class CalibrationTestCase(unittest.TestCase):
+
+    def _get_calibration_points( self, geo_map, longitude_latitude_list ):
+        calibration_points = list()
+        for longitude, latitude in longitude_latitude_list:
+            x, y = geo_map.long_lat_deg_to_coords( longitude_deg = longitude, latitude_deg = latitude )
+            calibration_points.append( ( longitude, latitude, x, y ) )
+            continue
+        return calibration_points
+    
+    def test_calibrate__recovers_known_values(self):
+
+        for geo_map, longitude_latitude_list in [
+                ( geo_maps.USA_CONTINENTAL_GEO_MAP,
+                  [ ( -122.4, 37.8 ), ( -71.1, 42.3 ), ( -80.2, 25.8 ), ( -97.7, 30.3 ) ] ),
+                ( geo_maps.ALASKA_CONTINENTAL_GEO_MAP,
+                  [ ( -149.9, 61.2 ), ( -156.8, 71.3 ), ( -134.4, 58.3 ) ] ),
+                ( geo_maps.HAWAII_CONTINENTAL_GEO_MAP,
+                  [ ( -157.9, 21.3 ), ( -155.1, 19.7 ), ( -159.4, 22.0 ), ( -156.3, 20.8 ) ] ),
+        ]:
+            calibration_points = self._get_calibration_points( geo_map, longitude_latitude_list )
+            result = calibrate( projection = geo_map.projection,
+                                calibration_points = calibration_points )
+
+            self.assertAlmostEqual( geo_map.display_x_scale, result.display_x_scale, 6 )
+            self.assertAlmostEqual( geo_map.display_y_scale, result.display_y_scale, 6 )
+            self.assertAlmostEqual( geo_map.display_x_offset, result.display_x_offset, 4 )
+            self.assertAlmostEqual( geo_map.display_y_offset, result.display_y_offset, 4 )
+            self.assertAlmostEqual( geo_map.rotation_angle_deg or 0.0, result.rotation_angle_deg, 5 )
+            self.assertLess( result.rms_error, 1e-6 )
+            continue
+        return
+
+    def test_calibrate_geo_map__with_noise(self):
+
+        geo_map = geo_maps.HAWAII_CONTINENTAL_GEO_MAP
+        calibration_points = self._get_calibration_points(
+            geo_map, [ ( -157.9, 21.3 ), ( -155.1, 19.7 ), ( -159.4, 22.0 ), ( -156.3, 20.8 ) ] )
+
+        noise_list = [ ( 0.5, -0.3 ), ( -0.4, 0.2 ), ( 0.1, 0.4 ), ( -0.2, -0.3 ) ]
+        calibration_points = [ ( longitude, latitude, x + dx, y + dy )
+                               for ( longitude, latitude, x, y ), ( dx, dy )
+                               in zip( calibration_points, noise_list ) ]
+        test_geo_map = geo_maps.GeoMap(
+            projection = geo_map.projection,
+            geo_bounds = geo_map.geo_bounds,
+            svg_template_name = geo_map.svg_template_name,
+            view_box = geo_map.view_box,
+            calibration_points = calibration_points,
+        )
+        calibrated_geo_map, result = calibrate_geo_map( test_geo_map )
+
+        self.assertEqual( ( 4, 2 ), result.residuals.shape )
+        self.assertGreater( result.rms_error, 0.0 )
+        self.assertLess( result.max_error, 1.0 )
+
+        x, y = calibrated_geo_map.long_lat_deg_to_coords( longitude_deg = -157.9, latitude_deg = 21.3 )
+        expected_x, expected_y = geo_map.long_lat_deg_to_coords( longitude_deg = -157.9, latitude_deg = 21.3 )
+        self.assertAlmostEqual( expected_x, x, delta = 1.0 )
+        self.assertAlmostEqual( expected_y, y, delta = 1.0 )
+        return
+
+    def test_calibrate__too_few_points(self):
+        with self.assertRaises( ValueError ):
+            calibrate( projection = geo_maps.USA_CONTINENTAL_PROJECTION,
+                       calibration_points = [ ( -96.0, 37.5, 0.0, 0.0 ), ( -95.0, 37.5, 1.0, 0.0 ) ] )
+        return
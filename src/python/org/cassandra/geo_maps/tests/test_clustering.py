@@ -0,0 +1,78 @@
+import logging
+import unittest
+
+import numpy as np
+
+from org.cassandra.geo_maps.clustering import (
+    HEX_GRID,
+    ClusterPyramid,
+    cluster_points,
+    cluster_points_in_view_box,
+)
+from org.cassandra.geo_maps.view_box import ViewBox
+
+logging.disable(logging.CRITICAL)
+
+
+class ClusteringTestCase(unittest.TestCase):
+
+    def test_cluster_points__square(self):
+
+        x = np.array( [ 1.0, 2.0, 3.0, 12.0, 14.0, -1.0 ] )
+        y = np.array( [ 1.0, 3.0, 5.0, 1.0, 3.0, -1.0 ] )
+        clusters = cluster_points( x, y, cell_size = 10.0 )
+
+        result = sorted( zip( clusters.x_array.tolist(), clusters.y_array.tolist(),
+                              clusters.count_array.tolist() ))
+        self.assertEqual( [ ( -1.0, -1.0, 1 ), ( 2.0, 3.0, 3 ), ( 13.0, 2.0, 2 ) ], result )
+        return
+
+    def test_cluster_points__hex(self):
+
+        rng = np.random.default_rng( 3 )
+        x = rng.uniform( 0.0, 100.0, 5000 )
+        y = rng.uniform( 0.0, 100.0, 5000 )
+        clusters = cluster_points( x, y, cell_size = 10.0, grid_type = HEX_GRID )
+
+        self.assertEqual( 5000, int( clusters.count_array.sum() ))
+        # Roughly the area / hexagon area (10 wide hexagons have area ~86.6)
+        self.assertGreater( len(clusters), 100 )
+        self.assertLess( len(clusters), 160 )
+        return
+
+    def test_cluster_points_in_view_box(self):
+
+        rng = np.random.default_rng( 5 )
+        x = rng.uniform( 0.0, 958.0, 200000 )
+        y = rng.uniform( 0.0, 602.0, 200000 )
+        view_box = ViewBox( x = 100.0, y = 100.0, width = 200.0, height = 100.0 )
+
+        clusters = cluster_points_in_view_box( x, y, view_box = view_box,
+                                               display_width_pixels = 800.0, cell_size_pixels = 40.0 )
+        is_inside = ( x >= 100.0 ) & ( x <= 300.0 ) & ( y >= 100.0 ) & ( y <= 200.0 )
+        self.assertEqual( int( is_inside.sum() ), int( clusters.count_array.sum() ))
+        # 10x10 SVG unit cells
+        self.assertEqual( 200, len(clusters) )
+
+        svg = clusters.to_svg( view_box = view_box, display_width_pixels = 800.0 )
+        self.assertEqual( 200, svg.count( '<circle' ))
+        return
+
+    def test_ClusterPyramid(self):
+
+        rng = np.random.default_rng( 7 )
+        x = rng.uniform( 0.0, 958.0, 20000 )
+        y = rng.uniform( 0.0, 602.0, 20000 )
+        pyramid = ClusterPyramid( x, y, base_cell_size = 2.0, level_count = 6 )
+        self.assertEqual( [ 2.0, 4.0, 8.0, 16.0, 32.0, 64.0 ], pyramid.cell_size_list )
+
+        view_box = ViewBox( x = 0.0, y = 0.0, width = 958.0, height = 602.0 )
+        self.assertEqual( 5, pyramid.get_level( 958.0 * 40.0 / 800.0 ))
+        clusters = pyramid.get_clusters( view_box = view_box, display_width_pixels = 800.0 )
+        self.assertEqual( 20000, int( clusters.count_array.sum() ))
+
+        view_box = ViewBox( x = 200.0, y = 200.0, width = 50.0, height = 30.0 )
+        self.assertEqual( 0, pyramid.get_level( 50.0 * 40.0 / 800.0 ))
+        clusters = pyramid.get_clusters( view_box = view_box, display_width_pixels = 800.0 )
+        self.assertTrue( np.all( clusters.x_array >= 200.0 ) and np.all( clusters.x_array <= 250.0 ))
+        return
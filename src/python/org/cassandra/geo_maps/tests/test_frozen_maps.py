@@ -0,0 +1,120 @@
+import dataclasses
+import logging
+import threading
+import unittest
+
+import numpy as np
+
+import org.cassandra.geo_maps.geo_maps as geo_maps
+from org.cassandra.geo_maps.frozen_maps import (
+    FrozenCompositeGeoMap,
+    FrozenGeoMap,
+    FrozenUsaContinentalCompositeGeoMap,
+    FrozenViewBox,
+)
+from org.cassandra.geo_maps.view_box import ViewBox
+
+logging.disable(logging.CRITICAL)
+
+
+class FrozenMapsTestCase(unittest.TestCase):
+
+    def test_view_box(self):
+
+        view_box = FrozenViewBox( x = 10.0, y = 20.0, width = 100.0, height = 50.0 )
+        self.assertEqual( 110.0, view_box.max_x )
+        self.assertEqual( '10.0 20.0 100.0 50.0', str(view_box) )
+        self.assertTrue( view_box.contains_point( 50.0, 60.0 ))
+        self.assertEqual( hash( view_box ), hash( FrozenViewBox( 10.0, 20.0, 100.0, 50.0 )))
+        self.assertFalse( hasattr( view_box, '__dict__' ))
+        with self.assertRaises( dataclasses.FrozenInstanceError ):
+            view_box.x = 0.0
+
+        intersection = view_box.intersect( ViewBox( x = 0.0, y = 0.0, width = 50.0, height = 50.0 ))
+        self.assertEqual( FrozenViewBox( 10.0, 20.0, 40.0, 30.0 ), intersection )
+        self.assertIsNone( view_box.intersect( FrozenViewBox( 500.0, 500.0, 1.0, 1.0 )))
+        return
+
+    def test_geo_map__matches_mutable(self):
+
+        for geo_map in FrozenUsaContinentalCompositeGeoMap.geo_map_list:
+            self.assertIsInstance( geo_map, FrozenGeoMap )
+            continue
+
+        frozen_geo_map = FrozenGeoMap.from_geo_map( geo_maps.ALASKA_CONTINENTAL_GEO_MAP )
+        self.assertEqual( geo_maps.ALASKA_CONTINENTAL_GEO_MAP.long_lat_deg_to_coords( -150.0, 62.0 ),
+                          frozen_geo_map.long_lat_deg_to_coords( -150.0, 62.0 ))
+        self.assertEqual( geo_maps.ALASKA_CONTINENTAL_GEO_MAP.coords_to_long_lat_deg( 100.0, 500.0 ),
+                          frozen_geo_map.coords_to_long_lat_deg( 100.0, 500.0 ))
+        with self.assertRaises( dataclasses.FrozenInstanceError ):
+            frozen_geo_map.display_x_scale = 1.0
+        with self.assertRaises( ValueError ):
+            frozen_geo_map._affine_matrix[0, 0] = 1.0
+        with self.assertRaises( dataclasses.FrozenInstanceError ):
+            frozen_geo_map.geo_bounds.longitude_min = 0.0
+        with self.assertRaises( dataclasses.FrozenInstanceError ):
+            frozen_geo_map.projection.rho_0 = 0.0
+        self.assertEqual( geo_maps.ALASKA_CONTINENTAL_GEO_MAP.projection.x_y_from_deg( -150.0, 62.0 ),
+                          frozen_geo_map.projection.x_y_from_deg( -150.0, 62.0 ))
+        return
+
+    def test_composite_map__matches_mutable(self):
+
+        composite_map = geo_maps.UsaContinentalCompositeGeoMap
+        frozen_composite_map = FrozenUsaContinentalCompositeGeoMap
+        rng = np.random.default_rng( 41 )
+        longitude_array = rng.uniform( -170.0, -65.0, 1000 )
+        latitude_array = rng.uniform( 18.0, 70.0, 1000 )
+
+        expected_x_array, expected_y_array = composite_map.long_lat_deg_to_coords_array( longitude_array,
+                                                                                         latitude_array )
+        x_array, y_array = frozen_composite_map.long_lat_deg_to_coords_array( longitude_array, latitude_array )
+        self.assertTrue( np.array_equal( expected_x_array, x_array ))
+        self.assertTrue( np.array_equal( expected_y_array, y_array ))
+
+        self.assertEqual( str( composite_map.default_view_box ), str( frozen_composite_map.default_view_box ))
+        self.assertEqual( [ str(x) for x in composite_map.geo_bounds_list ],
+                          [ str(x) for x in frozen_composite_map.geo_bounds_list ] )
+        with self.assertRaises( AttributeError ):
+            frozen_composite_map._map_id = 7
+        with self.assertRaises( dataclasses.FrozenInstanceError ):
+            frozen_composite_map.geo_bounds_list[0].longitude_min = 0.0
+        with self.assertRaises( dataclasses.FrozenInstanceError ):
+            frozen_composite_map.geo_bounds.latitude_max = 0.0
+        return
+
+    def test_composite_map__shared_geo_map_not_modified(self):
+
+        geo_map = dataclasses.replace( geo_maps.USA_CONTINENTAL_GEO_MAP,
+                                       view_box = ViewBox( x = 0.0, y = 0.0, width = 958.0, height = 602.0 ))
+        first_composite_map = FrozenCompositeGeoMap( map_id = 5, geo_map_list = [ geo_map ] )
+        second_composite_map = FrozenCompositeGeoMap( map_id = 6, geo_map_list = [ geo_map ] )
+
+        self.assertIsNone( geo_map.view_box.map_id )
+        self.assertEqual( 5, first_composite_map.default_view_box.map_id )
+        self.assertEqual( 6, second_composite_map.default_view_box.map_id )
+        return
+
+    def test_composite_map__threads(self):
+
+        frozen_composite_map = FrozenUsaContinentalCompositeGeoMap
+        expected_coords = frozen_composite_map.get_geo_map_for_point( -100.0, 40.0 ).long_lat_deg_to_coords(
+            -100.0, 40.0 )
+        result_list = list()
+
+        def project():
+            for _ in range( 1000 ):
+                geo_map = frozen_composite_map.get_geo_map_for_point( -100.0, 40.0 )
+                result_list.append( geo_map.long_lat_deg_to_coords( -100.0, 40.0 ))
+                continue
+            return
+
+        thread_list = [ threading.Thread( target = project ) for _ in range( 4 ) ]
+        for thread in thread_list:
+            thread.start()
+            continue
+        for thread in thread_list:
+            thread.join()
+            continue
+        self.assertEqual( { expected_coords }, set( result_list ))
+        return
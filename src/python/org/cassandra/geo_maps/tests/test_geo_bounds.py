@@ -0,0 +1,76 @@
+import logging
+import unittest
+
+import numpy as np
+
+from org.cassandra.geo_maps.display_bounds import DisplayBounds
+from org.cassandra.geo_maps.geo_bounds import GeoBounds, GeoBoundsArray
+
+logging.disable(logging.CRITICAL)
+
+
+class GeoBoundsTestCase(unittest.TestCase):
+
+    def test_add_points__matches_add_point(self):
+
+        rng = np.random.default_rng( 53 )
+        longitude_array = rng.uniform( -125.0, -65.0, 500 )
+        latitude_array = rng.uniform( 25.0, 50.0, 500 )
+
+        geo_bounds = GeoBounds()
+        display_bounds = DisplayBounds()
+        for longitude, latitude in zip( longitude_array.tolist(), latitude_array.tolist() ):
+            geo_bounds.add_point( longitude = longitude, latitude = latitude )
+            display_bounds.add_point( x = longitude, y = latitude )
+            continue
+
+        batch_geo_bounds = GeoBounds()
+        batch_geo_bounds.add_points( longitude_array[:250], latitude_array[:250] )
+        batch_geo_bounds.add_points( longitude_array[250:], latitude_array[250:] )
+        batch_geo_bounds.add_points( np.empty( 0 ), np.empty( 0 ))
+        batch_display_bounds = DisplayBounds()
+        batch_display_bounds.add_points( longitude_array, latitude_array )
+
+        self.assertEqual( geo_bounds, batch_geo_bounds )
+        self.assertEqual( display_bounds, batch_display_bounds )
+        self.assertFalse( hasattr( geo_bounds, '__dict__' ))
+        self.assertFalse( hasattr( display_bounds, '__dict__' ))
+
+        # NaN coordinates make the bounds NaN, one at a time or in a batch.
+        geo_bounds.add_point( longitude = float( 'nan' ), latitude = 40.0 )
+        batch_geo_bounds.add_points( [ -100.0, np.nan ], [ 40.0, 40.0 ] )
+        display_bounds.add_point( x = 1.0, y = float( 'nan' ))
+        batch_display_bounds.add_points( [ 1.0 ], [ np.nan ] )
+        for bounds in ( geo_bounds, batch_geo_bounds ):
+            self.assertTrue( np.isnan( bounds.longitude_min ) and np.isnan( bounds.longitude_max ))
+            continue
+        for bounds in ( display_bounds, batch_display_bounds ):
+            self.assertTrue( np.isnan( bounds.y_min ) and np.isnan( bounds.y_max ))
+            continue
+        return
+
+    def test_geo_bounds_array(self):
+
+        geo_bounds_list = [
+            GeoBounds( longitude_min = -10.0, longitude_max = 10.0, latitude_min = -10.0, latitude_max = 10.0 ),
+            GeoBounds( longitude_min = 0.0, longitude_max = 30.0, latitude_min = 0.0, latitude_max = 30.0 ),
+            GeoBounds( longitude_min = 50.0, longitude_max = 60.0, latitude_min = 50.0, latitude_max = 60.0 ),
+        ]
+        geo_bounds_array = GeoBoundsArray.from_geo_bounds_list( geo_bounds_list )
+        self.assertEqual( 3, len(geo_bounds_array) )
+        self.assertEqual( geo_bounds_list[1], geo_bounds_array[1] )
+
+        self.assertEqual( [ True, True, False ], geo_bounds_array.contains_point( 5.0, 5.0 ).tolist() )
+        self.assertEqual( [ [ True, True, False ], [ False, False, True ] ],
+                          geo_bounds_array.contains_point( [ 5.0, 55.0 ], [ 5.0, 55.0 ] ).tolist() )
+
+        other_geo_bounds = GeoBounds( longitude_min = 1.0, longitude_max = 8.0, latitude_min = 1.0, latitude_max = 8.0 )
+        self.assertEqual( [ True, True, False ], geo_bounds_array.contains_bounds( other_geo_bounds ).tolist() )
+
+        other_geo_bounds = GeoBounds( longitude_min = 5.0, longitude_max = 20.0, latitude_min = 5.0, latitude_max = 20.0 )
+        intersection, is_intersecting_array = geo_bounds_array.intersect( other_geo_bounds )
+        self.assertEqual( [ True, True, False ], is_intersecting_array.tolist() )
+        for idx, geo_bounds in enumerate( geo_bounds_list[:2] ):
+            self.assertEqual( geo_bounds.intersect( other_geo_bounds ), intersection[idx] )
+            continue
+        return
@@ -1,6 +1,10 @@
 import logging
+import math
 import unittest
 
+import numpy as np
+
+from org.cassandra.geo_maps.frozen_maps import FrozenCompositeGeoMap
 from org.cassandra.geo_maps.geo_bounds import GeoBounds
 import org.cassandra.geo_maps.geo_maps as geo_maps
 from org.cassandra.geo_maps.view_box import ViewBox
@@ -220,4 +224,133 @@ class GeoMapTestCase(unittest.TestCase):
             continue
 
         return
+
+    def test_AlbersMapProjection_array_matches_scalar(self):
+
+        projection = geo_maps.AlbersMapProjection(
+            reference_longitude_deg = -96.0,
+            reference_latitude_deg = 37.5,
+            standard_parallel_1_deg = 29.5,
+            standard_parallel_2_deg = 45.5,
+        )
+
+        longitude_list = list()
+        latitude_list = list()
+        for longitude in range( -180, 180, 3 ):
+            for latitude in range( -90, 91, 3 ):
+                longitude_list.append( float(longitude) )
+                latitude_list.append( float(latitude) )
+                continue
+            continue
+
+        # Includes points where rho_basis < 0 (scalar returns (0, 0))
+        x_array, y_array = projection.x_y_from_deg_array( np.array( longitude_list ),
+                                                          np.array( latitude_list ) )
+        for idx, ( longitude, latitude ) in enumerate( zip( longitude_list, latitude_list )):
+            x, y = projection.x_y_from_deg( longitude_deg = longitude, latitude_deg = latitude )
+            self.assertAlmostEqual( x, x_array[idx], 8, f'{longitude}, {latitude}' )
+            self.assertAlmostEqual( y, y_array[idx], 8, f'{longitude}, {latitude}' )
+            continue
+
+        # Includes points beyond the clamping range of the inverse, the apex, and NaN
+        x_list = [ 0.0, 0.0, 100000.0, -25000.0, math.nan, 0.0 ] + list( x_array )
+        y_list = [ projection.rho_0, -50000.0, 100000.0, 30000.0, 0.0, math.nan ] + list( y_array )
+        longitude_array, latitude_array = projection.deg_from_x_y_array( np.array( x_list ),
+                                                                         np.array( y_list ) )
+        for idx, ( x, y ) in enumerate( zip( x_list, y_list )):
+            longitude, latitude = projection.deg_from_x_y( x = x, y = y )
+            self.assertAlmostEqual( longitude, longitude_array[idx], 8, f'{x}, {y}' )
+            self.assertAlmostEqual( latitude, latitude_array[idx], 8, f'{x}, {y}' )
+            continue
+        return
+
+    def test_GeoMap_array_matches_scalar(self):
+
+        longitude_array = np.linspace( -170.0, -60.0, 37 )
+        latitude_array = np.linspace( 15.0, 72.0, 37 )
         
+        for geo_map in [ geo_maps.USA_CONTINENTAL_GEO_MAP,
+                         geo_maps.ALASKA_CONTINENTAL_GEO_MAP,
+                         geo_maps.HAWAII_CONTINENTAL_GEO_MAP ]:
+            
+            x_array, y_array = geo_map.long_lat_deg_to_coords_array( longitude_array, latitude_array )
+            for idx, ( longitude, latitude ) in enumerate( zip( longitude_array, latitude_array )):
+                x, y = geo_map.long_lat_deg_to_coords( longitude_deg = longitude, latitude_deg = latitude )
+                self.assertAlmostEqual( x, x_array[idx], 8, f'{longitude}, {latitude}' )
+                self.assertAlmostEqual( y, y_array[idx], 8, f'{longitude}, {latitude}' )
+                continue
+
+            result_longitude_array, result_latitude_array = geo_map.coords_to_long_lat_deg_array(
+                x_array, y_array )
+            for idx, ( x, y ) in enumerate( zip( x_array, y_array )):
+                longitude, latitude = geo_map.coords_to_long_lat_deg( x = x, y = y )
+                self.assertAlmostEqual( longitude, result_longitude_array[idx], 8, f'{x}, {y}' )
+                self.assertAlmostEqual( latitude, result_latitude_array[idx], 8, f'{x}, {y}' )
+                continue
+            continue
+        return
+
+    def test_CompositeGeoMap_array_routing(self):
+
+        composite_map = geo_maps.UsaContinentalCompositeGeoMap
+
+        point_list = [
+            ( -73.9249, 40.6943 ),   # New York
+            ( -149.9003, 61.2181 ),  # Anchorage
+            ( -157.8583, 21.3069 ),  # Honolulu
+            ( -87.6861, 41.8373 ),   # Chicago
+            ( 2.3522, 48.8566 ),     # Paris (outside all, so default)
+            ( -140.0, 30.0 ),        # Pacific (outside all, so default)
+        ]
+        longitude_array = np.array( [ x[0] for x in point_list ] )
+        latitude_array = np.array( [ x[1] for x in point_list ] )
+
+        geo_map_index_array = composite_map.get_geo_map_index_array( longitude_array, latitude_array )
+        x_array, y_array = composite_map.long_lat_deg_to_coords_array( longitude_array, latitude_array )
+        
+        for idx, ( longitude, latitude ) in enumerate( point_list ):
+            geo_map = composite_map.get_geo_map_for_point( longitude_deg = longitude,
+                                                           latitude_deg = latitude )
+            self.assertIs( geo_map, composite_map.geo_map_list[geo_map_index_array[idx]] )
+            
+            x, y = geo_map.long_lat_deg_to_coords( longitude_deg = longitude, latitude_deg = latitude )
+            self.assertAlmostEqual( x, x_array[idx], 8 )
+            self.assertAlmostEqual( y, y_array[idx], 8 )
+            continue
+
+        self.assertEqual( [ 0, 1, 2, 0, 0, 0 ], list( geo_map_index_array ))
+        return
+
+    def test_CompositeGeoMap_view_box_to_geo_bounds_list__edge_samples(self):
+
+        # Frozen, so that the shared GeoMap view box is not given this map id
+        composite_map = FrozenCompositeGeoMap( map_id = 99, geo_map_list = [ geo_maps.USA_CONTINENTAL_GEO_MAP ] )
+        view_box = ViewBox( x = 100, y = 100, width = 600, height = 300 )
+
+        corner_bounds = composite_map.view_box_to_geo_bounds_list( view_box = view_box )[0]
+        edge_bounds = composite_map.view_box_to_geo_bounds_list( view_box = view_box, points_per_edge = 32 )[0]
+
+        # Edge samples include the corners, so the bounds can only grow.
+        self.assertLessEqual( edge_bounds.longitude_min, corner_bounds.longitude_min )
+        self.assertGreaterEqual( edge_bounds.longitude_max, corner_bounds.longitude_max )
+        self.assertLessEqual( edge_bounds.latitude_min, corner_bounds.latitude_min )
+
+        # The curved parallels bulge north along the top edge.
+        self.assertGreater( edge_bounds.latitude_max, corner_bounds.latitude_max + 0.5 )
+        longitude, latitude = geo_maps.USA_CONTINENTAL_GEO_MAP.coords_to_long_lat_deg( x = 400, y = 100 )
+        self.assertFalse( corner_bounds.contains_point( longitude_deg = longitude, latitude_deg = latitude ))
+        self.assertTrue( edge_bounds.contains_point( longitude_deg = longitude, latitude_deg = latitude ))
+
+        # Repeated queries reuse the sampled points.
+        self.assertEqual( 1, len(composite_map._edge_sample_cache) )
+        long_lat = composite_map._edge_sample_cache[ next( iter( composite_map._edge_sample_cache )) ]
+        composite_map.view_box_to_geo_bounds_list( view_box = view_box, points_per_edge = 32 )
+        self.assertEqual( 1, len(composite_map._edge_sample_cache) )
+        self.assertIs( long_lat, composite_map._get_edge_sample_long_lat( geo_map_index = 0,
+                                                                          view_box = view_box,
+                                                                          points_per_edge = 32 ))
+        self.assertEqual( 4 * 31, long_lat[0].size )
+
+        composite_map.clear_edge_sample_cache()
+        self.assertEqual( 0, len(composite_map._edge_sample_cache) )
+        return
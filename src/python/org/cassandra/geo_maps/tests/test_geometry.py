@@ -0,0 +1,124 @@
+import logging
+import unittest
+
+import numpy as np
+
+import org.cassandra.geo_maps.geo_maps as geo_maps
+from org.cassandra.geo_maps import geometry
+from org.cassandra.geo_maps.svg_paths import parse_path_d
+
+logging.disable(logging.CRITICAL)
+
+
+class GeometryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._composite_map = geo_maps.UsaContinentalCompositeGeoMap
+        return
+
+    def test_line_string__sub_pixel_vertices(self):
+
+        # A dense track: about 0.03 SVG units between vertices.
+        rng = np.random.default_rng( 5 )
+        vertex_count = 20000
+        longitude_array = -100.0 + np.cumsum( rng.normal( 0.0005, 0.001, vertex_count ))
+        latitude_array = 38.0 + np.cumsum( rng.normal( 0.0, 0.001, vertex_count ))
+        line_string = { 'type': geometry.LINE_STRING,
+                        'coordinates': np.column_stack([ longitude_array, latitude_array ]) }
+        x_array, y_array = self._composite_map.long_lat_deg_to_coords_array( longitude_array, latitude_array )
+
+        subpath_list, = geometry.project_geometry_list( self._composite_map, [ line_string ] )
+        self.assertEqual( 1, len(subpath_list) )
+        self.assertTrue( np.array_equal( np.column_stack([ x_array, y_array ]), subpath_list[0] ))
+
+        tolerance = 0.5
+        subpath_list, = geometry.project_geometry_list( self._composite_map, [ line_string ], tolerance = tolerance )
+        simplified_subpath = subpath_list[0]
+        self.assertLess( len(simplified_subpath), vertex_count / 4 )
+        self.assertTrue( np.array_equal( [ x_array[0], y_array[0] ], simplified_subpath[0] ))
+        self.assertTrue( np.array_equal( [ x_array[-1], y_array[-1] ], simplified_subpath[-1] ))
+
+        # Every dropped vertex is within tolerance of the last kept one.
+        keep_mask = geometry.get_sub_pixel_mask( np.column_stack([ x_array, y_array ]), tolerance )
+        kept_idx_array = np.maximum.accumulate( np.where( keep_mask, np.arange( vertex_count ), 0 ))
+        distance_array = np.hypot( x_array - x_array[kept_idx_array], y_array - y_array[kept_idx_array] )
+        self.assertLessEqual( distance_array.max(), tolerance )
+
+        # The relative path data comes back to the same vertices (to the written decimals).
+        d, = geometry.get_geometry_d_list( self._composite_map, [ line_string ], tolerance = tolerance )
+        self.assertTrue( d.startswith( 'M' ))
+        self.assertNotIn( ' 0.0,0.0', d )
+        parsed_subpath, = parse_path_d( d )
+        self.assertLessEqual( np.abs( parsed_subpath[-1] - simplified_subpath[-1] ).max(), 0.05 + 1e-9 )
+        return
+
+    def test_line_string__split_by_geo_map(self):
+
+        line_string = { 'type': geometry.LINE_STRING,
+                        'coordinates': [ [ -122.3, 47.6 ], [ -122.7, 45.5 ],      # Seattle, Portland
+                                         [ -149.9, 61.2 ], [ -147.7, 64.8 ] ] }  # Anchorage, Fairbanks
+        subpath_list, = geometry.project_geometry_list( self._composite_map, [ line_string ] )
+        self.assertEqual( 2, len(subpath_list) )
+
+        alaska_geo_map = geo_maps.ALASKA_CONTINENTAL_GEO_MAP
+        x, y = alaska_geo_map.long_lat_deg_to_coords( -149.9, 61.2 )
+        self.assertAlmostEqual( x, subpath_list[1][0][0], 9 )
+        self.assertAlmostEqual( y, subpath_list[1][0][1], 9 )
+
+        # A vertex on its own in a GeoMap cannot be drawn.
+        line_string['coordinates'].append( [ -122.3, 47.6 ] )
+        subpath_list, = geometry.project_geometry_list( self._composite_map, [ line_string ] )
+        self.assertEqual( 2, len(subpath_list) )
+        return
+
+    def test_polygons(self):
+
+        square_ring = [ [ -100.0, 40.0 ], [ -90.0, 40.0 ], [ -90.0, 45.0 ], [ -100.0, 45.0 ] ]
+        hole_ring = [ [ -97.0, 41.0 ], [ -97.0, 43.0 ], [ -93.0, 43.0 ], [ -93.0, 41.0 ], [ -97.0, 41.0 ] ]
+        # Across Washington, British Columbia and Alaska.
+        split_ring = [ [ -124.0, 46.0 ], [ -118.0, 46.0 ], [ -118.0, 49.0 ], [ -135.0, 58.0 ],
+                       [ -140.0, 60.0 ], [ -150.0, 62.0 ], [ -150.0, 65.0 ], [ -136.0, 62.0 ], [ -124.0, 49.0 ] ]
+        geometry_list = [
+            { 'type': geometry.POLYGON, 'coordinates': [ square_ring, hole_ring ] },
+            { 'type': geometry.MULTI_POLYGON, 'coordinates': [ [ split_ring ] ] },
+            { 'type': geometry.POLYGON, 'coordinates': [ [ [ -100.0, 40.0 ], [ -99.999, 40.0 ],
+                                                           [ -99.999, 40.001 ] ] ] },
+        ]
+        subpath_list_list = geometry.project_geometry_list( self._composite_map, geometry_list, tolerance = 0.5 )
+
+        # Rings get closed.
+        self.assertEqual( 2, len(subpath_list_list[0]) )
+        self.assertEqual( 5, len(subpath_list_list[0][0]) )
+        self.assertTrue( np.array_equal( subpath_list_list[0][0][0], subpath_list_list[0][0][-1] ))
+
+        # The continental and Alaska parts become separate closed rings.
+        self.assertEqual( 2, len(subpath_list_list[1]) )
+        self.assertEqual( [ 5, 6 ], [ len(x) for x in subpath_list_list[1] ] )
+        for subpath in subpath_list_list[1]:
+            self.assertTrue( np.array_equal( subpath[0], subpath[-1] ))
+            continue
+
+        # Sub-pixel polygons are dropped.
+        self.assertEqual( [], subpath_list_list[2] )
+
+        d_list = geometry.get_geometry_d_list( self._composite_map, geometry_list, tolerance = 0.5 )
+        self.assertEqual( 2, d_list[0].count( 'z' ))
+        self.assertEqual( 2, d_list[1].count( 'M' ))
+        self.assertEqual( '', d_list[2] )
+        return
+
+    def test_unsupported_geometry(self):
+
+        with self.assertRaises( ValueError ):
+            geometry.project_geometry_list( self._composite_map, [ { 'type': 'Point', 'coordinates': [ 0, 0 ] } ] )
+        return
+
+    def test_tolerance_helpers(self):
+
+        view_box = self._composite_map.default_view_box
+        self.assertAlmostEqual( 0.5, geometry.get_svg_tolerance( view_box, display_width = view_box.width ))
+        self.assertAlmostEqual( 0.25, geometry.get_svg_tolerance( view_box, display_width = 2 * view_box.width ))
+        self.assertEqual( 1, geometry.get_tolerance_decimals( 0.5 ))
+        self.assertEqual( 0, geometry.get_tolerance_decimals( 5.0 ))
+        self.assertEqual( 3, geometry.get_tolerance_decimals( 0.002 ))
+        return
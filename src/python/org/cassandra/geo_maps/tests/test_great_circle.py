@@ -0,0 +1,139 @@
+import logging
+import unittest
+
+import numpy as np
+
+import org.cassandra.geo_maps.geo_maps as geo_maps
+from org.cassandra.geo_maps import great_circle
+from org.cassandra.geo_maps import utils
+
+logging.disable(logging.CRITICAL)
+
+
+class GreatCircleTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._composite_map = geo_maps.UsaContinentalCompositeGeoMap
+        return
+
+    def _get_edge_points( self, geo_bounds, points_per_edge : int = 10001 ):
+        """ ( longitude_array, latitude_array ) densely sampled along the edges of the bounds. """
+        fraction_array = np.linspace( 0.0, 1.0, points_per_edge )
+        longitude_array = geo_bounds.longitude_min + fraction_array * ( geo_bounds.longitude_max - geo_bounds.longitude_min )
+        latitude_array = geo_bounds.latitude_min + fraction_array * ( geo_bounds.latitude_max - geo_bounds.latitude_min )
+        return ( np.concatenate([ longitude_array, longitude_array,
+                                  np.full( points_per_edge, geo_bounds.longitude_min ),
+                                  np.full( points_per_edge, geo_bounds.longitude_max ) ]),
+                 np.concatenate([ np.full( points_per_edge, geo_bounds.latitude_min ),
+                                  np.full( points_per_edge, geo_bounds.latitude_max ),
+                                  latitude_array, latitude_array ]) )
+
+    def _get_projected_bounds( self, geo_map ):
+        """ ( x_min, y_min, x_max, y_max ) of the GeoMap bounds in SVG coordinates. """
+        x_array, y_array = geo_map.long_lat_deg_to_coords_array( *self._get_edge_points( geo_map.geo_bounds ))
+        return ( x_array.min(), y_array.min(), x_array.max(), y_array.max() )
+
+    def test_great_circle_points(self):
+
+        # New York to Los Angeles, and Tokyo to San Francisco (across 180).
+        lat1, lng1, lat2, lng2 = [ 40.7, 35.7 ], [ -74.0, 139.7 ], [ 34.05, 37.8 ], [ -118.24, -122.4 ]
+        longitude_array, latitude_array, arc_offset_array = great_circle.get_great_circle_points(
+            lat1, lng1, lat2, lng2, segment_count_array = [ 10, 20 ] )
+        self.assertEqual( [ 0, 11, 32 ], arc_offset_array.tolist() )
+        self.assertEqual( -74.0, longitude_array[0] )
+        self.assertEqual( 34.05, latitude_array[10] )
+        self.assertEqual( 35.7, latitude_array[11] )
+        self.assertAlmostEqual( -122.4 + 360.0, longitude_array[-1], 9 )
+
+        # Longitudes continue, rather than jumping at 180.
+        self.assertLess( np.abs( np.diff( longitude_array[11:] )).max(), 10.0 )
+
+        # Every point is on the great circle, evenly spaced.
+        for start, stop in zip( arc_offset_array[:-1], arc_offset_array[1:] ):
+            arc_lat, arc_lng = latitude_array[start:stop], longitude_array[start:stop]
+            to_start = utils.get_distance_array( arc_lat[0], arc_lng[0], arc_lat, arc_lng )
+            to_end = utils.get_distance_array( arc_lat, arc_lng, arc_lat[-1], arc_lng[-1] )
+            self.assertTrue( np.allclose( to_start + to_end, to_start[-1], atol = 1e-6 ))
+            self.assertTrue( np.allclose( np.diff( to_start ), to_start[-1] / ( stop - start - 1 ), atol = 1e-6 ))
+            continue
+
+        # Coincident end points.
+        longitude_array, latitude_array, _ = great_circle.get_great_circle_points(
+            40.0, -100.0, 40.0, -100.0, segment_count_array = 2 )
+        self.assertTrue( np.array_equal( [ -100.0 ] * 3, longitude_array ))
+        self.assertTrue( np.array_equal( [ 40.0 ] * 3, latitude_array ))
+        return
+
+    def test_segment_counts(self):
+
+        # New York to Boston, New York to Los Angeles.
+        lat1, lng1, lat2, lng2 = [ 40.7, 40.7 ], [ -74.0, -74.0 ], [ 42.36, 34.05 ], [ -71.06, -118.24 ]
+        segment_count_array = great_circle.get_segment_count_array( self._composite_map, lat1, lng1, lat2, lng2,
+                                                                    tolerance = 0.5 )
+        self.assertLess( segment_count_array[0], segment_count_array[1] )
+        zoomed_segment_count_array = great_circle.get_segment_count_array( self._composite_map,
+                                                                           lat1, lng1, lat2, lng2,
+                                                                           tolerance = 0.05 )
+        self.assertTrue( np.all( zoomed_segment_count_array > segment_count_array ))
+
+        # The drawn arc stays within the tolerance of a densely sampled one.
+        geo_map = geo_maps.USA_CONTINENTAL_GEO_MAP
+        for tolerance in [ 0.5, 0.05 ]:
+            segment_count = great_circle.get_segment_count_array( self._composite_map, 40.7, -74.0, 34.05, -118.24,
+                                                                  tolerance = tolerance )
+            longitude_array, latitude_array, _ = great_circle.get_great_circle_points(
+                40.7, -74.0, 34.05, -118.24, segment_count_array = segment_count )
+            x_array, y_array = geo_map.long_lat_deg_to_coords_array( longitude_array, latitude_array )
+            longitude_array, latitude_array, _ = great_circle.get_great_circle_points(
+                40.7, -74.0, 34.05, -118.24, segment_count_array = 100 * segment_count )
+            dense_x_array, dense_y_array = geo_map.long_lat_deg_to_coords_array( longitude_array, latitude_array )
+            interpolated_y_array = np.interp( dense_x_array, x_array[::-1], y_array[::-1] )
+            self.assertLessEqual( np.abs( dense_y_array - interpolated_y_array ).max(), tolerance )
+            continue
+        return
+
+    def test_arcs_to_alaska_and_hawaii(self):
+
+        # Seattle to Anchorage, Los Angeles to Honolulu, Chicago to Denver.
+        lat1, lng1, lat2, lng2 = [ 47.6, 34.05, 41.88 ], [ -122.3, -118.24, -87.63 ], \
+            [ 61.2, 21.31, 39.74 ], [ -149.9, -157.86, -104.99 ]
+        subpath_list_list = great_circle.project_great_circle_arcs( self._composite_map, lat1, lng1, lat2, lng2,
+                                                                    tolerance = 0.5 )
+        self.assertEqual( [ 2, 2, 1 ], [ len(x) for x in subpath_list_list ] )
+
+        for subpath_list, geo_map, lat, lng in [
+                ( subpath_list_list[0], geo_maps.ALASKA_CONTINENTAL_GEO_MAP, 61.2, -149.9 ),
+                ( subpath_list_list[1], geo_maps.HAWAII_CONTINENTAL_GEO_MAP, 21.31, -157.86 ) ]:
+            x, y = geo_map.long_lat_deg_to_coords( lng, lat )
+            self.assertAlmostEqual( x, subpath_list[-1][-1][0], 9 )
+            self.assertAlmostEqual( y, subpath_list[-1][-1][1], 9 )
+
+            # Every part of the arc stays within the map, and the inset part within the inset
+            for subpath in subpath_list:
+                self.assertTrue( np.all( ( subpath >= 0.0 ) & ( subpath <= [ 958.0, 602.0 ] )))
+                continue
+            x_min, y_min, x_max, y_max = self._get_projected_bounds( geo_map )
+            inset_subpath = subpath_list[-1]
+            self.assertTrue( np.all( ( inset_subpath[:, 0] >= x_min - 1e-9 ) & ( inset_subpath[:, 0] <= x_max + 1e-9 )
+                                     & ( inset_subpath[:, 1] >= y_min - 1e-9 ) & ( inset_subpath[:, 1] <= y_max + 1e-9 )))
+            continue
+
+        # Each part is clipped at the edge of its GeoMap's bounds.
+        longitude_array, latitude_array, arc_offset_array = great_circle.get_great_circle_points(
+            lat1, lng1, lat2, lng2, segment_count_array = [ 50 ] * 3 )
+        geo_map_index_array = great_circle.get_arc_geo_map_index_array( self._composite_map,
+                                                                        longitude_array, latitude_array )
+        self.assertIn( -1, geo_map_index_array[:arc_offset_array[2]].tolist() )
+        longitude_array, latitude_array, arc_offset_array, geo_map_index_array = great_circle.clip_arcs_to_geo_bounds(
+            self._composite_map, longitude_array, latitude_array, arc_offset_array, geo_map_index_array )
+        self.assertEqual( [ 0, 53, 106, 157 ], arc_offset_array.tolist() )
+        hawaii_bounds = geo_maps.HAWAII_CONTINENTAL_GEO_MAP.geo_bounds
+        hawaii_start = np.flatnonzero( geo_map_index_array[53:106] == 2 )[0] + 53
+        self.assertEqual( -1, geo_map_index_array[hawaii_start - 1] )
+        self.assertTrue( hawaii_bounds.contains_point( longitude_array[hawaii_start], latitude_array[hawaii_start] ))
+        self.assertTrue( np.isclose( [ hawaii_bounds.longitude_max, hawaii_bounds.latitude_max ],
+                                     [ longitude_array[hawaii_start], latitude_array[hawaii_start] ] ).any() )
+
+        d_list = great_circle.get_great_circle_d_list( self._composite_map, lat1, lng1, lat2, lng2, tolerance = 0.5 )
+        self.assertEqual( [ 2, 2, 1 ], [ d.count( 'M' ) for d in d_list ] )
+        return
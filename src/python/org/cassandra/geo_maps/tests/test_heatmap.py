@@ -0,0 +1,87 @@
+import logging
+import struct
+import unittest
+import zlib
+
+import numpy as np
+
+import org.cassandra.geo_maps.geo_maps as geo_maps
+from org.cassandra.geo_maps.heatmap import DensityHeatmap, encode_png_rgba
+from org.cassandra.geo_maps.view_box import ViewBox
+
+logging.disable(logging.CRITICAL)
+
+
+class DensityHeatmapTestCase(unittest.TestCase):
+
+    def test_add_points__incremental(self):
+
+        rng = np.random.default_rng( 11 )
+        longitude_array = rng.uniform( -125.0, -67.0, 5000 )
+        latitude_array = rng.uniform( 25.0, 49.0, 5000 )
+        composite_map = geo_maps.UsaContinentalCompositeGeoMap
+        view_box = composite_map.default_view_box
+
+        heatmap = DensityHeatmap( composite_map = composite_map, view_box = view_box, width_pixels = 200 )
+        self.assertEqual( ( 126, 200 ), heatmap.count_grid.shape )
+        heatmap.add_points( longitude_array[:2000], latitude_array[:2000] )
+        heatmap.add_points( longitude_array[2000:], latitude_array[2000:] )
+
+        full_heatmap = DensityHeatmap( composite_map = composite_map, view_box = view_box, width_pixels = 200 )
+        full_heatmap.add_points( longitude_array, latitude_array )
+
+        self.assertTrue( np.array_equal( full_heatmap.count_grid, heatmap.count_grid ))
+
+        # Corners of the long/lat box project outside the view box
+        x, y = composite_map.long_lat_deg_to_coords_array( longitude_array, latitude_array )
+        inside_count = np.count_nonzero( ( x >= view_box.min_x ) & ( x <= view_box.max_x )
+                                         & ( y >= view_box.min_y ) & ( y <= view_box.max_y ))
+        self.assertEqual( inside_count, heatmap.total_count )
+        self.assertLess( inside_count, 5000 )
+        return
+
+    def test_get_density_grid__blur(self):
+
+        view_box = ViewBox( x = 0.0, y = 0.0, width = 100.0, height = 100.0 )
+        heatmap = DensityHeatmap( composite_map = geo_maps.UsaContinentalCompositeGeoMap,
+                                  view_box = view_box, width_pixels = 100 )
+        heatmap.add_coords( x = [ 50.5, 50.5, 10.5 ], y = [ 50.5, 50.5, 20.5 ] )
+        self.assertEqual( 2.0, heatmap.count_grid[50, 50] )
+        self.assertEqual( 1.0, heatmap.count_grid[20, 10] )
+
+        density_grid = heatmap.get_density_grid( blur_sigma_pixels = 2.0 )
+        self.assertAlmostEqual( 3.0, density_grid.sum(), 6 )
+        self.assertLess( density_grid[50, 50], 2.0 )
+        self.assertAlmostEqual( density_grid[48, 50], density_grid[52, 50], 10 )
+        self.assertAlmostEqual( density_grid[50, 48], density_grid[48, 50], 10 )
+        return
+
+    def test_to_svg_image(self):
+
+        view_box = ViewBox( x = 10.0, y = 20.0, width = 40.0, height = 30.0 )
+        heatmap = DensityHeatmap( composite_map = geo_maps.UsaContinentalCompositeGeoMap,
+                                  view_box = view_box, width_pixels = 40 )
+        heatmap.add_coords( x = [ 30.0 ], y = [ 35.0 ] )
+        svg = heatmap.to_svg_image( blur_sigma_pixels = 1.5 )
+        self.assertTrue( svg.startswith( '<image class="heatmap" x="10.0" y="20.0" width="40.0" height="30.0"' ))
+        self.assertIn( 'href="data:image/png;base64,', svg )
+        return
+
+    def test_encode_png_rgba(self):
+
+        rgba_image = np.arange( 3 * 5 * 4, dtype = np.uint8 ).reshape( 3, 5, 4 )
+        png_bytes = encode_png_rgba( rgba_image )
+
+        self.assertEqual( b'\x89PNG\r\n\x1a\n', png_bytes[:8] )
+        length, chunk_type = struct.unpack( '>I4s', png_bytes[8:16] )
+        self.assertEqual( ( 13, b'IHDR' ), ( length, chunk_type ))
+        self.assertEqual( ( 5, 3, 8, 6 ), struct.unpack( '>IIBB', png_bytes[16:26] ))
+
+        idat_start = 8 + 12 + 13
+        idat_length, chunk_type = struct.unpack( '>I4s', png_bytes[idat_start:idat_start + 8] )
+        self.assertEqual( b'IDAT', chunk_type )
+        scanlines = zlib.decompress( png_bytes[idat_start + 8:idat_start + 8 + idat_length] )
+        self.assertEqual( 3 * ( 1 + 5 * 4 ), len(scanlines) )
+        self.assertEqual( rgba_image[1].tobytes(), scanlines[22:42] )
+        self.assertTrue( png_bytes.endswith( b'IEND\xaeB`\x82' ))
+        return
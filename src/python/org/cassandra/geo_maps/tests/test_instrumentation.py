@@ -0,0 +1,107 @@
+import io
+import logging
+import unittest
+
+import numpy as np
+
+import org.cassandra.geo_maps.geo_maps as geo_maps
+from org.cassandra.geo_maps import instrumentation
+from org.cassandra.geo_maps.frozen_maps import FrozenUsaContinentalCompositeGeoMap
+from org.cassandra.geo_maps.svg_renderer import SvgMapRenderer
+from org.cassandra.geo_maps.svg_templates import SvgTemplateStore
+
+logging.disable(logging.CRITICAL)
+
+
+class InstrumentationTestCase(unittest.TestCase):
+
+    def tearDown(self):
+        instrumentation.disable()
+        return
+
+    def test_enable_disable(self):
+
+        original_method = geo_maps.GeoMap.long_lat_deg_to_coords
+        self.assertFalse( instrumentation.is_enabled() )
+        expected_coords = geo_maps.USA_CONTINENTAL_GEO_MAP.long_lat_deg_to_coords( -100.0, 40.0 )
+
+        metrics = instrumentation.enable()
+        self.assertIs( metrics, instrumentation.get_instrumentation() )
+        self.assertIsNot( original_method, geo_maps.GeoMap.long_lat_deg_to_coords )
+        self.assertEqual( expected_coords, geo_maps.USA_CONTINENTAL_GEO_MAP.long_lat_deg_to_coords( -100.0, 40.0 ))
+
+        self.assertIs( metrics, instrumentation.disable() )
+        self.assertIs( original_method, geo_maps.GeoMap.long_lat_deg_to_coords )
+        geo_maps.USA_CONTINENTAL_GEO_MAP.long_lat_deg_to_coords( -100.0, 40.0 )
+
+        labels = ( ( 'function', 'GeoMap.long_lat_deg_to_coords' ), )
+        self.assertEqual( 1, metrics.get_counter( instrumentation.CALLS_METRIC, labels ))
+        self.assertEqual( 1, metrics.get_histogram( instrumentation.CALL_SECONDS_METRIC, labels ).count )
+        # The projection call underneath is counted too
+        self.assertEqual( 1, metrics.get_counter( instrumentation.CALLS_METRIC,
+                                                  ( ( 'function', 'AlbersMapProjection.x_y_from_deg' ), )))
+        return
+
+    def test_routing_stats(self):
+
+        metrics = instrumentation.enable()
+        composite_map = geo_maps.UsaContinentalCompositeGeoMap
+
+        # Continental, Alaska, Hawaii, and two outside all bounds (Europe, mid Pacific)
+        longitude_list = [ -100.0, -150.0, -157.86, 10.0, -140.0 ]
+        latitude_list = [ 40.0, 62.0, 21.31, 50.0, 30.0 ]
+        composite_map.long_lat_deg_to_coords_array( longitude_list, latitude_list )
+        composite_map.get_geo_map_for_point( longitude_deg = 10.0, latitude_deg = 50.0 )
+        composite_map.get_geo_map_for_point( -100.0, 40.0 )
+
+        routing_stats = metrics.get_routing_stats( composite_map.map_id )
+        self.assertEqual( { 0: 5, 1: 1, 2: 1 }, routing_stats['routed_count_dict'] )
+        self.assertEqual( 3, routing_stats['fallthrough_count'] )
+        self.assertAlmostEqual( 3.0 / 7.0, routing_stats['fallthrough_rate'] )
+
+        labels = ( ( 'function', 'CompositeGeoMap.long_lat_deg_to_coords_array' ), )
+        self.assertEqual( 5, metrics.get_counter( instrumentation.POINTS_METRIC, labels ))
+
+        # Frozen maps are instrumented as well
+        FrozenUsaContinentalCompositeGeoMap.get_geo_map_index_array( np.array([ 10.0 ]), np.array([ 50.0 ]) )
+        self.assertEqual( 4, metrics.get_routing_stats( composite_map.map_id )['fallthrough_count'] )
+        return
+
+    def test_sinks(self):
+
+        in_memory_sink = instrumentation.InMemorySink()
+        prometheus_out_fh = io.StringIO()
+        prometheus_sink = instrumentation.PrometheusTextSink( prometheus_out_fh )
+        metrics = instrumentation.enable( sink_list = [ in_memory_sink, prometheus_sink,
+                                                        instrumentation.LoggingSink() ] )
+
+        SvgMapRenderer( template_store = SvgTemplateStore() ).write_base_map(
+            composite_map = geo_maps.UsaContinentalCompositeGeoMap,
+            view_box = geo_maps.UsaContinentalCompositeGeoMap.default_view_box,
+            out_fh = io.BytesIO(),
+        )
+        metrics.flush()
+
+        counter_dict = in_memory_sink.snapshot['counters']
+        for function_name in [ 'SvgTemplateStore._read_template_bytes', 'SvgMapTemplate.__init__',
+                               'SvgMapRenderer.write_base_map', 'SvgMapRenderer.write_template' ]:
+            self.assertEqual( 1, counter_dict[( instrumentation.CALLS_METRIC, ( ( 'function', function_name ), ))] )
+            continue
+
+        text = prometheus_out_fh.getvalue()
+        self.assertEqual( text, prometheus_sink.text )
+        self.assertIn( '# TYPE geo_maps_call_seconds histogram', text )
+        self.assertIn( 'geo_maps_calls_total{function="SvgMapRenderer.write_base_map"} 1', text )
+        self.assertIn( 'geo_maps_call_seconds_bucket{function="SvgMapRenderer.write_base_map",le="+Inf"} 1', text )
+        self.assertIn( 'geo_maps_call_seconds_count{function="SvgMapRenderer.write_base_map"} 1', text )
+        return
+
+    def test_histogram(self):
+
+        histogram = instrumentation.Histogram( [ 1.0, 2.0 ] )
+        for value in [ 0.5, 1.0, 1.5, 3.0 ]:
+            histogram.observe( value )
+            continue
+        self.assertEqual( [ ( 1.0, 2 ), ( 2.0, 3 ), ( float('inf'), 4 ) ], histogram.get_cumulative_buckets() )
+        self.assertEqual( 6.0, histogram.sum )
+        return
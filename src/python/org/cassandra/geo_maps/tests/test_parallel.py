@@ -0,0 +1,73 @@
+import copy
+import logging
+import unittest
+
+import numpy as np
+
+import org.cassandra.geo_maps.geo_maps as geo_maps
+from org.cassandra.geo_maps.parallel import ParallelMapExecutor
+from org.cassandra.geo_maps.svg_paths import SvgMapTemplate
+from org.cassandra.geo_maps.svg_templates import DEFAULT_SVG_TEMPLATE_STORE
+
+logging.disable(logging.CRITICAL)
+
+
+class FailingCompositeGeoMap(geo_maps.CompositeGeoMap):
+
+    def get_geo_map_index_array( self, longitude_deg, latitude_deg ):
+        raise ValueError( 'Routing failed.' )
+
+
+class ParallelMapExecutorTestCase(unittest.TestCase):
+
+    def test_project(self):
+
+        composite_map = geo_maps.UsaContinentalCompositeGeoMap
+        rng = np.random.default_rng( 31 )
+        longitude_array = rng.uniform( -170.0, -65.0, 10001 )
+        latitude_array = rng.uniform( 18.0, 70.0, 10001 )
+
+        with ParallelMapExecutor( composite_map, max_workers = 3, min_shard_size = 1000 ) as parallel_executor:
+            self.assertEqual( 3, len( parallel_executor.get_shard_list( 10001 )))
+            x_array, y_array, geo_map_index_array = parallel_executor.project( longitude_array, latitude_array )
+
+            # Small inputs are done in process
+            small_x_array, _, _ = parallel_executor.project( longitude_array[:10], latitude_array[:10] )
+
+        expected_x_array, expected_y_array = composite_map.long_lat_deg_to_coords_array( longitude_array,
+                                                                                         latitude_array )
+        self.assertTrue( np.array_equal( expected_x_array, x_array ))
+        self.assertTrue( np.array_equal( expected_y_array, y_array ))
+        self.assertTrue( np.array_equal( composite_map.get_geo_map_index_array( longitude_array, latitude_array ),
+                                         geo_map_index_array ))
+        self.assertTrue( np.array_equal( expected_x_array[:10], small_x_array ))
+        return
+
+    def test_project__worker_error(self):
+
+        # The worker's exception comes through, rather than a BufferError from the cleanup.
+        # A copy of the GeoMap, so that the shared one's view box is not given this map id.
+        composite_map = FailingCompositeGeoMap( map_id = 99,
+                                                geo_map_list = [ copy.deepcopy( geo_maps.USA_CONTINENTAL_GEO_MAP ) ] )
+        with ParallelMapExecutor( composite_map, max_workers = 2, min_shard_size = 10 ) as parallel_executor:
+            with self.assertRaisesRegex( ValueError, 'Routing failed' ):
+                parallel_executor.project( np.full( 100, -100.0 ), np.full( 100, 40.0 ))
+        self.assertEqual( geo_maps.UsaContinentalCompositeGeoMap.map_id,
+                          geo_maps.USA_CONTINENTAL_GEO_MAP.view_box.map_id )
+        return
+
+    def test_parse_map_template(self):
+
+        composite_map = geo_maps.UsaContinentalCompositeGeoMap
+        template_bytes = DEFAULT_SVG_TEMPLATE_STORE.get_template_bytes(
+            geo_maps.USA_CONTINENTAL_GEO_MAP.svg_template_name )
+
+        with ParallelMapExecutor( composite_map, max_workers = 2 ) as parallel_executor:
+            map_template = parallel_executor.parse_map_template( template_bytes )
+
+        expected_map_template = SvgMapTemplate( template_bytes )
+        self.assertEqual( len(expected_map_template.path_list), len(map_template.path_list) )
+        for expected_path, path in zip( expected_map_template.path_list, map_template.path_list ):
+            self.assertEqual( expected_path.lod_element_bytes_list, path.lod_element_bytes_list )
+            continue
+        return
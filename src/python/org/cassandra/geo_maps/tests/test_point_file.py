@@ -0,0 +1,86 @@
+import dataclasses
+import logging
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+import org.cassandra.geo_maps.geo_maps as geo_maps
+from org.cassandra.geo_maps.point_file import (
+    PointFile,
+    PointFileWriter,
+    load_point_file,
+    write_point_file,
+)
+
+logging.disable(logging.CRITICAL)
+
+
+class PointFileTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._filename = os.path.join( self._temp_dir.name, 'points.bin' )
+        rng = np.random.default_rng( 23 )
+        self._longitude_array = np.concatenate([ rng.uniform( -124.0, -67.0, 997 ), [ -149.9, -157.86 ] ])
+        self._latitude_array = np.concatenate([ rng.uniform( 25.0, 49.0, 997 ), [ 61.22, 21.31 ] ])
+        return
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+        return
+
+    def test_write_and_load(self):
+
+        composite_map = geo_maps.UsaContinentalCompositeGeoMap
+        write_point_file( self._filename, composite_map, self._longitude_array, self._latitude_array )
+
+        point_file = load_point_file( self._filename, composite_map )
+        self.assertEqual( 999, len(point_file) )
+        self.assertIsInstance( point_file.x_array, np.memmap )
+
+        x, y = composite_map.long_lat_deg_to_coords_array( self._longitude_array, self._latitude_array )
+        self.assertTrue( np.array_equal( self._longitude_array, point_file.longitude_array ))
+        self.assertTrue( np.array_equal( x, point_file.x_array ))
+        self.assertTrue( np.array_equal( y, point_file.y_array ))
+        self.assertEqual( [ 1, 2 ], point_file.geo_map_index_array[-2:].tolist() )
+        self.assertEqual( composite_map.map_id, point_file.signature['map_id'] )
+        self.assertAlmostEqual( geo_maps.USA_CONTINENTAL_PROJECTION.rho_0,
+                                point_file.signature['geo_map_list'][0]['projection']['rho_0'] )
+        return
+
+    def test_writer_chunks__float32(self):
+
+        composite_map = geo_maps.UsaContinentalCompositeGeoMap
+        with PointFileWriter( self._filename, composite_map, coordinate_dtype = np.float32 ) as writer:
+            for start in range( 0, 999, 250 ):
+                longitude_array = self._longitude_array[start:start + 250]
+                latitude_array = self._latitude_array[start:start + 250]
+                x, y = composite_map.long_lat_deg_to_coords_array( longitude_array, latitude_array )
+                geo_map_index_array = composite_map.get_geo_map_index_array( longitude_array, latitude_array )
+                writer.write_chunk( longitude_array, latitude_array, x, y, geo_map_index_array )
+                continue
+
+        point_file = PointFile( self._filename )
+        self.assertEqual( np.float32, point_file.y_array.dtype )
+        x, y = composite_map.long_lat_deg_to_coords_array( self._longitude_array, self._latitude_array )
+        self.assertTrue( np.allclose( y, point_file.y_array, atol = 1e-3 ))
+        return
+
+    def test_load_point_file__stale(self):
+
+        composite_map = geo_maps.UsaContinentalCompositeGeoMap
+        write_point_file( self._filename, composite_map, self._longitude_array, self._latitude_array )
+
+        changed_geo_map = dataclasses.replace( geo_maps.HAWAII_CONTINENTAL_GEO_MAP, display_x_offset = 330.0 )
+        changed_composite_map = geo_maps.CompositeGeoMap(
+            map_id = composite_map.map_id,
+            geo_map_list = [ geo_maps.USA_CONTINENTAL_GEO_MAP, geo_maps.ALASKA_CONTINENTAL_GEO_MAP,
+                             changed_geo_map ],
+        )
+        self.assertFalse( PointFile( self._filename ).is_valid_for( changed_composite_map ))
+        self.assertIsNone( load_point_file( self._filename, changed_composite_map ))
+        self.assertFalse( os.path.exists( self._filename ))
+        self.assertIsNone( load_point_file( self._filename, composite_map ))
+        return
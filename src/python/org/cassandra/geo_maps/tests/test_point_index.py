@@ -0,0 +1,81 @@
+import logging
+import unittest
+
+import numpy as np
+
+import org.cassandra.geo_maps.geo_maps as geo_maps
+from org.cassandra.geo_maps.point_index import ProjectedPointIndex
+from org.cassandra.geo_maps.view_box import ViewBox
+
+logging.disable(logging.CRITICAL)
+
+
+class ProjectedPointIndexTestCase(unittest.TestCase):
+
+    def _get_expected_ids( self, point_index, point_ids, view_box ):
+        x_array, y_array = point_index.get_coords( point_ids )
+        is_inside = ( ( x_array >= view_box.min_x ) & ( x_array <= view_box.max_x )
+                      & ( y_array >= view_box.min_y ) & ( y_array <= view_box.max_y ))
+        return sorted( point_ids[is_inside].tolist() )
+    
+    def test_query_view_box(self):
+
+        rng = np.random.default_rng( 17 )
+        point_index = ProjectedPointIndex( composite_map = geo_maps.UsaContinentalCompositeGeoMap,
+                                           max_leaf_points = 16 )
+
+        # Several batches, including points far outside the map area
+        point_ids = np.concatenate([
+            point_index.add_points( rng.uniform( -125.0, -67.0, 3000 ), rng.uniform( 25.0, 49.0, 3000 )),
+            point_index.add_points( rng.uniform( -180.0, -130.0, 500 ), rng.uniform( 51.0, 71.0, 500 )),
+            point_index.add_points( [ 2.35, 139.69 ], [ 48.86, 35.69 ] ),
+        ])
+        point_ids = np.append( point_ids, point_index.add_point( -73.9249, 40.6943 ))
+        self.assertEqual( 3503, len(point_index) )
+
+        view_box_list = [
+            ViewBox( x = 0.0, y = 0.0, width = 958.0, height = 602.0 ),
+            ViewBox( x = 616.86, y = 114.62, width = 324.01, height = 203.61 ),
+            ViewBox( x = 100.0, y = 450.0, width = 150.0, height = 100.0 ),
+            ViewBox( x = -5000.0, y = -5000.0, width = 20000.0, height = 20000.0 ),
+            ViewBox( x = 2000.0, y = 2000.0, width = 10.0, height = 10.0 ),
+        ]
+        for view_box in view_box_list:
+            self.assertEqual( self._get_expected_ids( point_index, point_ids, view_box ),
+                              point_index.query_view_box( view_box ).tolist(), f'{view_box}' )
+            continue
+
+        # Remove most points (merging quadtree nodes) and re-check
+        removed_ids = point_ids[:3200]
+        self.assertEqual( 3200, point_index.remove_points( removed_ids ))
+        self.assertEqual( 0, point_index.remove_points( removed_ids[:10] ))
+        self.assertFalse( point_index.remove_point( int( removed_ids[0] )))
+        self.assertEqual( 303, len(point_index) )
+        
+        remaining_ids = point_ids[3200:]
+        for view_box in view_box_list:
+            self.assertEqual( self._get_expected_ids( point_index, remaining_ids, view_box ),
+                              point_index.query_view_box( view_box ).tolist(), f'{view_box}' )
+            continue
+
+        longitude_array, latitude_array = point_index.get_long_lat( remaining_ids[-1:] )
+        self.assertAlmostEqual( -73.9249, longitude_array[0] )
+        self.assertAlmostEqual( 40.6943, latitude_array[0] )
+        return
+
+    def test_add_points__not_finite(self):
+
+        point_index = ProjectedPointIndex( geo_maps.UsaContinentalCompositeGeoMap )
+        point_ids = point_index.add_points( [ -100.0, np.nan, -90.0, np.inf ], [ 40.0, 35.0, np.nan, 30.0 ] )
+        self.assertEqual( [ 0, 1, 2, 3 ], point_ids.tolist() )
+        self.assertEqual( 1, len(point_index) )
+        self.assertEqual( [ 0 ], point_index.query_view_box( ViewBox( -1e9, -1e9, 2e9, 2e9 )).tolist() )
+
+        # Only finite points grow the root, and the others cannot be removed again
+        self.assertEqual( 0, point_index.remove_points( [ 1, 2, 3 ] ))
+        self.assertEqual( 0, len( point_index.add_points( [], [] )))
+        self.assertEqual( 4, point_index.add_point( np.nan, np.nan ))
+        self.assertEqual( 1, len(point_index) )
+        self.assertTrue( point_index.remove_point( 0 ))
+        self.assertEqual( 0, len(point_index) )
+        return
@@ -0,0 +1,164 @@
+import io
+import json
+import logging
+import pathlib
+import tempfile
+import unittest
+
+import numpy as np
+
+import org.cassandra.geo_maps.geo_maps as geo_maps
+from org.cassandra.geo_maps.point_reader import (
+    StreamingProjector,
+    read_csv_chunks,
+    read_geojson_chunks,
+    read_ndjson_chunks,
+)
+
+logging.disable(logging.CRITICAL)
+
+
+POINT_LIST = [
+    ( -73.9249, 40.6943 ),
+    ( -71.0846, 42.3188 ),
+    ( -76.6144, 39.3051 ),
+    ( -87.6861, 41.8373 ),
+    ( -149.9003, 61.2181 ),
+    ( -157.8583, 21.3069 ),
+    ( -104.9903, 39.7392 ),
+]
+
+
+class PointReaderTestCase(unittest.TestCase):
+
+    def _assert_chunks( self, chunk_list, chunk_size ):
+        self.assertEqual( [ chunk_size ] * ( len(POINT_LIST) // chunk_size )
+                          + ( [ len(POINT_LIST) % chunk_size ] if len(POINT_LIST) % chunk_size else [] ),
+                          [ len(longitude_array) for longitude_array, _ in chunk_list ] )
+        self.assertEqual( [ x[0] for x in POINT_LIST ],
+                          np.concatenate( [ x[0] for x in chunk_list ] ).tolist() )
+        self.assertEqual( [ x[1] for x in POINT_LIST ],
+                          np.concatenate( [ x[1] for x in chunk_list ] ).tolist() )
+        return
+
+    def test_read_csv_chunks(self):
+
+        csv_text = 'label,latitude,longitude\n' + ''.join( f'p{idx},{latitude},{longitude}\n'
+                                                         for idx, ( longitude, latitude )
+                                                         in enumerate( POINT_LIST ))
+        self._assert_chunks( list( read_csv_chunks( io.StringIO( csv_text ), chunk_size = 3 )), 3 )
+
+        with self.assertRaises( ValueError ):
+            list( read_csv_chunks( io.StringIO( csv_text + 'bad,x,1.0\n' )))
+        chunk_list = list( read_csv_chunks( io.StringIO( csv_text + 'bad,x,1.0\n\n' ), skip_invalid = True ))
+        self._assert_chunks( chunk_list, 100000 )
+
+        # Invalid rows part way through a chunk, and file paths.
+        invalid_csv_text = csv_text.replace( '\np3,', '\nbad,x,1.0\np3,' )
+        chunk_list = list( read_csv_chunks( io.StringIO( invalid_csv_text ), chunk_size = 3, skip_invalid = True ))
+        self._assert_chunks( chunk_list, 3 )
+        with tempfile.TemporaryDirectory() as temp_directory:
+            csv_path = pathlib.Path( temp_directory ) / 'points.csv'
+            csv_path.write_text( csv_text )
+            self._assert_chunks( list( read_csv_chunks( csv_path, chunk_size = 3 )), 3 )
+
+        # Quoted fields spanning lines, wherever the chunks end.
+        multi_line_csv_text = csv_text.replace( 'p2,', '"multi\nline, label",' ).replace( 'p4,', '"a\n""b""\nc",' )
+        for chunk_size in range( 1, 10 ):
+            chunk_list = list( read_csv_chunks( io.StringIO( multi_line_csv_text ), chunk_size = chunk_size ))
+            self.assertEqual( [ x[0] for x in POINT_LIST ], np.concatenate( [ x[0] for x in chunk_list ] ).tolist() )
+            self.assertLessEqual( max( len(x[0]) for x in chunk_list ), chunk_size )
+            continue
+
+        # Other csv options are not ignored.
+        spaced_csv_text = csv_text.replace( ',', ', ' ).replace( 'p3, ', '"p, 3", ' )
+        chunk_list = list( read_csv_chunks( io.StringIO( spaced_csv_text ), chunk_size = 3, skipinitialspace = True ))
+        self._assert_chunks( chunk_list, 3 )
+        with self.assertRaisesRegex( ValueError, 'line 9' ):
+            list( read_csv_chunks( io.StringIO( spaced_csv_text + 'bad, x, 1.0\n' ), skipinitialspace = True ))
+        return
+
+    def test_read_ndjson_chunks(self):
+
+        lines = list()
+        for idx, ( longitude, latitude ) in enumerate( POINT_LIST ):
+            if idx % 2:
+                lines.append( json.dumps( { 'lon': longitude, 'lat': latitude } ))
+            else:
+                lines.append( '\x1e' + json.dumps( { 'type': 'Feature', 'properties': {},
+                                                     'geometry': { 'type': 'Point',
+                                                                   'coordinates': [ longitude, latitude ] } } ))
+            continue
+        ndjson_text = '\n'.join( lines ) + '\n\n'
+        chunk_list = list( read_ndjson_chunks( io.StringIO( ndjson_text ),
+                                               longitude_key = 'lon', latitude_key = 'lat', chunk_size = 2 ))
+        self._assert_chunks( chunk_list, 2 )
+
+        invalid_ndjson_text = ndjson_text.replace( '\n', '\n{"lon": tru}\n', 1 )
+        with self.assertRaisesRegex( ValueError, 'line 2' ):
+            list( read_ndjson_chunks( io.StringIO( invalid_ndjson_text ), longitude_key = 'lon', latitude_key = 'lat' ))
+        chunk_list = list( read_ndjson_chunks( io.StringIO( invalid_ndjson_text ), longitude_key = 'lon',
+                                               latitude_key = 'lat', chunk_size = 2, skip_invalid = True ))
+        self._assert_chunks( chunk_list, 2 )
+        return
+
+    def test_read_geojson_chunks(self):
+
+        feature_list = [ { 'type': 'Feature',
+                           'properties': { 'name': f'p{idx}' },
+                           'geometry': { 'type': 'Point', 'coordinates': [ longitude, latitude ] } }
+                         for idx, ( longitude, latitude ) in enumerate( POINT_LIST[:5] ) ]
+        feature_list.append( { 'type': 'Feature', 'properties': None,
+                               'geometry': { 'type': 'MultiPoint',
+                                             'coordinates': [ list( x ) for x in POINT_LIST[5:] ] } } )
+        geojson_text = json.dumps( { 'type': 'FeatureCollection', 'features': feature_list }, indent = 2 )
+
+        # Small reads force features to span buffer refills
+        chunk_list = list( read_geojson_chunks( io.StringIO( geojson_text ), chunk_size = 4, read_size = 7 ))
+        self._assert_chunks( chunk_list, 4 )
+
+        with self.assertRaises( ValueError ):
+            list( read_geojson_chunks( io.StringIO( geojson_text[:-20] ), read_size = 64 ))
+
+        # The same points, wherever the reads end (e.g., part way through a number).
+        for read_size in range( 1, len(geojson_text) + 2 ):
+            chunk_list = list( read_geojson_chunks( io.StringIO( geojson_text ), chunk_size = 4, read_size = read_size ))
+            self._assert_chunks( chunk_list, 4 )
+            continue
+
+        # A malformed feature is reported (or skipped) where it is, without reading ahead.
+        bad_geojson_text = geojson_text.replace( '"type": "Feature"', '"bad": tru', 1 )
+        with self.assertRaisesRegex( ValueError, 'Invalid GeoJSON feature' ):
+            list( read_geojson_chunks( io.StringIO( bad_geojson_text ), read_size = 7 ))
+        chunk_list = list( read_geojson_chunks( io.StringIO( bad_geojson_text ), skip_invalid = True, read_size = 7 ))
+        self.assertEqual( [ x[0] for x in POINT_LIST[1:] ], np.concatenate( [ x[0] for x in chunk_list ] ).tolist() )
+        return
+
+    def test_StreamingProjector(self):
+
+        composite_map = geo_maps.UsaContinentalCompositeGeoMap
+        chunk_iter = ( ( np.array( [ x[0] for x in POINT_LIST[idx:idx + 2] ] ),
+                         np.array( [ x[1] for x in POINT_LIST[idx:idx + 2] ] ) )
+                       for idx in range( 0, len(POINT_LIST), 2 ) )
+        projector = StreamingProjector( composite_map = composite_map )
+        projected_chunk_list = list( projector.project_chunks( chunk_iter ))
+
+        self.assertEqual( len(POINT_LIST), projector.point_count )
+        self.assertEqual( [ 0, 0, 0, 0, 1, 2, 0 ],
+                          np.concatenate( [ x.geo_map_index_array for x in projected_chunk_list ] ).tolist() )
+
+        x_array = np.concatenate( [ x.x_array for x in projected_chunk_list ] )
+        y_array = np.concatenate( [ x.y_array for x in projected_chunk_list ] )
+        for ( longitude, latitude ), x, y in zip( POINT_LIST, x_array, y_array ):
+            geo_map = composite_map.get_geo_map_for_point( longitude_deg = longitude, latitude_deg = latitude )
+            expected_x, expected_y = geo_map.long_lat_deg_to_coords( longitude_deg = longitude,
+                                                                     latitude_deg = latitude )
+            self.assertAlmostEqual( expected_x, x, 8 )
+            self.assertAlmostEqual( expected_y, y, 8 )
+            continue
+
+        self.assertAlmostEqual( -157.8583, projector.geo_bounds.longitude_min )
+        self.assertAlmostEqual( 61.2181, projector.geo_bounds.latitude_max )
+        self.assertAlmostEqual( float( x_array.min() ), projector.display_bounds.x_min )
+        self.assertAlmostEqual( float( y_array.max() ), projector.display_bounds.y_max )
+        return
@@ -0,0 +1,102 @@
+import dataclasses
+import logging
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+import org.cassandra.geo_maps.geo_maps as geo_maps
+from org.cassandra.geo_maps.projection_table import ProjectionTable, load_projection_table
+
+logging.disable(logging.CRITICAL)
+
+
+class ProjectionTableTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._filename = os.path.join( self._temp_dir.name, 'table.bin' )
+        return
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+        return
+
+    def _get_random_points( self, geo_map, point_count = 20000 ):
+        rng = np.random.default_rng( 31 )
+        geo_bounds = geo_map.geo_bounds
+        return ( rng.uniform( geo_bounds.longitude_min, geo_bounds.longitude_max, point_count ),
+                 rng.uniform( geo_bounds.latitude_min, geo_bounds.latitude_max, point_count ) )
+
+    def test_error_within_bound(self):
+
+        for geo_map in [ geo_maps.USA_CONTINENTAL_GEO_MAP,
+                         geo_maps.ALASKA_CONTINENTAL_GEO_MAP,
+                         geo_maps.HAWAII_CONTINENTAL_GEO_MAP ]:
+            longitude_array, latitude_array = self._get_random_points( geo_map )
+            exact_x, exact_y = geo_map.long_lat_deg_to_coords_array( longitude_array, latitude_array )
+
+            previous_max_error = None
+            for step_deg in [ 0.5, 0.05 ]:
+                projection_table = ProjectionTable.build( geo_map, step_deg = step_deg )
+                x, y = projection_table.long_lat_deg_to_coords_array( longitude_array, latitude_array )
+                self.assertLessEqual( np.hypot( x - exact_x, y - exact_y ).max(), projection_table.max_error )
+                if previous_max_error is not None:
+                    # A tenth of the step is about a hundredth of the error.
+                    self.assertLess( projection_table.max_error, previous_max_error / 50.0 )
+                previous_max_error = projection_table.max_error
+                continue
+            continue
+        return
+
+    def test_grid_points_and_outside_points(self):
+
+        geo_map = geo_maps.USA_CONTINENTAL_GEO_MAP
+        projection_table = ProjectionTable.build( geo_map, step_deg = 0.5 )
+        geo_bounds = geo_map.geo_bounds
+
+        # Grid points need no interpolation.
+        longitude, latitude = geo_bounds.longitude_min + 1.0, geo_bounds.latitude_min + 1.5
+        x, y = projection_table.long_lat_deg_to_coords_array( longitude, latitude )
+        exact_x, exact_y = geo_map.long_lat_deg_to_coords( longitude, latitude )
+        self.assertAlmostEqual( exact_x, float( x ), 9 )
+        self.assertAlmostEqual( exact_y, float( y ), 9 )
+
+        # Outside the table (and NaN) are projected exactly.
+        longitude_array = np.array([ -100.0, 2.35, -149.9, np.nan ])
+        latitude_array = np.array([ 40.0, 48.86, 61.22, 40.0 ])
+        self.assertEqual( [ True, False, False, False ],
+                          projection_table.contains_point_array( longitude_array, latitude_array ).tolist() )
+        x, y = projection_table.long_lat_deg_to_coords_array( longitude_array, latitude_array )
+        exact_x, exact_y = geo_map.long_lat_deg_to_coords_array( longitude_array, latitude_array )
+        self.assertTrue( np.array_equal( exact_x[1:], x[1:], equal_nan = True ))
+        self.assertTrue( np.array_equal( exact_y[1:], y[1:], equal_nan = True ))
+        self.assertLessEqual( abs( exact_x[0] - x[0] ), projection_table.max_error )
+        return
+
+    def test_save_and_load(self):
+
+        geo_map = geo_maps.USA_CONTINENTAL_GEO_MAP
+        projection_table = ProjectionTable.build( geo_map, step_deg = 0.1 )
+        projection_table.save( self._filename )
+
+        loaded_table = load_projection_table( self._filename, geo_map )
+        self.assertIsInstance( loaded_table._table_dict['rho'], np.memmap )
+        self.assertEqual( projection_table.max_error, loaded_table.max_error )
+        self.assertEqual( projection_table.geo_bounds, loaded_table.geo_bounds )
+
+        longitude_array, latitude_array = self._get_random_points( geo_map, point_count = 1000 )
+        x, y = projection_table.long_lat_deg_to_coords_array( longitude_array, latitude_array )
+        loaded_x, loaded_y = loaded_table.long_lat_deg_to_coords_array( longitude_array, latitude_array )
+        self.assertTrue( np.array_equal( x, loaded_x ))
+        self.assertTrue( np.array_equal( y, loaded_y ))
+        del loaded_table
+
+        # Built for different map parameters, so stale.
+        changed_geo_map = dataclasses.replace( geo_map, display_x_offset = geo_map.display_x_offset + 1.0 )
+        self.assertIsNone( load_projection_table( self._filename, changed_geo_map, remove_stale = False ))
+        self.assertTrue( os.path.exists( self._filename ))
+        self.assertIsNone( load_projection_table( self._filename, changed_geo_map ))
+        self.assertFalse( os.path.exists( self._filename ))
+        return
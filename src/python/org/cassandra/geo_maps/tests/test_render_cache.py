@@ -0,0 +1,109 @@
+import hashlib
+import logging
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+import org.cassandra.geo_maps.geo_maps as geo_maps
+from org.cassandra.geo_maps.render_cache import RenderCache, get_points_digest, get_view_box_key
+from org.cassandra.geo_maps.svg_renderer import SvgMapRenderer
+from org.cassandra.geo_maps.view_box import ViewBox
+
+logging.disable(logging.CRITICAL)
+
+
+class RenderCacheTestCase(unittest.TestCase):
+
+    def test_get_key(self):
+
+        render_cache = RenderCache( view_box_decimals = 1 )
+        points_digest = get_points_digest( [ -100.0, -90.0 ], [ 40.0, 35.0 ] )
+        self.assertEqual( points_digest, get_points_digest( np.array([ -100.0, -90.0 ]), [ 40, 35 ] ))
+        self.assertNotEqual( points_digest, get_points_digest( [ -100.0, -90.0 ], [ 35.0, 40.0 ] ))
+
+        self.assertEqual( '0.0,1.2,100.0,50.0', get_view_box_key( ViewBox( -0.01, 1.23, 100.0, 50.0 ), decimals = 1 ))
+        key = render_cache.get_key( 1, ViewBox( 10.0, 20.0, 100.0, 50.0 ), points_digest )
+        self.assertEqual( key, render_cache.get_key( 1, ViewBox( 10.04, 19.96, 100.0, 50.0 ), points_digest ))
+        self.assertNotEqual( key, render_cache.get_key( 2, ViewBox( 10.0, 20.0, 100.0, 50.0 ), points_digest ))
+        self.assertNotEqual( key, render_cache.get_key( 1, ViewBox( 10.0, 20.0, 100.0, 50.0 ), '' ))
+        return
+
+    def test_get_or_render(self):
+
+        composite_map = geo_maps.UsaContinentalCompositeGeoMap
+        view_box = ViewBox( 400.0, 200.0, 200.0, 120.0 )
+        render_cache = RenderCache()
+        key = render_cache.get_key( composite_map.map_id, view_box )
+        render_count = 0
+
+        def render( out_fh ):
+            nonlocal render_count
+            render_count += 1
+            SvgMapRenderer().write_base_map( composite_map = composite_map, view_box = view_box, out_fh = out_fh )
+            return
+
+        content = render_cache.get_or_render( key, render )
+        self.assertIs( content, render_cache.get_or_render( key, render ))
+        self.assertEqual( 1, render_count )
+        self.assertEqual( ( 1, 1 ), ( render_cache.hit_count, render_cache.miss_count ))
+        self.assertEqual( len(content), render_cache.total_bytes )
+        return
+
+    def test_eviction_and_spill(self):
+
+        with tempfile.TemporaryDirectory() as spill_directory:
+            render_cache = RenderCache( max_bytes = 250, spill_directory = spill_directory, max_spill_bytes = 250 )
+            for key in [ 'a', 'b', 'c', 'd' ]:
+                render_cache.put( key, key.encode() * 100 )
+                continue
+
+            # Only two entries fit in memory, and two more in the spill directory
+            self.assertEqual( 2, len(render_cache) )
+            self.assertEqual( 2, render_cache.eviction_count )
+            self.assertEqual( 200, render_cache.total_bytes )
+            # Named for the hashes of the keys
+            self.assertEqual( sorted( f'{hashlib.sha256( key.encode() ).hexdigest()}.cache' for key in [ 'a', 'b' ] ),
+                              sorted( os.listdir( spill_directory )))
+
+            self.assertEqual( b'a' * 100, render_cache.get( 'a' ))
+            self.assertEqual( 1, render_cache.spill_hit_count )
+            self.assertIn( 'a', render_cache )
+            self.assertIsNone( render_cache.get( 'z' ))
+            self.assertEqual( 1, render_cache.miss_count )
+
+            # A new cache over the same directory picks up what was spilled
+            other_render_cache = RenderCache( spill_directory = spill_directory )
+            self.assertEqual( 200, other_render_cache.total_spill_bytes )
+            self.assertEqual( b'b' * 100, other_render_cache.get( 'b' ))
+
+            # ... and counts it toward max_spill_bytes, removing what does not fit
+            other_render_cache = RenderCache( spill_directory = spill_directory, max_spill_bytes = 150 )
+            self.assertEqual( 100, other_render_cache.total_spill_bytes )
+            self.assertEqual( 1, len(os.listdir( spill_directory )))
+
+            render_cache.invalidate()
+            self.assertEqual( 0, len(render_cache) )
+            self.assertEqual( [], os.listdir( spill_directory ))
+        return
+
+    def test_oversized_entries(self):
+
+        # Too big for memory, so spilled (or not cached at all without a spill directory)
+        render_cache = RenderCache( max_bytes = 250 )
+        render_cache.put( 'a', b'a' * 100 )
+        render_cache.put( 'b', b'b' * 300 )
+        self.assertEqual( ( 1, 100 ), ( len(render_cache), render_cache.total_bytes ))
+        self.assertIsNone( render_cache.get( 'b' ))
+
+        with tempfile.TemporaryDirectory() as spill_directory:
+            render_cache = RenderCache( max_bytes = 250, spill_directory = spill_directory )
+            render_cache.put( 'a', b'a' * 100 )
+            render_cache.put( 'b', b'b' * 300 )
+            self.assertIn( 'a', render_cache )
+            self.assertNotIn( 'b', render_cache )
+            self.assertEqual( b'b' * 300, render_cache.get( 'b' ))
+            self.assertEqual( b'b' * 300, render_cache.get( 'b' ))
+            self.assertEqual( ( 100, 300 ), ( render_cache.total_bytes, render_cache.total_spill_bytes ))
+        return
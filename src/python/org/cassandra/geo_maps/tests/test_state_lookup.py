@@ -0,0 +1,39 @@
+import logging
+import unittest
+
+import numpy as np
+
+import org.cassandra.geo_maps.geo_maps as geo_maps
+from org.cassandra.geo_maps.state_lookup import get_state_lookup
+
+logging.disable(logging.CRITICAL)
+
+
+class StateLookupTestCase(unittest.TestCase):
+
+    def test_get_state_id_array(self):
+
+        state_lookup = get_state_lookup( geo_maps.UsaContinentalCompositeGeoMap )
+        self.assertIs( state_lookup, get_state_lookup( geo_maps.UsaContinentalCompositeGeoMap ))
+        
+        point_list = [
+            ( -73.9249, 40.6943, 'NY' ),
+            ( -87.6861, 41.8373, 'IL' ),
+            ( -104.9903, 39.7392, 'CO' ),
+            ( -97.7431, 30.2672, 'TX' ),
+            ( -122.4194, 37.7749, 'CA' ),
+            ( -71.4128, 41.8240, 'RI' ),
+            ( -85.0, 44.0, 'MI' ),      # Lower peninsula of Michigan
+            ( -87.5, 46.4, 'MI' ),      # Upper peninsula of Michigan
+            ( -87.0, 43.0, None ),      # Lake Michigan
+            ( -70.0, 35.0, None ),      # Atlantic
+            ( 2.3522, 48.8566, None ),  # Paris
+        ]
+        state_id_array = state_lookup.get_state_id_array(
+            longitude_deg = np.array( [ x[0] for x in point_list ] ),
+            latitude_deg = np.array( [ x[1] for x in point_list ] ),
+        )
+        self.assertEqual( [ x[2] for x in point_list ], list( state_id_array ))
+        
+        self.assertEqual( 'CO', state_lookup.get_state_id( longitude_deg = -105.0, latitude_deg = 39.0 ))
+        return
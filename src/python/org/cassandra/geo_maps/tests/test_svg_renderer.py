@@ -0,0 +1,135 @@
+import io
+import logging
+import unittest
+
+import numpy as np
+
+import org.cassandra.geo_maps.geo_maps as geo_maps
+from org.cassandra.geo_maps.path_simplify import simplify_douglas_peucker, simplify_ring
+from org.cassandra.geo_maps.svg_paths import SvgMapTemplate, get_path_d, parse_path_d
+from org.cassandra.geo_maps.svg_renderer import SvgMapRenderer
+from org.cassandra.geo_maps.svg_templates import DEFAULT_SVG_TEMPLATE_STORE
+from org.cassandra.geo_maps.view_box import ViewBox
+
+logging.disable(logging.CRITICAL)
+
+
+class SvgRendererTestCase(unittest.TestCase):
+
+    def test_parse_path_d(self):
+
+        subpath_list = parse_path_d( 'm 10,20 5,0 0,5 z M 100,100 L 110,100 l 0,10 h -10 Z' )
+        self.assertEqual( 2, len(subpath_list) )
+        self.assertEqual( [ [ 10, 20 ], [ 15, 20 ], [ 15, 25 ], [ 10, 20 ] ],
+                          subpath_list[0].tolist() )
+        self.assertEqual( [ [ 100, 100 ], [ 110, 100 ], [ 110, 110 ], [ 100, 110 ], [ 100, 100 ] ],
+                          subpath_list[1].tolist() )
+
+        subpath_list = parse_path_d( 'm 0,0 c 1,1 2,2 3,3 l 1,0' )
+        self.assertEqual( [ [ 0, 0 ], [ 3, 3 ], [ 4, 3 ] ], subpath_list[0].tolist() )
+        return
+
+    def test_SvgMapTemplate__translate(self):
+
+        map_template = SvgMapTemplate(
+            b'<g transform="translate(-32)"><g class="state">\n'
+            b'<path id="A" d="m 40,0 10,0 0,10 z"></path>\n'
+            b'<path id="B" d="m 140,0 10,0 0,10 z"/>\n'
+            b'</g></g>' )
+        self.assertEqual( ( -32.0, 0.0 ), map_template.translate )
+        self.assertEqual( [ 'A', 'B' ], [ x.path_id for x in map_template.path_list ] )
+        self.assertEqual( 8.0, map_template.path_list[0].display_bounds.x_min )
+        self.assertEqual( 18.0, map_template.path_list[0].display_bounds.x_max )
+
+        visible_path_list = map_template.get_visible_path_list( ViewBox( x = 0, y = 0, width = 10, height = 10 ))
+        self.assertEqual( [ 'A' ], [ x.path_id for x in visible_path_list ] )
+        visible_path_list = map_template.get_visible_path_list( ViewBox( x = 20, y = 0, width = 10, height = 10 ))
+        self.assertEqual( [], visible_path_list )
+        return
+
+    def test_write_base_map__clipped(self):
+
+        composite_map = geo_maps.UsaContinentalCompositeGeoMap
+        map_template = DEFAULT_SVG_TEMPLATE_STORE.get_map_template( 'usa_continental.svg' )
+        self.assertEqual( 50, len(map_template.path_list) )
+        
+        renderer = SvgMapRenderer()
+
+        out_fh = io.BytesIO()
+        renderer.write_base_map( composite_map = composite_map, view_box = None, out_fh = out_fh )
+        full_svg = out_fh.getvalue()
+        self.assertEqual( 50, full_svg.count( b'<path' ))
+        self.assertTrue( full_svg.startswith( b'<g transform="translate(-32)"' ))
+        self.assertTrue( full_svg.rstrip().endswith( b'</g>' ))
+
+        # Zoomed in on the northeast
+        x, y = composite_map.get_geo_map_for_point( -73.9, 40.7 ).long_lat_deg_to_coords( -73.9, 40.7 )
+        view_box = ViewBox( x = x - 20.0, y = y - 20.0, width = 40.0, height = 40.0 )
+        out_fh = io.BytesIO()
+        renderer.write_base_map( composite_map = composite_map, view_box = view_box, out_fh = out_fh )
+        clipped_svg = out_fh.getvalue()
+        
+        self.assertIn( b'id="NY"', clipped_svg )
+        self.assertIn( b'id="NJ"', clipped_svg )
+        self.assertNotIn( b'id="CA"', clipped_svg )
+        self.assertNotIn( b'id="HI"', clipped_svg )
+        self.assertLess( len(clipped_svg), len(full_svg) / 4 )
+
+        # Text file objects are written via their buffer, if they have one
+        out_fh = io.TextIOWrapper( io.BytesIO(), encoding = 'utf-8' )
+        renderer.write_base_map( composite_map = composite_map, view_box = view_box, out_fh = out_fh )
+        self.assertEqual( clipped_svg, out_fh.buffer.getvalue() )
+        with self.assertRaisesRegex( ValueError, 'StringIO' ):
+            renderer.write_base_map( composite_map = composite_map, view_box = view_box, out_fh = io.StringIO() )
+        return
+
+    def test_simplify_douglas_peucker(self):
+
+        points = np.array( [ [ 0, 0 ], [ 1, 0.1 ], [ 2, -0.1 ], [ 3, 5 ], [ 4, 6 ], [ 5, 7 ] ], dtype = float )
+        self.assertEqual( [ [ 0, 0 ], [ 2, -0.1 ], [ 3, 5 ], [ 5, 7 ] ],
+                          simplify_douglas_peucker( points, 0.5 ).tolist() )
+        self.assertEqual( 6, len( simplify_douglas_peucker( points, 0.0 )))
+
+        ring = np.array( [ [ 0, 0 ], [ 5, 0.1 ], [ 10, 0 ], [ 10, 10 ], [ 0, 10 ], [ 0, 0 ] ], dtype = float )
+        self.assertEqual( [ [ 0, 0 ], [ 10, 0 ], [ 10, 10 ], [ 0, 10 ], [ 0, 0 ] ],
+                          simplify_ring( ring, 0.5 ).tolist() )
+        self.assertIsNone( simplify_ring( ring, 20.0 ))
+        return
+
+    def test_get_path_d(self):
+
+        subpath_list = parse_path_d( 'M 10.004,20 l 0.333,0 0.333,0 0.334,5 z M 1,1 2,2' )
+        d = get_path_d( subpath_list )
+        self.assertEqual( 'M10.00,20.00l 0.34,0.00 0.33,0.00 0.33,5.00zM1.00,1.00l 1.00,1.00', d )
+
+        # Relative offsets from rounded values do not drift
+        result_subpath_list = parse_path_d( d )
+        self.assertTrue( np.allclose( result_subpath_list[0][-2], [ 11.0, 25.0 ] ))
+        return
+
+    def test_write_base_map__level_of_detail(self):
+
+        composite_map = geo_maps.UsaContinentalCompositeGeoMap
+        map_template = DEFAULT_SVG_TEMPLATE_STORE.get_map_template( 'usa_continental.svg' )
+
+        self.assertIsNone( map_template.get_lod_level( 0.1 ))
+        self.assertEqual( 0, map_template.get_lod_level( 0.25 ))
+        self.assertEqual( 1, map_template.get_lod_level( 0.9 ))
+        self.assertEqual( 3, map_template.get_lod_level( 100.0 ))
+
+        svg_size_list = list()
+        for renderer in [ SvgMapRenderer( lod_pixel_tolerance = None ),
+                          SvgMapRenderer(),
+                          SvgMapRenderer( lod_pixel_tolerance = 4.0 ) ]:
+            out_fh = io.BytesIO()
+            renderer.write_base_map( composite_map = composite_map,
+                                     view_box = composite_map.default_view_box,
+                                     out_fh = out_fh )
+            svg_bytes = out_fh.getvalue()
+            self.assertEqual( 50, svg_bytes.count( b'<path' ))
+            svg_size_list.append( len(svg_bytes) )
+            continue
+
+        self.assertGreater( svg_size_list[0], svg_size_list[1] )
+        self.assertGreater( svg_size_list[1], svg_size_list[2] )
+        return
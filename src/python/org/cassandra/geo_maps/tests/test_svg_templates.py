@@ -0,0 +1,87 @@
+import io
+import logging
+import os
+import tempfile
+import unittest
+
+from org.cassandra.geo_maps.svg_templates import SvgTemplateStore
+
+logging.disable(logging.CRITICAL)
+
+
+class SvgTemplateStoreTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._template_directory = self._temp_dir.name
+        return
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+        return
+
+    def _write_template( self, svg_template_name, content, mtime_ns = None ):
+        filename = os.path.join( self._template_directory, svg_template_name )
+        with open( filename, 'w' ) as out_fh:
+            out_fh.write( content )
+        if mtime_ns is not None:
+            os.utime( filename, ns = ( mtime_ns, mtime_ns ))
+        return
+
+    def test_get_template_bytes__cached_until_changed(self):
+
+        store = SvgTemplateStore( template_directory = self._template_directory )
+        self._write_template( 'a.svg', '<g>a</g>', mtime_ns = 1000000000 )
+
+        template_bytes = store.get_template_bytes( 'a.svg' )
+        self.assertEqual( b'<g>a</g>', template_bytes )
+        self.assertIs( template_bytes, store.get_template_bytes( 'a.svg' ))
+
+        self._write_template( 'a.svg', '<g>b</g>', mtime_ns = 2000000000 )
+        self.assertEqual( b'<g>b</g>', store.get_template_bytes( 'a.svg' ))
+
+        store.invalidate( 'a.svg' )
+        self.assertNotIn( 'a.svg', store )
+        return
+
+    def test_get_template_bytes__lru_eviction(self):
+
+        store = SvgTemplateStore( template_directory = self._template_directory, max_templates = 2 )
+        for svg_template_name in [ 'a.svg', 'b.svg', 'c.svg' ]:
+            self._write_template( svg_template_name, svg_template_name )
+            continue
+
+        store.get_template_bytes( 'a.svg' )
+        store.get_template_bytes( 'b.svg' )
+        store.get_template_bytes( 'a.svg' )
+        store.get_template_bytes( 'c.svg' )
+
+        self.assertEqual( 2, len(store) )
+        self.assertIn( 'a.svg', store )
+        self.assertNotIn( 'b.svg', store )
+        self.assertIn( 'c.svg', store )
+
+        store.invalidate()
+        self.assertEqual( 0, len(store) )
+        return
+
+    def test_write_template(self):
+
+        store = SvgTemplateStore( template_directory = self._template_directory )
+        self._write_template( 'a.svg', '<g>a</g>' )
+
+        out_fh = io.BytesIO()
+        store.write_template( 'a.svg', out_fh )
+        self.assertEqual( b'<g>a</g>', out_fh.getvalue() )
+
+        out_fh = io.TextIOWrapper( io.BytesIO(), encoding = 'utf-8' )
+        out_fh.write( '<svg>' )
+        store.write_template( 'a.svg', out_fh )
+        out_fh.write( '</svg>' )
+        out_fh.flush()
+        self.assertEqual( b'<svg><g>a</g></svg>', out_fh.buffer.getvalue() )
+
+        # No binary buffer to write to
+        with self.assertRaisesRegex( ValueError, 'StringIO' ):
+            store.write_template( 'a.svg', io.StringIO() )
+        return
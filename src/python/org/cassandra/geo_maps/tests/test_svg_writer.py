@@ -0,0 +1,181 @@
+import gzip
+import io
+import logging
+import socket
+import unittest
+import zlib
+
+import numpy as np
+
+import org.cassandra.geo_maps.geo_maps as geo_maps
+from org.cassandra.geo_maps import great_circle
+from org.cassandra.geo_maps.svg_paths import parse_path_d
+from org.cassandra.geo_maps.svg_renderer import SvgMapRenderer
+from org.cassandra.geo_maps.svg_writer import SvgWriter, get_view_box_decimals
+from org.cassandra.geo_maps.view_box import ViewBox
+
+logging.disable(logging.CRITICAL)
+
+
+class CountingBytesIO(io.BytesIO):
+
+    def __init__(self):
+        super().__init__()
+        self.write_count = 0
+        return
+
+    def write( self, data ):
+        self.write_count += 1
+        return super().write( data )
+
+
+def get_dechunked_bytes( content : bytes ):
+    """ The data of HTTP chunked transfer encoded content, checking it is properly ended. """
+    data_list = list()
+    while True:
+        header, content = content.split( b'\r\n', 1 )
+        chunk_size = int( header, 16 )
+        if chunk_size == 0:
+            assert content == b'\r\n'
+            break
+        data_list.append( content[:chunk_size] )
+        assert content[chunk_size:chunk_size + 2] == b'\r\n'
+        content = content[chunk_size + 2:]
+        continue
+    return b''.join( data_list )
+
+
+class SvgWriterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._composite_map = geo_maps.UsaContinentalCompositeGeoMap
+        self._view_box = self._composite_map.default_view_box
+        return
+
+    def _write_base_map( self, svg_writer : SvgWriter ):
+        svg_writer.write_svg_start()
+        SvgMapRenderer().write_base_map( composite_map = self._composite_map,
+                                         view_box = self._view_box,
+                                         out_fh = svg_writer )
+        svg_writer.flush()
+        return
+
+    def _write_points( self, svg_writer : SvgWriter ):
+        rng = np.random.default_rng( 3 )
+        x_array = rng.uniform( 0, self._view_box.width, 5000 )
+        y_array = rng.uniform( 0, self._view_box.height, 5000 )
+        svg_writer.write_circles( x_array, y_array, radius = 2 )
+        svg_writer.write_svg_end()
+        svg_writer.close()
+        return
+
+    def _render( self, svg_writer : SvgWriter ):
+        self._write_base_map( svg_writer )
+        self._write_points( svg_writer )
+        return
+
+    def test_decimals(self):
+
+        self.assertEqual( 1, get_view_box_decimals( self._view_box, display_width = self._view_box.width ))
+        zoomed_view_box = ViewBox( x = 100, y = 100, width = 9.58, height = 6.02 )
+        self.assertEqual( 3, get_view_box_decimals( zoomed_view_box, display_width = self._view_box.width ))
+
+        out_fh = io.BytesIO()
+        with SvgWriter( out_fh, view_box = zoomed_view_box, display_width = self._view_box.width ) as svg_writer:
+            self.assertEqual( 3, svg_writer.decimals )
+            svg_writer.write_svg_start( { 'id': 'zoomed', 'class': 'geo-map' } )
+            svg_writer.write_circles( [ 101.23456789, -0.0001, np.nan ], [ 102.5, 0.0, 1.0 ], radius = 0.5,
+                                      attribute_dict = { 'class': '100% "red"' } )
+            svg_writer.write_texts( [ 101.0 ], [ 102.0 ], [ 'A & <B>' ] )
+            svg_writer.write_svg_end()
+        self.assertEqual(
+            '<svg id="zoomed" class="geo-map" xmlns="http://www.w3.org/2000/svg"'
+            ' viewBox="100.000 100.000 9.580 6.020">'
+            '<circle cx="101.235" cy="102.500" r="0.500" class="100% &quot;red&quot;"></circle>\n'
+            '<circle cx="0.000" cy="0.000" r="0.500" class="100% &quot;red&quot;"></circle>\n'
+            '<text x="101.000" y="102.000">A &amp; &lt;B&gt;</text>\n'
+            '</svg>',
+            out_fh.getvalue().decode() )
+        return
+
+    def test_buffering(self):
+
+        out_fh = io.BytesIO()
+        self._render( SvgWriter( out_fh, view_box = self._view_box ))
+        expected_bytes = out_fh.getvalue()
+        self.assertEqual( 5000, expected_bytes.count( b'<circle' ))
+        self.assertNotIn( b'.00', expected_bytes[-1000:] )
+
+        out_fh = CountingBytesIO()
+        svg_writer = SvgWriter( out_fh, view_box = self._view_box, buffer_size = 16 * 1024 )
+        self._render( svg_writer )
+        self.assertEqual( expected_bytes, out_fh.getvalue() )
+        self.assertEqual( len(expected_bytes), svg_writer.rendered_byte_count )
+        self.assertLessEqual( out_fh.write_count, len(expected_bytes) // ( 16 * 1024 ) + 4 )
+
+        with self.assertRaises( ValueError ):
+            svg_writer.write( b'<g></g>' )
+        return
+
+    def test_gzip_chunked_streaming(self):
+
+        out_fh = io.BytesIO()
+        self._render( SvgWriter( out_fh, view_box = self._view_box ))
+        expected_bytes = out_fh.getvalue()
+
+        out_fh = io.BytesIO()
+        svg_writer = SvgWriter( out_fh, view_box = self._view_box, gzip_level = 6, chunked = True )
+        self.assertIn( ( 'Content-Encoding', 'gzip' ), svg_writer.http_header_list )
+        self.assertIn( ( 'Transfer-Encoding', 'chunked' ), svg_writer.http_header_list )
+
+        # After a flush, what has been sent decompresses to everything written so far.
+        self._write_base_map( svg_writer )
+        partial_content = out_fh.getvalue()
+        partial_data = get_dechunked_bytes( partial_content + b'0\r\n\r\n' )
+        partial_bytes = zlib.decompressobj( 16 + zlib.MAX_WBITS ).decompress( partial_data )
+        self.assertEqual( svg_writer.rendered_byte_count, len(partial_bytes) )
+        self.assertTrue( expected_bytes.startswith( partial_bytes ))
+
+        self._write_points( svg_writer )
+        content = out_fh.getvalue()
+        self.assertEqual( expected_bytes, gzip.decompress( get_dechunked_bytes( content )) )
+        self.assertLess( svg_writer.sink_byte_count, len(expected_bytes) / 2 )
+        return
+
+    def test_socket_sink(self):
+
+        send_socket, receive_socket = socket.socketpair()
+        try:
+            with SvgWriter( send_socket, view_box = self._view_box, buffer_size = 1024 ) as svg_writer:
+                svg_writer.write_svg_start()
+                svg_writer.write_circles( [ 1.0, 2.0 ], [ 3.0, 4.0 ] )
+                svg_writer.write_svg_end()
+            send_socket.shutdown( socket.SHUT_WR )
+            received_bytes = b''.join( iter( lambda: receive_socket.recv( 4096 ), b'' ))
+        finally:
+            send_socket.close()
+            receive_socket.close()
+        self.assertTrue( received_bytes.endswith( b'<circle cx="2.0" cy="4.0" r="3.0"></circle>\n</svg>' ))
+
+        with self.assertRaises( ValueError ):
+            SvgWriter( object(), view_box = self._view_box )
+        with self.assertRaises( ValueError ):
+            SvgWriter( io.StringIO(), view_box = self._view_box )
+        return
+
+    def test_write_paths(self):
+
+        # Chicago to Denver, and nothing to draw.
+        subpath_list_list = great_circle.project_great_circle_arcs( self._composite_map,
+                                                                    41.88, -87.63, 39.74, -104.99,
+                                                                    tolerance = 0.5 )
+        out_fh = io.BytesIO()
+        with SvgWriter( out_fh, view_box = self._view_box ) as svg_writer:
+            svg_writer.write_paths( subpath_list_list + [ list() ], attribute_dict = { 'fill': 'none' } )
+        content = out_fh.getvalue().decode()
+        self.assertEqual( 1, content.count( '<path' ))
+        self.assertIn( 'fill="none"', content )
+        d = content.split( '"' )[1]
+        parsed_subpath, = parse_path_d( d )
+        self.assertLessEqual( np.abs( parsed_subpath[-1] - subpath_list_list[0][0][-1] ).max(), 0.05 + 1e-9 )
+        return
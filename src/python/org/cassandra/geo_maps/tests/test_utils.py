@@ -0,0 +1,69 @@
+import logging
+import unittest
+
+import numpy as np
+
+from org.cassandra.geo_maps import utils
+
+logging.disable(logging.CRITICAL)
+
+
+class UtilsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng( 61 )
+        self._lat_array = rng.uniform( -60.0, 70.0, 300 )
+        self._lng_array = rng.uniform( -179.0, 179.0, 300 )
+        return
+
+    def test_get_distance_array(self):
+
+        distance_array = utils.get_distance_array( 40.0, -100.0, self._lat_array, self._lng_array )
+        expected_list = [ utils.get_distance( 40.0, -100.0, lat, lng )
+                          for lat, lng in zip( self._lat_array.tolist(), self._lng_array.tolist() ) ]
+        self.assertTrue( np.allclose( expected_list, distance_array, rtol = 1e-12 ))
+
+        pair_distance_array = utils.get_distance_array( self._lat_array[:-1], self._lng_array[:-1],
+                                                        self._lat_array[1:], self._lng_array[1:], miles = False )
+        self.assertAlmostEqual( utils.get_distance( self._lat_array[5], self._lng_array[5],
+                                                    self._lat_array[6], self._lng_array[6], miles = False ),
+                                pair_distance_array[5], places = 6 )
+        return
+
+    def test_get_distance_matrix(self):
+
+        distance_matrix = utils.get_distance_matrix( self._lat_array[:40], self._lng_array[:40],
+                                                     self._lat_array, self._lng_array,
+                                                     max_block_elements = 1000 )
+        self.assertEqual( ( 40, 300 ), distance_matrix.shape )
+        for row in [ 0, 3, 39 ]:
+            expected_array = utils.get_distance_array( self._lat_array[row], self._lng_array[row],
+                                                       self._lat_array, self._lng_array )
+            self.assertTrue( np.allclose( expected_array, distance_matrix[row], rtol = 1e-12, atol = 1e-9 ))
+            continue
+        return
+
+    def test_get_indices_within_distance(self):
+
+        for latitude, longitude, distance_miles in [ ( 40.0, -100.0, 1500.0 ),
+                                                     ( 65.0, 170.0, 2000.0 ),
+                                                     ( -50.0, 0.0, 6000.0 ) ]:
+            distance_array = utils.get_distance_array( latitude, longitude, self._lat_array, self._lng_array )
+            expected_indices = np.flatnonzero( distance_array <= distance_miles )
+            self.assertTrue( expected_indices.size > 0 )
+            self.assertEqual( expected_indices.tolist(),
+                              utils.get_indices_within_distance( latitude, longitude, self._lat_array,
+                                                                 self._lng_array, distance_miles ).tolist() )
+            continue
+
+        geo_bounds = utils.get_radius_geo_bounds( 40.0, -100.0, 100.0 )
+        self.assertAlmostEqual( 100.0, utils.get_distance( 40.0, -100.0, geo_bounds.latitude_max, -100.0 ), places = 5 )
+        return
+
+    def test_get_miles_per_longitude(self):
+
+        self.assertAlmostEqual( utils.get_distance( 30.0, 0.0, 30.0, 1.0 ), utils.get_miles_per_longitude( 30.0 ))
+        self.assertTrue( np.allclose( [ utils.get_miles_per_longitude( 30.0 ), utils.get_miles_per_longitude( 60.0 ) ],
+                                      utils.get_miles_per_longitude_array( np.array([ 30.0, 60.0 ]) )))
+        self.assertAlmostEqual( 2.0, utils.get_longitude_span( 30.0, 2.0 * utils.get_miles_per_longitude( 30.0 )))
+        return
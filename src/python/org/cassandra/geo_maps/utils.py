@@ -1,5 +1,8 @@
+import functools
 import math
 
+import numpy as np
+
 MILES_PER_KM = 0.621371
 
 EARTH_RADIUS_AT_EQUATOR_KM = 6378.137
@@ -17,6 +20,10 @@ EARTH_RADIUS_AT_LAT_40_MILES = EARTH_RADIUS_AT_LAT_40_KM * MILES_PER_KM
 MILES_PER_LATITUDE_LINE = 69.44
 MILES_PER_LONGITUDE_LINE_AT_LAT_40 = 53.00
 
+# Limit on the number of elements in each block of a distance matrix
+# computation, bounding the temporary memory used.
+MAX_DISTANCE_BLOCK_ELEMENTS = 1 << 20
+
 
 def get_miles_per_latitude():
     """
@@ -26,14 +33,21 @@ def get_miles_per_latitude():
     return MILES_PER_LATITUDE_LINE
 
 
+@functools.lru_cache( maxsize = 4096 )
 def get_miles_per_longitude( reference_latitude : float = 40.0 ):
     """
     Return the number of miles in one line of the longitude meridian lines.
     This depends on the latitude, but if not provided, a nomial location is chosen.
+    Values are memoized per latitude.
     """
     return get_distance( lat1 = reference_latitude, lng1 = 0.0, lat2 = reference_latitude, lng2 = 1.0 )
 
 
+def get_miles_per_longitude_array( reference_latitude : np.ndarray ):
+    """ Batch version of get_miles_per_longitude(). """
+    return get_distance_array( reference_latitude, 0.0, reference_latitude, 1.0 )
+
+
 def get_latitude_span( distance_miles : float ):
     """
     Return the latitude increment value necessary to span the given number
@@ -52,7 +66,7 @@ def get_longitude_span( latitude : float, distance_miles : float ):
     # 57 miles for each longitude line at 35 degrees north
     if math.isclose( distance_miles, 0.0, rel_tol = 1e-8 ):
         return 0.0
-    miles_per_longitude_line = get_distance( latitude, 0.0, latitude, 1.0, miles=True )
+    miles_per_longitude_line = get_miles_per_longitude( reference_latitude = latitude )
     return float(distance_miles) / miles_per_longitude_line
 
 
@@ -78,4 +92,112 @@ def get_distance( lat1, lng1, lat2, lng2, miles=True ):
     else:
         return distance_km
 
-    
+
+def get_central_angle_array( lat1, lng1, lat2, lng2 ):
+    """
+    The angle (radians) between lat/lng coordinates, seen from the
+    earth's center, by the Haversine formula of get_distance(). The
+    arguments broadcast as for get_distance_array().
+    """
+    lat1 = np.radians( lat1 )
+    lat2 = np.radians( lat2 )
+    lat_dif = lat2 - lat1
+    lng_dif = np.radians( np.subtract( lng2, lng1 ))
+    a = np.sin( lat_dif / 2.0 )**2 + np.cos( lat1 ) * np.cos( lat2 ) * np.sin( lng_dif / 2.0 )**2
+    # Clipping guards against rounding taking a slightly above 1
+    return 2 * np.arcsin( np.sqrt( np.clip( a, 0.0, 1.0 )))
+
+
+def get_distance_array( lat1, lng1, lat2, lng2, miles=True ):
+    """
+    Array version of get_distance(). The arguments broadcast against
+    each other, e.g., scalar lat1/lng1 with arrays lat2/lng2 gives the
+    distances from one point to many, while equal length arrays give the
+    distance between each pair.
+    """
+    distance_km = EARTH_RADIUS_AT_LAT_40_KM * get_central_angle_array( lat1, lng1, lat2, lng2 )
+
+    if miles:
+        return distance_km * MILES_PER_KM
+    else:
+        return distance_km
+
+
+def get_distance_matrix( lat1, lng1, lat2, lng2, miles=True,
+                         max_block_elements : int = MAX_DISTANCE_BLOCK_ELEMENTS ):
+    """
+    The ( len(lat1), len(lat2) ) matrix of distances between each of the
+    first points and each of the second points. Computed a block of rows
+    at a time so the temporaries stay within max_block_elements.
+    """
+    lat1 = np.radians( np.asarray( lat1, dtype = np.float64 ))
+    lng1 = np.radians( np.asarray( lng1, dtype = np.float64 ))
+    lat2 = np.radians( np.asarray( lat2, dtype = np.float64 ))
+    lng2 = np.radians( np.asarray( lng2, dtype = np.float64 ))
+    cos_lat1 = np.cos( lat1 )
+    cos_lat2 = np.cos( lat2 )
+
+    distance_matrix = np.empty( ( lat1.size, lat2.size ), dtype = np.float64 )
+    block_rows = max( 1, max_block_elements // max( 1, lat2.size ))
+    for start in range( 0, lat1.size, block_rows ):
+        stop = min( start + block_rows, lat1.size )
+        lat_dif = lat2 - lat1[start:stop, np.newaxis]
+        lng_dif = lng2 - lng1[start:stop, np.newaxis]
+        a = ( np.sin( lat_dif / 2.0 )**2
+              + cos_lat1[start:stop, np.newaxis] * cos_lat2 * np.sin( lng_dif / 2.0 )**2 )
+        distance_matrix[start:stop] = np.arcsin( np.sqrt( np.clip( a, 0.0, 1.0 )))
+        continue
+
+    distance_matrix *= 2 * EARTH_RADIUS_AT_LAT_40_KM * ( MILES_PER_KM if miles else 1.0 )
+    return distance_matrix
+
+
+def get_radius_geo_bounds( latitude : float, longitude : float, distance_miles : float ):
+    """
+    GeoBounds containing every point within the distance (as measured by
+    get_distance()) of the given point. Longitude is not limited when the
+    circle reaches a pole or crosses the 180 degree meridian.
+    """
+    from .geo_bounds import GeoBounds
+
+    # Angular radius, slightly enlarged so rounding cannot exclude a point on the circle
+    angular_distance = ( distance_miles / ( EARTH_RADIUS_AT_LAT_40_KM * MILES_PER_KM )) * ( 1.0 + 1e-9 ) + 1e-12
+    latitude_delta = math.degrees( angular_distance )
+    latitude_min = max( -90.0, latitude - latitude_delta )
+    latitude_max = min( 90.0, latitude + latitude_delta )
+
+    sine_ratio = math.sin( angular_distance ) / max( math.cos( math.radians( latitude )), 1e-12 )
+    if ( latitude_min <= -90.0 ) or ( latitude_max >= 90.0 ) or ( angular_distance >= math.pi / 2.0 ) or ( sine_ratio >= 1.0 ):
+        return GeoBounds( longitude_min = -180.0, longitude_max = 180.0,
+                          latitude_min = latitude_min, latitude_max = latitude_max )
+
+    longitude_delta = math.degrees( math.asin( sine_ratio ))
+    longitude_min = longitude - longitude_delta
+    longitude_max = longitude + longitude_delta
+    if ( longitude_min < -180.0 ) or ( longitude_max > 180.0 ):
+        longitude_min, longitude_max = -180.0, 180.0
+    return GeoBounds( longitude_min = longitude_min, longitude_max = longitude_max,
+                      latitude_min = latitude_min, latitude_max = latitude_max )
+
+
+def get_indices_within_distance( latitude : float,
+                                 longitude : float,
+                                 lat_array : np.ndarray,
+                                 lng_array : np.ndarray,
+                                 distance_miles : float ):
+    """
+    Indices (ascending) of the points within the distance of the given
+    point. Points outside the GeoBounds of the circle are discarded with
+    simple comparisons before the exact distance of the rest is computed.
+    """
+    from .geo_bounds import GeoBoundsArray
+
+    lat_array = np.asarray( lat_array, dtype = np.float64 )
+    lng_array = np.asarray( lng_array, dtype = np.float64 )
+    geo_bounds_array = GeoBoundsArray.from_geo_bounds_list([
+        get_radius_geo_bounds( latitude, longitude, distance_miles )
+    ])
+    candidate_indices = np.flatnonzero( geo_bounds_array.contains_point( lng_array, lat_array )[:, 0] )
+    distance_array = get_distance_array( latitude, longitude,
+                                         lat_array[candidate_indices], lng_array[candidate_indices] )
+    return candidate_indices[distance_array <= distance_miles]
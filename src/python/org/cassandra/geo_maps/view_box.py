@@ -1,5 +1,7 @@
 from dataclasses import dataclass
 
+import numpy as np
+
 from .display_bounds import DisplayBounds
 
 
@@ -84,6 +86,24 @@ class ViewBox:
                  ( self.x + self.width, self.y + self.height ),
                  ( self.x, self.y + self.height ) ]
 
+    def get_edge_points_array( self, points_per_edge : int ):
+        """
+        The tuple ( x_array, y_array ) of points evenly spaced along the
+        edges, points_per_edge (at least 2) on each edge including its
+        corners, going around from the upper left corner.
+        """
+        points_per_edge = max( 2, int( points_per_edge ))
+        fraction_array = np.linspace( 0.0, 1.0, points_per_edge )[:-1]
+        x_array = np.concatenate([ self.x + ( self.width * fraction_array ),
+                                   np.full( points_per_edge - 1, self.x + self.width ),
+                                   self.x + self.width - ( self.width * fraction_array ),
+                                   np.full( points_per_edge - 1, self.x ) ])
+        y_array = np.concatenate([ np.full( points_per_edge - 1, self.y ),
+                                   self.y + ( self.height * fraction_array ),
+                                   np.full( points_per_edge - 1, self.y + self.height ),
+                                   self.y + self.height - ( self.height * fraction_array ) ])
+        return ( x_array, y_array )
+
     @staticmethod
     def from_display_bounds( display_bounds : DisplayBounds,
                              aspect_ratio : float,